@@ -1,6 +1,7 @@
 """
 Ads Router - Ad intelligence endpoints
 """
+import asyncio
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 from typing import Optional, List
@@ -52,7 +53,8 @@ async def match_audience(
     """
     tags = image_tags.split(",") if image_tags else None
     
-    result = ads_service.match_audience(
+    result = await asyncio.to_thread(
+        ads_service.match_audience,
         db=db,
         title=title,
         description=description,
@@ -751,18 +751,21 @@ async def get_chat_sentiment(
     total_toxicity = 0.0
     analyzed = 0
     
-    for message in recent_messages:
-        try:
-            # Quick sentiment check
-            result = classify_service.analyze_sentiment(message.content)
-            sentiment = result.get("sentiment", "neutral")
-            if sentiment in sentiments:
-                sentiments[sentiment] += 1
-            
-            total_toxicity += message.toxicity_score or 0.0
-            analyzed += 1
-        except:
-            pass
+    # Quick sentiment check, one batched pipeline run for all messages
+    results = classify_service.analyze_sentiment_batch(
+        [message.content or "" for message in recent_messages]
+    )
+    
+    for message, result in zip(recent_messages, results):
+        if "error" in result:
+            continue
+        
+        sentiment = result.get("sentiment", "neutral")
+        if sentiment in sentiments:
+            sentiments[sentiment] += 1
+        
+        total_toxicity += message.toxicity_score or 0.0
+        analyzed += 1
     
     avg_toxicity = total_toxicity / max(analyzed, 1)
     
@@ -7,19 +7,24 @@ Includes:
 - /feedback - Submit feedback for responses
 - /knowledge/* - CRUD operations for knowledge documents
 - /knowledge/upload - Upload PDF/text files
+- /knowledge/bulk-upload, /knowledge/jobs/{job_id} - Background bulk ingestion
 
 API Key Authentication:
 - Set API_KEY in environment variables (default: "internal-api-key")
 - Pass in request header: x-api-key: <your-api-key>
 """
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List
 from sqlalchemy.orm import Session
 import io
+import json
 
 from kumele_ai.dependencies import get_db
 from kumele_ai.services.chatbot_service import chatbot_service
+from kumele_ai.services.answer_cache_service import answer_cache_service
+from kumele_ai.services.knowledge_ingest_service import knowledge_ingest_service
 from kumele_ai.db.models import KnowledgeDocument
 
 router = APIRouter()
@@ -40,11 +45,14 @@ class AskResponse(BaseModel):
     language: Optional[str] = None
     confidence: Optional[float] = None
     sources: Optional[List[dict]] = None
+    cache: Optional[dict] = None
+    debug: Optional[dict] = None
     error: Optional[str] = None
 
 
 class SyncRequest(BaseModel):
     document_ids: Optional[List[int]] = None
+    force: bool = False  # Re-index even if the document hash is unchanged
 
 
 class FeedbackRequest(BaseModel):
@@ -104,13 +112,21 @@ async def chatbot_ask(
     Process a chatbot query using RAG.
     
     Flow:
-    1. Detect language
-    2. Translate to English if needed
-    3. Embed query
-    4. Retrieve top-K chunks from Qdrant
+    1. Embed query
+    2. Concurrently: semantic answer cache lookup (returns early on a hit),
+       language detection and a speculative top-K retrieval on the raw query
+       (dense + BM25 fused with reciprocal rank fusion, optional cross-encoder rerank)
+    3. Translate to English and retrieve again if the query is not English
+    4. Fit context to the prompt token budget (near-duplicates dropped, max_new_tokens sized to it)
     5. Generate answer via LLM
     6. Translate back if needed
-    7. Log Q&A
+    7. Log Q&A (with prompt tokens and generation time) and cache the answer in the background
+    
+    `cache` reports whether the answer came from the cache, the similarity
+    of the matched query, the latency saved and the running hit rate.
+    `debug.timings_ms` holds the wall time of each stage; `debug.degraded`
+    lists retrieval stages skipped for exceeding their latency budget and
+    `debug.prompt` the prompt token budgeting.
     """
     result = await chatbot_service.ask(
         db=db,
@@ -121,6 +137,35 @@ async def chatbot_ask(
     return AskResponse(**result)
 
 
+@router.post("/ask/stream")
+async def chatbot_ask_stream(request: AskRequest):
+    """
+    Streaming variant of /ask (Server-Sent Events).
+    
+    Events:
+    - meta: {"language", "confidence", "sources", "cache"} once retrieval is done
+    - token: {"text"} for each generated chunk
+    - done: {"log_id", "debug"} after the Q&A is logged
+    - error: {"error"}
+    
+    Tokens come from TGI /generate_stream, or OpenRouter with stream: true.
+    Non-English answers are translated after generation and sent as one token event.
+    """
+    async def event_stream():
+        async for event in chatbot_service.ask_stream(
+            query=request.query,
+            user_id=request.user_id
+        ):
+            name = event.pop("event")
+            yield f"event: {name}\ndata: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/sync")
 async def chatbot_sync(
     request: SyncRequest,
@@ -133,9 +178,10 @@ async def chatbot_sync(
     Default API key is "internal-api-key" (change in production via API_KEY env var).
     
     Triggered when FAQ/blog/event/policy changes.
-    - Chunks text (~500 tokens)
-    - Generates embeddings
-    - Upserts into Qdrant
+    - Skips documents whose content hash is unchanged (unless force=true)
+    - Chunks text to the embedding model's token limit (with overlap) into deterministic point ids
+    - Embeds only new chunks, in batches
+    - Upserts into Qdrant and deletes stale chunks
     - Tracks version in Postgres
     
     **Usage**:
@@ -150,7 +196,8 @@ async def chatbot_sync(
     """
     result = await chatbot_service.sync_documents(
         db=db,
-        document_ids=request.document_ids
+        document_ids=request.document_ids,
+        force=request.force
     )
     
     return result
@@ -390,11 +437,14 @@ async def delete_knowledge_document(
     if not existing_doc:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    # TODO: Remove from Qdrant
+    await chatbot_service.delete_document_vectors(document_id)
     
     db.delete(existing_doc)
     db.commit()
     
+    # Cached answers may cite the deleted document
+    await answer_cache_service.invalidate()
+    
     return {"success": True, "message": f"Document {document_id} deleted"}
 
 
@@ -559,14 +609,17 @@ async def upload_knowledge_document(
 async def bulk_upload_documents(
     files: List[UploadFile] = File(...),
     category: str = Form("guidelines"),
-    language: str = Form("en"),
-    db: Session = Depends(get_db)
+    language: str = Form("en")
 ):
     """
     Upload multiple PDF/text files at once.
     
     **Authentication**: Requires x-api-key header.
     
+    Files are spooled to disk and ingested in the background (PDF pages
+    extracted in parallel, chunked, embedded and indexed). Returns a job id
+    immediately; poll GET /knowledge/jobs/{job_id} for per-file progress.
+    
     **Usage**:
     ```bash
     curl -X POST "http://localhost:8000/ai/chatbot/knowledge/bulk-upload" \\
@@ -577,81 +630,52 @@ async def bulk_upload_documents(
       -F "category=policy"
     ```
     """
-    results = []
-    errors = []
+    from kumele_ai.worker.tasks import ingest_knowledge_files
     
-    for file in files:
-        try:
-            # Reset file position
-            await file.seek(0)
-            
-            # Use the single upload endpoint logic
-            filename = file.filename or "unknown"
-            extension = filename.lower().split(".")[-1] if "." in filename else ""
-            
-            if extension not in ["pdf", "txt", "md"]:
-                errors.append({"file": filename, "error": "Unsupported format"})
-                continue
-            
-            content_bytes = await file.read()
-            
-            if extension == "pdf":
-                try:
-                    import pdfplumber
-                    pdf_file = io.BytesIO(content_bytes)
-                    text_content = ""
-                    with pdfplumber.open(pdf_file) as pdf:
-                        for page in pdf.pages:
-                            page_text = page.extract_text()
-                            if page_text:
-                                text_content += page_text + "\n\n"
-                except:
-                    from PyPDF2 import PdfReader
-                    pdf_file = io.BytesIO(content_bytes)
-                    reader = PdfReader(pdf_file)
-                    text_content = ""
-                    for page in reader.pages:
-                        text_content += page.extract_text() + "\n\n"
-            else:
-                try:
-                    text_content = content_bytes.decode("utf-8")
-                except:
-                    text_content = content_bytes.decode("latin-1")
-            
-            doc_title = filename.rsplit(".", 1)[0].replace("_", " ").replace("-", " ").title()
-            
-            new_doc = KnowledgeDocument(
-                title=doc_title,
-                content=text_content.strip(),
-                category=category,
-                language=language
-            )
-            db.add(new_doc)
-            db.commit()
-            db.refresh(new_doc)
-            
-            results.append({
-                "id": new_doc.id,
-                "title": new_doc.title,
-                "file": filename
-            })
-            
-        except Exception as e:
-            errors.append({"file": file.filename, "error": str(e)})
+    try:
+        job = await knowledge_ingest_service.create_job(
+            [(file.filename, file.file) for file in files],
+            category=category,
+            language=language
+        )
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Could not create ingest job: {e}")
     
-    # Sync all new documents
-    if results:
-        try:
-            doc_ids = [r["id"] for r in results]
-            await chatbot_service.sync_documents(db=db, document_ids=doc_ids)
-        except Exception as e:
-            print(f"Warning: Failed to sync documents: {e}")
+    queued = [f for f in job["files"] if f["status"] == "queued"]
+    if queued:
+        ingest_knowledge_files.delay(job["job_id"])
     
     return {
-        "success": len(errors) == 0,
-        "uploaded": len(results),
-        "failed": len(errors),
-        "documents": results,
-        "errors": errors
+        "success": bool(queued),
+        "job_id": job["job_id"],
+        "status_url": f"/ai/chatbot/knowledge/jobs/{job['job_id']}",
+        "queued": len(queued),
+        "failed": job["files_failed"],
+        "files": [
+            {"file": f["filename"], "status": f["status"], "error": f["error"]}
+            for f in job["files"]
+        ]
     }
 
+
+@router.get("/knowledge/jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    """
+    Progress of a bulk-upload ingestion job.
+    
+    **Authentication**: Requires x-api-key header.
+    
+    Per file: status (queued, processing, indexing, done, failed),
+    pages_total/pages_done, chunks embedded so far and the created
+    document_id. Jobs expire after KB_INGEST_JOB_TTL_SEC.
+    """
+    try:
+        job = knowledge_ingest_service.get_job(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    
+    return job
+
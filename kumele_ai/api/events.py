@@ -1,6 +1,7 @@
 """
 Events Router - Event rating and operations endpoints
 """
+import asyncio
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from typing import Optional
@@ -8,6 +9,8 @@ from sqlalchemy.orm import Session
 
 from kumele_ai.dependencies import get_db
 from kumele_ai.services.event_service import event_service
+from kumele_ai.services.event_embedding_service import event_embedding_service
+from kumele_ai.services.event_search_service import event_search_service
 
 router = APIRouter()
 
@@ -68,3 +71,33 @@ async def get_event_ratings(
     )
     
     return result
+
+
+@router.post("/{event_id}/embedding")
+async def sync_event_embedding(
+    event_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Refresh the stored embedding for an event.
+    
+    Call this when an event is created or edited. Unchanged events
+    are skipped based on their content hash. The event is also
+    mirrored into (or removed from) the Qdrant events collection.
+    """
+    result = await asyncio.to_thread(
+        event_embedding_service.refresh_events,
+        db=db,
+        event_ids=[event_id]
+    )
+    
+    if result.get("success") and result.get("events_checked") == 0:
+        return {"success": False, "error": "Event not found"}
+    
+    result["vector_sync"] = await asyncio.to_thread(
+        event_search_service.sync_events,
+        db=db,
+        event_ids=[event_id]
+    )
+    
+    return result
@@ -9,6 +9,7 @@ Supports filtering by:
 - Host reputation (tier weighting)
 - Event capacity
 """
+import asyncio
 from fastapi import APIRouter, Depends, Query
 from typing import Optional, List
 from sqlalchemy.orm import Session
@@ -16,6 +17,7 @@ from pydantic import BaseModel
 
 from kumele_ai.dependencies import get_db
 from kumele_ai.services.matching_service import matching_service
+from kumele_ai.services.stream_service import stream_service
 
 router = APIRouter()
 
@@ -83,7 +85,8 @@ async def match_events(
         "verified_hosts_only": verified_hosts_only
     }
     
-    results = matching_service.match_events(
+    results = await asyncio.to_thread(
+        matching_service.match_events,
         db=db,
         user_id=user_id,
         limit=limit,
@@ -92,6 +95,16 @@ async def match_events(
         filters=filters
     )
     
+    # Hobby/location lookups are the app's event search (top searches, GET /nlp/trends?source=search)
+    search_query = " ".join(term for term in (hobby, location) if term)
+    if search_query:
+        await stream_service.publish_search_event_async(
+            user_id,
+            search_query,
+            filters={"hobby": hobby, "location": location, **filters},
+            results_count=len(results)
+        )
+    
     return {
         "user_id": user_id,
         "match_type": "objective_relevance",
@@ -120,7 +133,8 @@ async def match_events_with_capacity(
     from kumele_ai.db import models
     from sqlalchemy import func
     
-    results = matching_service.match_events(
+    results = await asyncio.to_thread(
+        matching_service.match_events,
         db=db,
         user_id=user_id,
         limit=limit,
@@ -193,7 +207,8 @@ async def match_events_by_host_reputation(
     from kumele_ai.db import models
     from sqlalchemy import func
     
-    results = matching_service.match_events(
+    results = await asyncio.to_thread(
+        matching_service.match_events,
         db=db,
         user_id=user_id,
         limit=limit * 2,  # Get more to filter
@@ -35,6 +35,10 @@ class VideoModerationRequest(BaseModel):
     content_id: Optional[str] = None
 
 
+class BatchTextModerationRequest(BaseModel):
+    items: List[TextModerationRequest]
+
+
 class ModerationRequest(BaseModel):
     content_type: str  # text, image, video
     text: Optional[str] = None
@@ -125,6 +129,34 @@ async def moderate_content(
     return result
 
 
+@router.post("/batch")
+async def moderate_text_batch(
+    request: BatchTextModerationRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk text moderation (up to 500 items).
+    
+    Same checks and thresholds as text moderation via POST /moderation,
+    with toxicity and sentiment models run in batches across all items.
+    Returns one result per item, in request order.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="At least one item required")
+    if len(request.items) > 500:
+        raise HTTPException(status_code=400, detail="At most 500 items per batch")
+    
+    results = moderation_service.moderate_texts(
+        db=db,
+        items=[item.model_dump() for item in request.items]
+    )
+    
+    return {
+        "processed": len(results),
+        "results": results
+    }
+
+
 @router.get("/{content_id}")
 async def get_moderation_status(
     content_id: str,
@@ -1,7 +1,7 @@
 """
 NLP Router - NLP analysis endpoints
 """
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
 from sqlalchemy.orm import Session
@@ -75,23 +75,35 @@ async def extract_keywords(
 async def get_keyword_trends(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
     top_k: int = Query(20, ge=1, le=100, description="Number of top keywords"),
+    mode: str = Query("exact", regex="^(exact|fast)$", description="exact counts or approximate sketches"),
+    source: str = Query("keywords", regex="^(keywords|search)$", description="Extracted keywords or search queries"),
     db: Session = Depends(get_db)
 ):
     """
     Get aggregated keyword trends over time.
     
     Ranks keywords by frequency and growth rate.
-    Uses PostgreSQL aggregates daily.
+    - mode=exact: hourly/daily keyword counts in Redis, kept up to date
+      from keywords_extracted stream events
+    - mode=fast: merged Count-Min / Space-Saving sketches; frequencies
+      are upper bounds, see error_bounds in the response
+    source=search (top search queries, i.e. hobby/location lookups on
+    GET /matching/events) is only available with mode=fast.
     
     Returns:
     - trends: List of trending keywords with frequency and growth
     - rising_count: Number of rising keywords
     - falling_count: Number of falling keywords
     """
+    if source == "search" and mode != "fast":
+        raise HTTPException(status_code=400, detail="source=search requires mode=fast")
+    
     result = nlp_service.get_keyword_trends(
         db=db,
         days=days,
-        top_k=top_k
+        top_k=top_k,
+        mode=mode,
+        source=source
     )
     
     return result
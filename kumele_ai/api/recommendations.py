@@ -1,6 +1,7 @@
 """
 Recommendations Router - Personalized recommendation endpoints
 """
+import asyncio
 from fastapi import APIRouter, Depends, Query
 from typing import Optional
 from sqlalchemy.orm import Session
@@ -29,7 +30,8 @@ async def recommend_events(
     This is predicted preference, NOT objective relevance.
     Use /match/events for objective relevance.
     """
-    results = recommendation_service.recommend_events(
+    results = await asyncio.to_thread(
+        recommendation_service.recommend_events,
         db=db,
         user_id=user_id,
         limit=limit,
@@ -59,7 +61,8 @@ async def recommend_hobbies(
     - Engagement patterns
     - Similar users' hobbies
     """
-    results = recommendation_service.recommend_hobbies(
+    results = await asyncio.to_thread(
+        recommendation_service.recommend_hobbies,
         db=db,
         user_id=user_id,
         limit=limit
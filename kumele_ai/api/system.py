@@ -8,6 +8,12 @@ from kumele_ai.config import settings
 from kumele_ai.services.llm_service import llm_service
 from kumele_ai.services.translate_service import translate_service
 from kumele_ai.services.chatbot_service import chatbot_service
+from kumele_ai.services.embed_service import embed_service
+from kumele_ai.services.classify_service import classify_service
+from kumele_ai.services.inference_backend import inference_backend
+from kumele_ai.services.answer_cache_service import answer_cache_service
+from kumele_ai.services.stream_processor import stream_processor
+from kumele_ai.services.stream_publisher import stream_publisher
 
 router = APIRouter()
 
@@ -62,3 +68,31 @@ async def health_check():
         "worker_queue_depth": worker_queue_depth,
         "timestamp": datetime.utcnow().isoformat() + "Z"
     }
+
+
+@router.get("/ai/cache/stats")
+async def cache_stats():
+    """
+    Hit/miss counters for in-process model caches.
+    """
+    return {
+        "embedding": embed_service.get_cache_stats(),
+        "embedding_batcher": embed_service.batcher.get_stats(),
+        "classify": classify_service.get_cache_stats(),
+        "inference_backend": inference_backend.get_status(),
+        "chatbot_answers": answer_cache_service.get_stats(),
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
+
+
+@router.get("/ai/streams/stats")
+async def stream_stats():
+    """
+    Consumer-group lag, pending events and throughput per Redis stream,
+    and this process's buffered publisher counters.
+    """
+    return {
+        **stream_processor.get_group_stats(),
+        "publisher": stream_publisher.get_stats(),
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
@@ -4,6 +4,7 @@ Taxonomy API Router - Manages canonical interest/hobby taxonomy
 Endpoints:
 - GET /taxonomy/interests - Fetch interests, optionally filtered by updated_since
 """
+import asyncio
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
 from typing import Optional, List, Dict, Any
@@ -173,7 +174,8 @@ async def create_interest(
     }
     ```
     """
-    result = taxonomy_service.create_interest(
+    result = await asyncio.to_thread(
+        taxonomy_service.create_interest,
         db=db,
         name=request.name,
         category=request.category,
@@ -273,5 +275,5 @@ async def sync_from_hobbies(
     This populates the interest_taxonomy table from the legacy hobbies table.
     Safe to run multiple times - skips existing entries.
     """
-    result = taxonomy_service.sync_from_hobbies(db)
+    result = await asyncio.to_thread(taxonomy_service.sync_from_hobbies, db)
     return result
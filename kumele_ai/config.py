@@ -26,6 +26,8 @@ class Settings(BaseSettings):
     # Qdrant
     QDRANT_URL: str = "http://qdrant:6333"
     QDRANT_COLLECTION: str = "knowledge_embeddings"
+    QDRANT_EVENTS_COLLECTION: str = "events"
+    QDRANT_ANSWER_CACHE_COLLECTION: str = "chatbot_answer_cache"
     
     # Translation Service (Argos/LibreTranslate)
     TRANSLATE_URL: str = "http://argos:5000"
@@ -37,6 +39,11 @@ class Settings(BaseSettings):
     # Local LLM (Mistral via TGI) - used when LLM_PROVIDER is "local" or "auto"
     LLM_API_URL: str = "http://mistral:8080"
     LLM_MODEL: str = "mistralai/Mistral-7B-Instruct-v0.2"
+    # Token limits of the TGI deployment (MAX_INPUT_LENGTH / MAX_TOTAL_TOKENS)
+    LLM_MAX_INPUT_TOKENS: int = 4096
+    LLM_MAX_TOTAL_TOKENS: int = 8192
+    # Tokenizer used to count prompt tokens (defaults to LLM_MODEL)
+    LLM_TOKENIZER: str = ""
     
     # OpenRouter - used when LLM_PROVIDER is "openrouter" or as fallback in "auto" mode
     OPENROUTER_API_KEY: str = ""
@@ -45,6 +52,17 @@ class Settings(BaseSettings):
     OPENROUTER_SITE_URL: str = "https://kumele.ai"  # For OpenRouter rankings
     OPENROUTER_SITE_NAME: str = "Kumele"
     
+    # Outbound HTTP connection pooling (LLM, translation, geocoding)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SEC: float = 30.0
+    HTTP2_ENABLED: bool = True  # Used when the h2 package is installed
+    
+    # Chatbot semantic answer cache
+    CHATBOT_ANSWER_CACHE_ENABLED: bool = True
+    CHATBOT_ANSWER_CACHE_THRESHOLD: float = 0.95  # Min cosine similarity between queries
+    CHATBOT_ANSWER_CACHE_TTL_SEC: int = 604800
+    
     # SMTP (Acelle)
     SMTP_HOST: str = "localhost"
     SMTP_PORT: int = 587
@@ -55,6 +73,68 @@ class Settings(BaseSettings):
     # Embedding model
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
     
+    # Inference backend for embedding/classifier models: "torch" or "onnx" (int8 dynamic quantization)
+    INFERENCE_BACKEND: str = "torch"
+    ONNX_CACHE_DIR: str = "/root/.cache/kumele_onnx"  # on the model_cache volume
+    ONNX_QUANTIZE: bool = True
+    ONNX_QUANTIZATION_CONFIG: str = "avx2"  # or "avx512_vnni", "arm64"
+    ONNX_PARITY_CHECK: bool = True
+    ONNX_PARITY_MIN_COSINE: float = 0.98
+    ONNX_PARITY_MAX_SCORE_DIFF: float = 0.1
+    
+    # Embedding cache (in-process LRU + Redis)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_LRU_SIZE: int = 10000
+    EMBEDDING_CACHE_TTL_SEC: int = 604800
+    
+    # Embedding micro-batching (concurrent callers share model.encode calls)
+    EMBEDDING_BATCHER_ENABLED: bool = True
+    EMBEDDING_BATCH_MAX_SIZE: int = 64
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5
+    
+    # Knowledge chunking, in embedding-model tokens (capped at the model's max sequence length)
+    KB_CHUNK_MAX_TOKENS: int = 256
+    KB_CHUNK_OVERLAP_TOKENS: int = 32
+    
+    # Bulk knowledge ingestion (spool dir must be shared by the API and Celery workers)
+    KB_INGEST_SPOOL_DIR: str = "/var/lib/kumele/ingest"
+    KB_INGEST_PDF_WORKERS: int = 4
+    KB_INGEST_PAGES_PER_TASK: int = 8
+    KB_INGEST_EMBED_BATCH: int = 64
+    KB_INGEST_JOB_TTL_SEC: int = 86400
+    
+    # Hybrid chatbot retrieval: dense + BM25 fused with reciprocal rank fusion, optional cross-encoder rerank
+    CHATBOT_HYBRID_ENABLED: bool = True
+    CHATBOT_RETRIEVAL_CANDIDATES: int = 20
+    CHATBOT_RRF_K: int = 60
+    KB_BM25_K1: float = 1.2
+    KB_BM25_B: float = 0.75
+    CHATBOT_RERANK_ENABLED: bool = False
+    CHATBOT_RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    CHATBOT_RERANK_TOP_N: int = 20
+    
+    # Per-stage retrieval latency budgets (ms); a stage over budget is dropped from the result
+    CHATBOT_DENSE_BUDGET_MS: float = 1000
+    CHATBOT_LEXICAL_BUDGET_MS: float = 200
+    CHATBOT_RERANK_BUDGET_MS: float = 300
+    
+    # Chatbot prompt budget, in LLM tokens: near-duplicate chunks are dropped and context trimmed to the budget
+    CHATBOT_CONTEXT_MAX_TOKENS: int = 1024
+    CHATBOT_CONTEXT_MIN_CHUNK_TOKENS: int = 64
+    CHATBOT_CONTEXT_DEDUP_THRESHOLD: float = 0.9
+    # Answer length: CHATBOT_MIN_NEW_TOKENS plus a share of the context tokens, capped at CHATBOT_MAX_NEW_TOKENS
+    CHATBOT_MIN_NEW_TOKENS: int = 128
+    CHATBOT_MAX_NEW_TOKENS: int = 512
+    CHATBOT_ANSWER_TOKENS_PER_CONTEXT_TOKEN: float = 0.25
+    
+    # Batch size for HF classification pipelines (sentiment / toxicity)
+    CLASSIFY_BATCH_SIZE: int = 32
+    
+    # Classification result cache (in-process LRU + Redis), keyed by model + sha256(text)
+    CLASSIFY_CACHE_ENABLED: bool = True
+    CLASSIFY_CACHE_LRU_SIZE: int = 20000
+    CLASSIFY_CACHE_TTL_SEC: int = 604800
+    
     # Moderation thresholds
     MODERATION_TEXT_TOXICITY_THRESHOLD: float = 0.60
     MODERATION_TEXT_HATE_THRESHOLD: float = 0.30
@@ -69,6 +149,56 @@ class Settings(BaseSettings):
     NOMINATIM_TIMEOUT_SEC: int = 10
     NOMINATIM_CACHE_TTL_SEC: int = 86400
     
+    # Matching geo index (in-process grid over upcoming events)
+    MATCHING_GEO_CELL_DEG: float = 0.5
+    MATCHING_GEO_REFRESH_SEC: int = 30
+    MATCHING_GEO_REBUILD_SEC: int = 900
+    
+    # Hobby embedding matrix cache (matching and ads)
+    HOBBY_EMBEDDING_CHECK_SEC: int = 60
+    HOBBY_EMBEDDING_CACHE_TTL_SEC: int = 604800
+    
+    # Matching ANN retrieval (Qdrant events collection)
+    MATCHING_ANN_ENABLED: bool = True
+    MATCHING_ANN_TOP_K: int = 200
+    MATCHING_ANN_COVERAGE_CHECK_SEC: int = 60
+    EVENT_VECTOR_SYNC_INTERVAL_SEC: int = 600  # sync_event_vectors beat schedule
+    
+    # Redis Streams consumer groups (scripts/run_stream_processors.py)
+    STREAM_CONSUMER_GROUP: str = "kumele-processors"
+    STREAM_CONSUMERS: int = 2
+    STREAM_BATCH_SIZE: int = 100
+    STREAM_BLOCK_MS: int = 5000
+    STREAM_HANDLER_RETRIES: int = 3
+    STREAM_RETRY_BACKOFF_MS: int = 100
+    STREAM_CLAIM_IDLE_MS: int = 60000
+    STREAM_CLAIM_INTERVAL_SEC: int = 30
+    STREAM_MAX_DELIVERIES: int = 5
+    
+    # Buffered stream publishing (pipelined XADD batches)
+    STREAM_PUBLISH_BUFFERED: bool = True
+    STREAM_PUBLISH_BATCH_SIZE: int = 500
+    STREAM_PUBLISH_FLUSH_MS: int = 50
+    STREAM_PUBLISH_QUEUE_MAX: int = 10000
+    STREAM_PUBLISH_OVERFLOW: str = "block"  # block, drop_newest, drop_oldest
+    STREAM_PUBLISH_BLOCK_MS: int = 50
+    
+    # Keyword trends (Redis buckets fed by keywords_extracted stream events)
+    KEYWORD_TRENDS_HOURLY_DAYS: int = 2
+    KEYWORD_TRENDS_RETENTION_DAYS: int = 400
+    KEYWORD_TRENDS_CACHE_SEC: int = 60
+    
+    # Heavy-hitter sketches (Count-Min + Space-Saving) for keywords and searches
+    HEAVY_HITTERS_EPSILON: float = 0.002
+    HEAVY_HITTERS_DELTA: float = 0.02
+    HEAVY_HITTERS_CAPACITY: int = 500
+    HEAVY_HITTERS_FLUSH_SEC: int = 10
+    HEAVY_HITTERS_HOURLY_DAYS: int = 2
+    HEAVY_HITTERS_RETENTION_DAYS: int = 400
+    
+    # Keyword extraction (TF-IDF over hashed features)
+    KEYWORD_HASH_FEATURES: int = 1048576  # 2^20; document frequencies are kept per feature count
+    
     # Celery
     CELERY_BROKER_URL: str = "redis://redis:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://redis:6379/0"
@@ -3,7 +3,7 @@ SQLAlchemy ORM Models for Kumele AI/ML Service
 """
 from sqlalchemy import (
     Column, Integer, String, Text, Float, Boolean, DateTime, 
-    ForeignKey, Date, JSON, Numeric, UniqueConstraint, Index
+    ForeignKey, Date, JSON, Numeric, UniqueConstraint, Index, LargeBinary
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
@@ -206,6 +206,8 @@ class AdInteraction(Base):
     ad_id = Column(Integer, ForeignKey("ads.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"))
     interaction_type = Column(String(50), nullable=False)  # impression, click, conversion
+    # ad_events stream entry the row was written from (redeliveries are rejected)
+    stream_entry_id = Column(String(64), unique=True)
     created_at = Column(DateTime, server_default=func.now())
     
     # Relationships
@@ -283,6 +285,7 @@ class KnowledgeDocument(Base):
     content = Column(Text, nullable=False)
     category = Column(String(50), nullable=False)  # faq, blog, event, policy
     language = Column(String(10), default="en")
+    content_hash = Column(String(64))  # Hash of the last indexed version; unchanged docs skip re-sync
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
 
@@ -295,9 +298,25 @@ class KnowledgeEmbedding(Base):
     chunk_text = Column(Text)
     embedding_model = Column(String(255))
     vector_id = Column(String(255))  # Qdrant point ID
+    term_count = Column(Integer)  # BM25 length of the chunk (indexed terms)
     last_indexed = Column(DateTime, server_default=func.now())
 
 
+class KnowledgeTerm(Base):
+    """BM25 postings: term frequency of a term in a knowledge chunk"""
+    __tablename__ = "knowledge_terms"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("knowledge_documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    vector_id = Column(String(255), nullable=False)  # Chunk's Qdrant point ID
+    term = Column(String(64), nullable=False)
+    tf = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_knowledge_terms_term', 'term'),
+    )
+
+
 class ChatbotLog(Base):
     __tablename__ = "chatbot_logs"
     
@@ -308,6 +327,8 @@ class ChatbotLog(Base):
     language = Column(String(10))
     confidence = Column(Float)
     source_docs = Column(JSONB)
+    prompt_tokens = Column(Integer)  # LLM prompt size after context budgeting (null for cache hits)
+    generation_ms = Column(Float)  # LLM generation wall time
     feedback = Column(String(50))  # helpful, not_helpful
     created_at = Column(DateTime, server_default=func.now())
 
@@ -1102,6 +1123,30 @@ class EventMLFeatures(Base):
     )
 
 
+class EventEmbedding(Base):
+    """
+    Precomputed event embeddings for matching.
+    
+    Keyed by event_id and a content hash of title, description and
+    hobby_tags. Vectors are stored as raw float32 bytes so a whole
+    candidate set can be loaded into a matrix without re-encoding.
+    """
+    __tablename__ = "event_embeddings"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False, unique=True)
+    content_hash = Column(String(64), nullable=False)
+    embedding_model = Column(String(255), nullable=False)
+    dimension = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # float32 bytes
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index('idx_event_embeddings_event', 'event_id'),
+        Index('idx_event_embeddings_model', 'embedding_model'),
+    )
+
+
 # ============================================================
 # AI OPS MONITORING
 # ============================================================
@@ -178,6 +178,7 @@ CREATE TABLE IF NOT EXISTS ad_interactions (
     ad_id INTEGER NOT NULL REFERENCES ads(id) ON DELETE CASCADE,
     user_id INTEGER REFERENCES users(id),
     interaction_type VARCHAR(50) NOT NULL,
+    stream_entry_id VARCHAR(64) UNIQUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -264,6 +265,7 @@ CREATE TABLE IF NOT EXISTS knowledge_documents (
     content TEXT NOT NULL,
     category VARCHAR(50) NOT NULL, -- faq, blog, event, policy
     language VARCHAR(10) DEFAULT 'en',
+    content_hash VARCHAR(64), -- hash of the last indexed version
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -278,12 +280,25 @@ CREATE TABLE IF NOT EXISTS knowledge_embeddings (
     chunk_text TEXT,
     embedding_model VARCHAR(255),
     vector_id VARCHAR(255), -- Qdrant point ID
+    term_count INTEGER, -- BM25 length of the chunk (indexed terms)
     last_indexed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE INDEX idx_knowledge_embeddings_doc ON knowledge_embeddings(document_id);
 CREATE INDEX idx_knowledge_embeddings_vector ON knowledge_embeddings(vector_id);
 
+-- Knowledge Terms (BM25 inverted index over knowledge_embeddings.chunk_text)
+CREATE TABLE IF NOT EXISTS knowledge_terms (
+    id SERIAL PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES knowledge_documents(id) ON DELETE CASCADE,
+    vector_id VARCHAR(255) NOT NULL, -- chunk's Qdrant point ID
+    term VARCHAR(64) NOT NULL,
+    tf INTEGER NOT NULL
+);
+
+CREATE INDEX idx_knowledge_terms_term ON knowledge_terms(term);
+CREATE INDEX idx_knowledge_terms_doc ON knowledge_terms(document_id);
+
 -- Chatbot Logs
 CREATE TABLE IF NOT EXISTS chatbot_logs (
     id SERIAL PRIMARY KEY,
@@ -293,6 +308,8 @@ CREATE TABLE IF NOT EXISTS chatbot_logs (
     language VARCHAR(10),
     confidence FLOAT,
     source_docs JSONB,
+    prompt_tokens INTEGER, -- LLM prompt size after context budgeting (null for cache hits)
+    generation_ms FLOAT, -- LLM generation wall time
     feedback VARCHAR(50), -- helpful, not_helpful
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -766,3 +783,22 @@ CREATE TABLE IF NOT EXISTS qr_scan_log (
 CREATE INDEX idx_qr_scan_qr ON qr_scan_log(qr_code_hash);
 CREATE INDEX idx_qr_scan_event ON qr_scan_log(event_id);
 CREATE INDEX idx_qr_scan_time ON qr_scan_log(scanned_at);
+
+-- =====================================================
+-- Event Embedding Store (matching)
+-- =====================================================
+
+-- Precomputed event embeddings keyed by content hash
+CREATE TABLE IF NOT EXISTS event_embeddings (
+    id SERIAL PRIMARY KEY,
+    event_id INTEGER NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+    content_hash VARCHAR(64) NOT NULL,  -- sha256 of title, description, hobby_tags
+    embedding_model VARCHAR(255) NOT NULL,
+    dimension INTEGER NOT NULL,
+    vector BYTEA NOT NULL,  -- float32 bytes
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(event_id)
+);
+
+CREATE INDEX idx_event_embeddings_event ON event_embeddings(event_id);
+CREATE INDEX idx_event_embeddings_model ON event_embeddings(embedding_model);
@@ -4,6 +4,7 @@ Main FastAPI application for Kumele AI/ML Service
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
 from kumele_ai.config import settings
@@ -33,6 +34,9 @@ from kumele_ai.api import (
     nft
 )
 from kumele_ai.models.registry import model_registry
+from kumele_ai.services.http_clients import http_clients
+from kumele_ai.services.stream_publisher import stream_publisher
+from kumele_ai.services.heavy_hitters import heavy_hitters
 
 # Configure logging
 logging.basicConfig(
@@ -53,11 +57,17 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error loading models: {e}")
     
+    # Flush buffered stream events from the event loop
+    await stream_publisher.start_async()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Kumele AI/ML Service...")
     await model_registry.unload_models()
+    await http_clients.aclose()
+    await stream_publisher.aclose()
+    await asyncio.to_thread(heavy_hitters.close)
 
 
 app = FastAPI(
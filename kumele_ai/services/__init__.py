@@ -3,6 +3,9 @@ Services package - Business logic layer
 """
 from kumele_ai.services.llm_service import llm_service
 from kumele_ai.services.embed_service import embed_service
+from kumele_ai.services.event_embedding_service import event_embedding_service
+from kumele_ai.services.event_search_service import event_search_service
+from kumele_ai.services.hobby_embedding_service import hobby_embedding_service
 from kumele_ai.services.classify_service import classify_service
 from kumele_ai.services.translate_service import translate_service
 from kumele_ai.services.email_service import email_service
@@ -28,6 +31,9 @@ from kumele_ai.services.attendance_verification_service import attendance_verifi
 __all__ = [
     "llm_service",
     "embed_service",
+    "event_embedding_service",
+    "event_search_service",
+    "hobby_embedding_service",
     "classify_service",
     "translate_service",
     "email_service",
@@ -11,6 +11,7 @@ from kumele_ai.db.models import (
 )
 from kumele_ai.services.embed_service import embed_service
 from kumele_ai.services.classify_service import classify_service
+from kumele_ai.services.hobby_embedding_service import hobby_embedding_service
 
 logger = logging.getLogger(__name__)
 
@@ -70,18 +71,28 @@ class AdsService:
             # Generate embedding for ad
             ad_embedding = embed_service.embed_text(ad_text)
             
-            # Find matching hobbies
-            all_hobbies = db.query(Hobby).all()
+            # Find matching hobbies against the cached hobby embedding matrix
+            hobby_ids, hobby_matrix = hobby_embedding_service.get_matrix(db)
             hobby_matches = []
             
-            for hobby in all_hobbies:
-                hobby_emb = embed_service.embed_hobby(hobby.name, hobby.description)
-                similarity = embed_service.compute_similarity(ad_embedding, hobby_emb)
+            if hobby_ids:
+                ad_vec = np.asarray(ad_embedding, dtype=np.float64)
+                matrix = hobby_matrix.astype(np.float64)
+                norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(ad_vec)
+                dots = matrix @ ad_vec
+                similarities = np.divide(dots, norms, out=np.zeros_like(dots), where=norms != 0)
                 
-                if similarity > 0.3:  # Threshold
+                matched = [(hobby_ids[i], float(similarities[i])) for i in np.flatnonzero(similarities > 0.3)]  # Threshold
+                names = dict(
+                    db.query(Hobby.id, Hobby.name).filter(
+                        Hobby.id.in_([hobby_id for hobby_id, _ in matched])
+                    ).all()
+                ) if matched else {}
+                
+                for hobby_id, similarity in matched:
                     hobby_matches.append({
-                        "hobby_id": hobby.id,
-                        "hobby_name": hobby.name,
+                        "hobby_id": hobby_id,
+                        "hobby_name": names.get(hobby_id),
                         "similarity": round(similarity, 4)
                     })
             
@@ -0,0 +1,284 @@
+"""
+Answer Cache Service - Semantic response cache for the RAG chatbot
+
+Support questions repeat constantly, so answers are stored in a dedicated
+Qdrant collection keyed by the embedding of the user's raw query:
+- payload: response (in the user's language), language, sources, confidence,
+  knowledge-base version, embedding model key, original pipeline latency
+  and creation time
+- a query whose cosine similarity to a cached query in the same detected
+  language is at least CHATBOT_ANSWER_CACHE_THRESHOLD reuses that answer,
+  skipping translation, retrieval and generation; entries are matched on
+  language too, since with a multilingual EMBEDDING_MODEL a question and
+  its translation embed close together and a French question would get
+  the cached English answer
+- entries only match queries embedded by the same model on the same
+  inference backend (embed_service.model_key)
+
+The knowledge-base version is a Redis counter bumped by sync_documents;
+lookups only match entries written under the current version, and entries
+from older versions are deleted when it changes. Redis calls are
+blocking and run in asyncio.to_thread; while Redis is down, reconnecting
+is retried every REDIS_RETRY_SEC and the version is kept in process.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+import redis
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    VectorParams, Distance, PointStruct, PayloadSchemaType,
+    Filter, FieldCondition, MatchValue, Range, FilterSelector
+)
+
+from kumele_ai.config import settings
+from kumele_ai.services.embed_service import embed_service
+
+logger = logging.getLogger(__name__)
+
+KB_VERSION_KEY = "chatbot:kb_version"
+REDIS_RETRY_SEC = 30
+
+
+class AnswerCacheService:
+    """Semantic cache of chatbot answers backed by Qdrant"""
+    
+    def __init__(self):
+        self.qdrant_client: Optional[AsyncQdrantClient] = None
+        self.collection_name = settings.QDRANT_ANSWER_CACHE_COLLECTION
+        self.enabled = settings.CHATBOT_ANSWER_CACHE_ENABLED
+        self.threshold = settings.CHATBOT_ANSWER_CACHE_THRESHOLD
+        self.ttl_sec = settings.CHATBOT_ANSWER_CACHE_TTL_SEC
+        
+        self._collection_ready = False
+        self._redis_client: Optional[redis.Redis] = None
+        self._redis_retry_at = 0.0
+        # Used when Redis is unavailable
+        self._local_kb_version = 0
+        self._stats = {"hits": 0, "misses": 0, "stored": 0, "latency_saved_ms": 0.0}
+    
+    def _get_qdrant_client(self) -> AsyncQdrantClient:
+        """Get or create async Qdrant client"""
+        if self.qdrant_client is None:
+            self.qdrant_client = AsyncQdrantClient(url=settings.QDRANT_URL)
+        return self.qdrant_client
+    
+    def _get_redis(self) -> Optional[redis.Redis]:
+        """
+        Get Redis client for the knowledge-base version counter.
+        
+        After a failed connect, returns None until REDIS_RETRY_SEC have
+        passed instead of reconnecting on every call.
+        """
+        if self._redis_client is None and time.monotonic() >= self._redis_retry_at:
+            try:
+                self._redis_client = redis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True
+                )
+                self._redis_client.ping()
+            except Exception as e:
+                logger.warning(f"Redis unavailable for answer cache versioning: {e}")
+                self._redis_client = None
+                self._redis_retry_at = time.monotonic() + REDIS_RETRY_SEC
+        return self._redis_client
+    
+    async def _ensure_collection(self):
+        """Ensure the answer cache collection and its payload indexes exist"""
+        if self._collection_ready:
+            return
+        
+        client = self._get_qdrant_client()
+        collections = (await client.get_collections()).collections
+        
+        if not any(c.name == self.collection_name for c in collections):
+            await client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=VectorParams(
+                    size=embed_service.get_embedding_dimension(),
+                    distance=Distance.COSINE
+                )
+            )
+            logger.info(f"Created Qdrant collection: {self.collection_name}")
+        
+        # Also run for existing collections (index creation is idempotent)
+        for field_name, schema in (
+            ("kb_version", PayloadSchemaType.INTEGER),
+            ("created_at", PayloadSchemaType.FLOAT),
+            ("language", PayloadSchemaType.KEYWORD),
+            ("embedding_model", PayloadSchemaType.KEYWORD),
+        ):
+            await client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=schema
+            )
+        
+        self._collection_ready = True
+    
+    def _read_kb_version(self) -> int:
+        """Current knowledge-base version (blocking)"""
+        try:
+            r = self._get_redis()
+            if r:
+                return int(r.get(KB_VERSION_KEY) or 0)
+        except Exception as e:
+            logger.warning(f"Answer cache version read error: {e}")
+        return self._local_kb_version
+    
+    def _bump_kb_version(self) -> int:
+        """Increment the knowledge-base version (blocking)"""
+        try:
+            r = self._get_redis()
+            if r:
+                return int(r.incr(KB_VERSION_KEY))
+        except Exception as e:
+            logger.warning(f"Answer cache version bump error: {e}")
+        
+        self._local_kb_version += 1
+        return self._local_kb_version
+    
+    async def get_kb_version(self) -> int:
+        """Current knowledge-base version"""
+        return await asyncio.to_thread(self._read_kb_version)
+    
+    async def invalidate(self) -> int:
+        """
+        Bump the knowledge-base version and drop entries from older versions.
+        
+        Called by sync_documents whenever documents were re-indexed.
+        """
+        version = await asyncio.to_thread(self._bump_kb_version)
+        
+        try:
+            await self._ensure_collection()
+            await self._get_qdrant_client().delete(
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(
+                    filter=Filter(must=[
+                        FieldCondition(key="kb_version", range=Range(lt=version))
+                    ])
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Answer cache purge error: {e}")
+        
+        logger.info(f"Chatbot answer cache invalidated (kb_version={version})")
+        return version
+    
+    async def lookup(self, query_embedding: List[float], language: str) -> Optional[Dict[str, Any]]:
+        """
+        Closest cached answer in the query's language for a query embedding,
+        or None below the threshold.
+        
+        Returns the cached payload plus "similarity".
+        """
+        if not self.enabled:
+            return None
+        
+        try:
+            await self._ensure_collection()
+            kb_version = await self.get_kb_version()
+            results = await self._get_qdrant_client().search(
+                collection_name=self.collection_name,
+                query_vector=query_embedding,
+                query_filter=Filter(must=[
+                    FieldCondition(key="kb_version", match=MatchValue(value=kb_version)),
+                    FieldCondition(key="language", match=MatchValue(value=language)),
+                    FieldCondition(key="embedding_model", match=MatchValue(value=embed_service.model_key)),
+                    FieldCondition(key="created_at", range=Range(gte=time.time() - self.ttl_sec))
+                ]),
+                score_threshold=self.threshold,
+                limit=1
+            )
+        except Exception as e:
+            logger.warning(f"Answer cache lookup error: {e}")
+            return None
+        
+        if not results:
+            self._stats["misses"] += 1
+            return None
+        
+        self._stats["hits"] += 1
+        return {**results[0].payload, "similarity": results[0].score}
+    
+    async def store(
+        self,
+        query: str,
+        query_embedding: List[float],
+        answer: Dict[str, Any],
+        latency_ms: float
+    ) -> None:
+        """
+        Cache an answer for a query.
+        
+        Args:
+            answer: response, language, confidence and sources of the answer
+            latency_ms: time the full pipeline took, reported as saved on hits
+        """
+        if not self.enabled:
+            return
+        
+        try:
+            await self._ensure_collection()
+            kb_version = await self.get_kb_version()
+            await self._get_qdrant_client().upsert(
+                collection_name=self.collection_name,
+                points=[PointStruct(
+                    # Same query and language under the same KB version overwrites its entry
+                    id=str(uuid.uuid5(
+                        uuid.NAMESPACE_URL,
+                        f"{kb_version}:{answer['language']}:{' '.join(query.split())}"
+                    )),
+                    vector=query_embedding,
+                    payload={
+                        "query": query,
+                        "response": answer["response"],
+                        "language": answer["language"],
+                        "confidence": answer["confidence"],
+                        "sources": answer["sources"],
+                        "kb_version": kb_version,
+                        "embedding_model": embed_service.model_key,
+                        "latency_ms": round(latency_ms, 1),
+                        "created_at": time.time()
+                    }
+                )]
+            )
+            self._stats["stored"] += 1
+        except Exception as e:
+            logger.warning(f"Answer cache write error: {e}")
+    
+    def record_saved(self, latency_saved_ms: float) -> None:
+        """Accumulate latency saved by a hit"""
+        self._stats["latency_saved_ms"] += max(latency_saved_ms, 0.0)
+    
+    def get_metadata(
+        self,
+        hit: bool,
+        similarity: Optional[float] = None,
+        latency_saved_ms: float = 0.0
+    ) -> Dict[str, Any]:
+        """Cache metadata attached to a chatbot response"""
+        return {
+            "hit": hit,
+            "similarity": round(similarity, 4) if similarity is not None else None,
+            "latency_saved_ms": round(max(latency_saved_ms, 0.0), 1),
+            "hit_rate": self.get_stats()["hit_rate"]
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and total latency saved"""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            **self._stats,
+            "latency_saved_ms": round(self._stats["latency_saved_ms"], 1),
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0
+        }
+
+
+# Singleton instance
+answer_cache_service = AnswerCacheService()
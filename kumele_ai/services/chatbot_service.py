@@ -1,24 +1,39 @@
 """
 Chatbot Service - Handles RAG-based chatbot interactions
+
+Retrieval is hybrid: dense (Qdrant) and lexical (BM25, see lexical_index)
+searches run concurrently, their rankings are merged with reciprocal rank
+fusion and the top candidates are optionally reranked by a cross-encoder.
+Each retrieval stage has a latency budget; a stage that overruns (or
+fails) is left out and reported in debug.degraded.
 """
+import asyncio
+import hashlib
 import logging
+import time
 import uuid
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.models import (
     VectorParams, Distance, PointStruct, 
-    Filter, FieldCondition, MatchValue
+    Filter, FieldCondition, MatchValue, MatchAny, HasIdCondition, FilterSelector
 )
 
 from kumele_ai.config import settings
+from kumele_ai.db.database import SessionLocal
 from kumele_ai.db.models import (
     KnowledgeDocument, KnowledgeEmbedding, ChatbotLog
 )
 from kumele_ai.services.embed_service import embed_service
 from kumele_ai.services.translate_service import translate_service
 from kumele_ai.services.llm_service import llm_service
+from kumele_ai.services.answer_cache_service import answer_cache_service
+from kumele_ai.services.text_chunker import text_chunker
+from kumele_ai.services.lexical_index import lexical_index
+from kumele_ai.services.reranker import reranker
+from kumele_ai.services.prompt_budgeter import prompt_budgeter
 
 logger = logging.getLogger(__name__)
 
@@ -27,24 +42,39 @@ class ChatbotService:
     """Service for RAG-based chatbot"""
     
     def __init__(self):
-        self.qdrant_client: Optional[QdrantClient] = None
+        self.async_qdrant_client: Optional[AsyncQdrantClient] = None
         self.collection_name = settings.QDRANT_COLLECTION
-        self.chunk_size = 500  # tokens approximately
+        self.upsert_batch_size = 256
+        self._collection_ready = False
+        
+        # Hybrid retrieval
+        self.hybrid_enabled = settings.CHATBOT_HYBRID_ENABLED
+        self.retrieval_candidates = settings.CHATBOT_RETRIEVAL_CANDIDATES
+        self.rrf_k = settings.CHATBOT_RRF_K
+        self.rerank_top_n = settings.CHATBOT_RERANK_TOP_N
+        self.dense_budget_ms = settings.CHATBOT_DENSE_BUDGET_MS
+        self.lexical_budget_ms = settings.CHATBOT_LEXICAL_BUDGET_MS
+        self.rerank_budget_ms = settings.CHATBOT_RERANK_BUDGET_MS
+        # Fire-and-forget tasks (log writes, answer cache writes) kept alive until done
+        self._background_tasks: Set[asyncio.Task] = set()
     
-    def _get_qdrant_client(self) -> QdrantClient:
-        """Get or create Qdrant client"""
-        if self.qdrant_client is None:
-            self.qdrant_client = QdrantClient(url=settings.QDRANT_URL)
-        return self.qdrant_client
+    def _get_async_qdrant_client(self) -> AsyncQdrantClient:
+        """Get or create async Qdrant client"""
+        if self.async_qdrant_client is None:
+            self.async_qdrant_client = AsyncQdrantClient(url=settings.QDRANT_URL)
+        return self.async_qdrant_client
     
     async def _ensure_collection(self):
         """Ensure Qdrant collection exists"""
-        client = self._get_qdrant_client()
-        collections = client.get_collections().collections
+        if self._collection_ready:
+            return
+        
+        client = self._get_async_qdrant_client()
+        collections = (await client.get_collections()).collections
         
         if not any(c.name == self.collection_name for c in collections):
             vector_size = embed_service.get_embedding_dimension()
-            client.create_collection(
+            await client.create_collection(
                 collection_name=self.collection_name,
                 vectors_config=VectorParams(
                     size=vector_size,
@@ -52,39 +82,158 @@ class ChatbotService:
                 )
             )
             logger.info(f"Created Qdrant collection: {self.collection_name}")
+        
+        self._collection_ready = True
     
-    def _chunk_text(self, text: str, chunk_size: int = 500) -> List[str]:
-        """Split text into chunks"""
-        words = text.split()
-        chunks = []
-        current_chunk = []
-        current_length = 0
-        
-        for word in words:
-            word_length = len(word.split())
-            if current_length + word_length > chunk_size:
-                if current_chunk:
-                    chunks.append(" ".join(current_chunk))
-                current_chunk = [word]
-                current_length = word_length
-            else:
-                current_chunk.append(word)
-                current_length += word_length
+    def _document_hash(self, doc: KnowledgeDocument) -> str:
+        """Hash of everything that affects a document's indexed chunks"""
+        h = hashlib.sha256()
+        for part in (
+            embed_service.model_key, text_chunker.get_config(), lexical_index.get_config(),
+            doc.title, doc.category, doc.language or "", doc.content
+        ):
+            h.update(part.encode())
+            h.update(b"\0")
+        return h.hexdigest()
+    
+    def _chunk_id(self, document_id: int, chunk: str) -> str:
+        """Deterministic Qdrant point id for a chunk (document id + chunk hash)"""
+        chunk_hash = hashlib.sha256(f"{embed_service.model_key}\0{chunk}".encode()).hexdigest()
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"kb:{document_id}:{chunk_hash}"))
+    
+    def _chunk_payload(self, doc: KnowledgeDocument, idx: int, chunk: str) -> Dict[str, Any]:
+        """Qdrant payload of a document chunk"""
+        return {
+            "document_id": doc.id,
+            "chunk_index": idx,
+            "category": doc.category,
+            "title": doc.title,
+            "language": doc.language,
+            "text": chunk
+        }
+    
+    async def _sync_document(
+        self,
+        db: Session,
+        client: AsyncQdrantClient,
+        doc: KnowledgeDocument
+    ) -> Dict[str, int]:
+        """
+        Re-index one document, embedding only chunks Qdrant does not have yet.
         
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
+        Points of the document that are no longer produced by its chunks
+        (edited text, or ids from the old random-UUID scheme) are deleted.
+        """
+        # Deterministic ids; identical chunks within a document share one point
+        chunk_ids: List[str] = []
+        chunks: List[str] = []
+        for chunk in text_chunker.iter_chunks(doc.content):
+            chunk_id = self._chunk_id(doc.id, chunk)
+            if chunk_id not in chunk_ids:
+                chunk_ids.append(chunk_id)
+                chunks.append(chunk)
         
-        return chunks
+        existing = {
+            record.vector_id: record
+            for record in db.query(KnowledgeEmbedding).filter(
+                KnowledgeEmbedding.document_id == doc.id
+            ).all()
+        }
+        
+        # Reuse vectors of unchanged chunks
+        vectors: Dict[str, List[float]] = {}
+        known_ids = [chunk_id for chunk_id in chunk_ids if chunk_id in existing]
+        if known_ids:
+            for point in await client.retrieve(
+                collection_name=self.collection_name,
+                ids=known_ids,
+                with_payload=False,
+                with_vectors=True
+            ):
+                vectors[str(point.id)] = point.vector
+        
+        # Embed new chunks in one batch
+        missing = [(chunk_id, chunk) for chunk_id, chunk in zip(chunk_ids, chunks) if chunk_id not in vectors]
+        if missing:
+            embeddings = await embed_service.embed_texts_async([chunk for _, chunk in missing])
+            for (chunk_id, _), embedding in zip(missing, embeddings):
+                vectors[chunk_id] = embedding
+        
+        points = [
+            PointStruct(
+                id=chunk_id,
+                vector=vectors[chunk_id],
+                payload=self._chunk_payload(doc, idx, chunk)
+            )
+            for idx, (chunk_id, chunk) in enumerate(zip(chunk_ids, chunks))
+        ]
+        for batch_start in range(0, len(points), self.upsert_batch_size):
+            await client.upsert(
+                collection_name=self.collection_name,
+                points=points[batch_start:batch_start + self.upsert_batch_size]
+            )
+        
+        # Delete stale points of this document
+        stale_filter = Filter(
+            must=[FieldCondition(key="document_id", match=MatchValue(value=doc.id))],
+            must_not=[HasIdCondition(has_id=chunk_ids)] if chunk_ids else None
+        )
+        deleted = (await client.count(
+            collection_name=self.collection_name,
+            count_filter=stale_filter,
+            exact=True
+        )).count
+        if deleted:
+            await client.delete(
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(filter=stale_filter)
+            )
+        
+        # Track in database, with the document's BM25 postings
+        term_counts = lexical_index.index_document(db, doc.id, zip(chunk_ids, chunks))
+        now = datetime.utcnow()
+        for vector_id, record in existing.items():
+            if vector_id not in vectors:
+                db.delete(record)
+        for idx, (chunk_id, chunk) in enumerate(zip(chunk_ids, chunks)):
+            record = existing.get(chunk_id)
+            if record is None:
+                db.add(KnowledgeEmbedding(
+                    document_id=doc.id,
+                    chunk_index=idx,
+                    chunk_text=chunk,
+                    embedding_model=embed_service.model_key,
+                    vector_id=chunk_id,
+                    term_count=term_counts[chunk_id],
+                    last_indexed=now
+                ))
+            else:
+                record.chunk_index = idx
+                record.term_count = term_counts[chunk_id]
+                record.last_indexed = now
+        
+        return {"chunks": len(chunks), "embedded": len(missing), "deleted": deleted}
     
     async def sync_documents(
         self,
         db: Session,
-        document_ids: Optional[List[int]] = None
+        document_ids: Optional[List[int]] = None,
+        force: bool = False
     ) -> Dict[str, Any]:
-        """Sync knowledge documents to Qdrant"""
+        """
+        Incrementally sync knowledge documents to Qdrant.
+        
+        Documents whose content hash matches the last indexed version are
+        skipped; changed documents only embed chunks Qdrant does not have.
+        A full sync (no document_ids) also removes points of documents that
+        no longer exist.
+        
+        Args:
+            force: Re-index selected documents even if their hash is unchanged
+        """
         try:
             await self._ensure_collection()
-            client = self._get_qdrant_client()
+            client = self._get_async_qdrant_client()
             
             # Get documents to sync
             query = db.query(KnowledgeDocument)
@@ -94,64 +243,54 @@ class ChatbotService:
             documents = query.all()
             
             synced_count = 0
+            skipped_count = 0
             total_chunks = 0
+            embedded_chunks = 0
+            deleted_chunks = 0
             
             for doc in documents:
-                # Delete existing embeddings for this document
-                db.query(KnowledgeEmbedding).filter(
-                    KnowledgeEmbedding.document_id == doc.id
-                ).delete()
+                doc_hash = self._document_hash(doc)
+                if not force and doc.content_hash == doc_hash:
+                    skipped_count += 1
+                    continue
                 
-                # Chunk the document
-                chunks = self._chunk_text(doc.content, self.chunk_size)
+                result = await self._sync_document(db, client, doc)
+                doc.content_hash = doc_hash
+                db.commit()
                 
-                # Generate embeddings and store in Qdrant
-                points = []
-                for idx, chunk in enumerate(chunks):
-                    embedding = embed_service.embed_text(chunk)
-                    vector_id = str(uuid.uuid4())
-                    
-                    point = PointStruct(
-                        id=vector_id,
-                        vector=embedding,
-                        payload={
-                            "document_id": doc.id,
-                            "chunk_index": idx,
-                            "category": doc.category,
-                            "title": doc.title,
-                            "language": doc.language,
-                            "text": chunk
-                        }
-                    )
-                    points.append(point)
-                    
-                    # Track in database
-                    embedding_record = KnowledgeEmbedding(
-                        document_id=doc.id,
-                        chunk_index=idx,
-                        chunk_text=chunk,
-                        embedding_model=settings.EMBEDDING_MODEL,
-                        vector_id=vector_id,
-                        last_indexed=datetime.utcnow()
-                    )
-                    db.add(embedding_record)
-                
-                # Batch upsert to Qdrant
-                if points:
-                    client.upsert(
+                synced_count += 1
+                total_chunks += result["chunks"]
+                embedded_chunks += result["embedded"]
+                deleted_chunks += result["deleted"]
+            
+            if not document_ids:
+                # Drop points of deleted documents
+                orphan_filter = Filter(must_not=[
+                    FieldCondition(key="document_id", match=MatchAny(any=[doc.id for doc in documents]))
+                ]) if documents else Filter()
+                orphaned = (await client.count(
+                    collection_name=self.collection_name,
+                    count_filter=orphan_filter,
+                    exact=True
+                )).count
+                if orphaned:
+                    await client.delete(
                         collection_name=self.collection_name,
-                        points=points
+                        points_selector=FilterSelector(filter=orphan_filter)
                     )
-                
-                synced_count += 1
-                total_chunks += len(chunks)
+                    deleted_chunks += orphaned
             
-            db.commit()
+            # Cached answers may cite re-indexed documents
+            if synced_count or deleted_chunks:
+                await answer_cache_service.invalidate()
             
             return {
                 "success": True,
                 "documents_synced": synced_count,
+                "documents_skipped": skipped_count,
                 "total_chunks": total_chunks,
+                "chunks_embedded": embedded_chunks,
+                "chunks_deleted": deleted_chunks,
                 "collection": self.collection_name
             }
             
@@ -163,91 +302,466 @@ class ChatbotService:
                 "error": str(e)
             }
     
-    async def ask(
+    async def delete_document_vectors(self, document_id: int) -> None:
+        """Remove a document's points from Qdrant"""
+        await self._ensure_collection()
+        await self._get_async_qdrant_client().delete(
+            collection_name=self.collection_name,
+            points_selector=FilterSelector(filter=Filter(must=[
+                FieldCondition(key="document_id", match=MatchValue(value=document_id))
+            ]))
+        )
+    
+    async def _timed(self, timings: Dict[str, float], stage: str, awaitable):
+        """Await a pipeline stage and record its wall time in ms"""
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            timings[stage] = round((time.perf_counter() - start) * 1000, 1)
+    
+    def _spawn(self, coro) -> asyncio.Task:
+        """Run a coroutine in the background, off the request path"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+    
+    async def _budgeted(
+        self,
+        timings: Dict[str, float],
+        degraded: List[str],
+        stage: str,
+        awaitable,
+        budget_ms: Optional[float]
+    ):
+        """
+        Await a retrieval stage within its latency budget (None: unbounded).
+        
+        Returns None (and records the stage in degraded) if it overruns or fails.
+        """
+        timeout = budget_ms / 1000 if budget_ms is not None else None
+        try:
+            return await asyncio.wait_for(self._timed(timings, stage, awaitable), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Retrieval stage {stage} exceeded its {budget_ms:.0f} ms budget")
+        except Exception as e:
+            logger.error(f"Retrieval stage {stage} error: {e}")
+        degraded.append(stage)
+        return None
+    
+    async def _search(self, query_embedding: List[float], top_k: int) -> List[Dict[str, Any]]:
+        """Dense search of the knowledge collection, as retrieval candidates"""
+        await self._ensure_collection()
+        results = await self._get_async_qdrant_client().search(
+            collection_name=self.collection_name,
+            query_vector=query_embedding,
+            limit=top_k
+        )
+        return [
+            {
+                "vector_id": str(result.id),
+                "document_id": result.payload.get("document_id"),
+                "title": result.payload.get("title"),
+                "category": result.payload.get("category"),
+                "text": result.payload.get("text", ""),
+                "dense_score": result.score
+            }
+            for result in results
+        ]
+    
+    def _lexical_search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """BM25 search on a dedicated session (runs in a worker thread)"""
+        db = SessionLocal()
+        try:
+            return lexical_index.search(db, query, limit)
+        finally:
+            db.close()
+    
+    def _fuse(self, *rankings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge candidate rankings with reciprocal rank fusion (best first)"""
+        fused: Dict[str, Dict[str, Any]] = {}
+        for ranking in rankings:
+            for rank, candidate in enumerate(ranking, start=1):
+                entry = fused.setdefault(candidate["vector_id"], {"rrf_score": 0.0})
+                entry.update(candidate)
+                entry["rrf_score"] += 1.0 / (self.rrf_k + rank)
+        return sorted(fused.values(), key=lambda c: c["rrf_score"], reverse=True)
+    
+    async def search_knowledge(
         self,
-        db: Session,
         query: str,
-        user_id: Optional[int] = None,
-        top_k: int = 5
+        query_embedding: List[float],
+        top_k: int,
+        timings: Dict[str, float],
+        degraded: List[str],
+        stage_prefix: str = "",
+        dense: bool = True,
+        lexical: Optional[bool] = None,
+        rerank: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Top knowledge chunks for a query.
+        
+        Dense and BM25 candidates (CHATBOT_RETRIEVAL_CANDIDATES each) are
+        fetched concurrently and fused with RRF; the top
+        CHATBOT_RERANK_TOP_N are then reordered by the cross-encoder.
+        lexical/rerank default to the CHATBOT_HYBRID_ENABLED and
+        CHATBOT_RERANK_ENABLED settings.
+        """
+        lexical = self.hybrid_enabled if lexical is None else lexical
+        rerank = reranker.enabled if rerank is None else rerank
+        limit = max(self.retrieval_candidates, top_k)
+        
+        stages = []
+        if dense:
+            stages.append(self._budgeted(
+                timings, degraded, f"{stage_prefix}dense_search",
+                self._search(query_embedding, limit), self.dense_budget_ms
+            ))
+        if lexical:
+            stages.append(self._budgeted(
+                timings, degraded, f"{stage_prefix}lexical_search",
+                asyncio.to_thread(self._lexical_search, query, limit), self.lexical_budget_ms
+            ))
+        rankings = await asyncio.gather(*stages)
+        candidates = self._fuse(*(ranking or [] for ranking in rankings))
+        
+        if rerank and len(candidates) > 1:
+            head = candidates[:self.rerank_top_n]
+            scores = await self._budgeted(
+                timings, degraded, f"{stage_prefix}rerank",
+                reranker.score_async(query, [c["text"] for c in head]), self.rerank_budget_ms
+            )
+            if scores is not None:
+                for candidate, score in zip(head, scores):
+                    candidate["rerank_score"] = score
+                head.sort(key=lambda c: c["rerank_score"], reverse=True)
+                candidates = head + candidates[len(head):]
+        
+        return candidates[:top_k]
+    
+    async def _retrieve(
+        self,
+        query: str,
+        query_embedding: List[float],
+        top_k: int,
+        timings: Dict[str, float],
+        detect_task: "asyncio.Task[Dict[str, Any]]"
     ) -> Dict[str, Any]:
-        """Process a chatbot query"""
+        """
+        Translate to English if needed and retrieve context chunks.
+        
+        The raw query is searched speculatively while language detection
+        (detect_task, shared with the answer cache lookup) runs; for English
+        queries (the common case) that search is used as-is, otherwise it is
+        discarded and the translated query is searched.
+        """
+        degraded: List[str] = []
+        speculative_task = asyncio.create_task(self._timed(
+            timings, "speculative_search",
+            self.search_knowledge(query, query_embedding, top_k, timings, degraded, "speculative_")
+        ))
+        
         try:
-            # Detect language
-            lang_result = await translate_service.detect_language(query)
+            lang_result = await asyncio.shield(detect_task)
             detected_language = lang_result.get("language", "en")
             
             # Translate to English if needed
             english_query = query
             if detected_language != "en":
-                translation = await translate_service.translate_to_english(query, detected_language)
+                translation = await self._timed(
+                    timings, "translate_query",
+                    translate_service.translate_to_english(query, detected_language)
+                )
                 if translation.get("success"):
                     english_query = translation.get("translated_text", query)
             
-            # Generate query embedding
-            query_embedding = embed_service.embed_text(english_query)
-            
-            # Search Qdrant for relevant chunks
-            await self._ensure_collection()
-            client = self._get_qdrant_client()
+            if english_query == query:
+                search_results = await speculative_task
+            else:
+                speculative_task.cancel()
+                english_embedding = await self._timed(
+                    timings, "embed_english", embed_service.embed_text_async(english_query)
+                )
+                search_results = await self._timed(
+                    timings, "search",
+                    self.search_knowledge(english_query, english_embedding, top_k, timings, degraded)
+                )
+        finally:
+            if not speculative_task.done():
+                speculative_task.cancel()
+        
+        # Extract context from results
+        context_chunks = []
+        source_docs = []
+        
+        for candidate in search_results:
+            context_chunks.append(candidate["text"])
+            source_docs.append({
+                "document_id": candidate["document_id"],
+                "title": candidate["title"],
+                "category": candidate["category"],
+                # Dense similarity; None for chunks only matched by BM25
+                "score": candidate.get("dense_score"),
+                "retrieval": {
+                    name: round(candidate[key], 4)
+                    for name, key in (("rrf", "rrf_score"), ("bm25", "bm25_score"), ("rerank", "rerank_score"))
+                    if key in candidate
+                }
+            })
+        
+        return {
+            "language": detected_language,
+            "english_query": english_query,
+            "context_chunks": context_chunks,
+            "source_docs": source_docs,
+            # Best dense similarity among the retrieved chunks
+            "confidence": max(
+                (c["dense_score"] for c in search_results if "dense_score" in c), default=0.0
+            ),
+            "degraded": degraded
+        }
+    
+    async def _prepare(
+        self,
+        query: str,
+        top_k: int,
+        timings: Dict[str, float]
+    ) -> Tuple[List[float], Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Detect the query language while embedding the raw query, then run
+        the semantic answer cache lookup (restricted to the detected
+        language) and retrieval concurrently.
+        
+        Returns (query_embedding, cached_answer, retrieval); retrieval is
+        None (and cancelled) on a cache hit.
+        """
+        detect_task = asyncio.create_task(
+            self._timed(timings, "detect_language", translate_service.detect_language(query))
+        )
+        retrieval_task = None
+        try:
+            query_embedding = await self._timed(
+                timings, "embed_query", embed_service.embed_text_async(query)
+            )
             
-            search_results = client.search(
-                collection_name=self.collection_name,
-                query_vector=query_embedding,
-                limit=top_k
+            retrieval_task = asyncio.create_task(
+                self._retrieve(query, query_embedding, top_k, timings, detect_task)
+            )
+            language = (await asyncio.shield(detect_task)).get("language", "en")
+            cached = await self._timed(
+                timings, "answer_cache", answer_cache_service.lookup(query_embedding, language)
             )
+            if cached:
+                retrieval_task.cancel()
+                return query_embedding, cached, None
+            return query_embedding, None, await retrieval_task
+        finally:
+            for task in (detect_task, retrieval_task):
+                if task is not None and not task.done():
+                    task.cancel()
+    
+    async def _translate_response(self, response_text: str, language: str) -> str:
+        """Translate an English response back to the user's language"""
+        if language == "en":
+            return response_text
+        
+        back_translation = await translate_service.translate_from_english(
+            response_text, language
+        )
+        if back_translation.get("success"):
+            return back_translation.get("translated_text", response_text)
+        return response_text
+    
+    def _log_interaction(
+        self,
+        db: Session,
+        user_id: Optional[int],
+        query: str,
+        response: str,
+        retrieval: Dict[str, Any]
+    ) -> ChatbotLog:
+        """Write the ChatbotLog row for a completed answer"""
+        log_entry = ChatbotLog(
+            user_id=user_id,
+            query=query,
+            response=response,
+            language=retrieval["language"],
+            confidence=retrieval["confidence"],
+            source_docs=retrieval["source_docs"],
+            prompt_tokens=retrieval.get("prompt_tokens"),
+            generation_ms=retrieval.get("generation_ms")
+        )
+        db.add(log_entry)
+        db.commit()
+        return log_entry
+    
+    def _write_log(
+        self,
+        user_id: Optional[int],
+        query: str,
+        response: str,
+        retrieval: Dict[str, Any]
+    ) -> Optional[int]:
+        """
+        Write the ChatbotLog row on a dedicated session (runs in a worker thread).
+        
+        Returns the log id, or None if the write failed.
+        """
+        db = SessionLocal()
+        try:
+            return self._log_interaction(db, user_id, query, response, retrieval).id
+        except Exception as e:
+            logger.error(f"Chatbot log write error: {e}")
+            db.rollback()
+            return None
+        finally:
+            db.close()
+    
+    def _log_in_background(
+        self,
+        user_id: Optional[int],
+        query: str,
+        response: str,
+        retrieval: Dict[str, Any]
+    ) -> None:
+        """Queue the ChatbotLog insert off the request path"""
+        self._spawn(asyncio.to_thread(self._write_log, user_id, query, response, retrieval))
+    
+    async def _assemble_prompt(
+        self,
+        retrieval: Dict[str, Any],
+        timings: Dict[str, float]
+    ) -> Dict[str, Any]:
+        """
+        Fit the retrieved chunks into the prompt token budget.
+        
+        Records prompt_tokens on the retrieval for the ChatbotLog row.
+        """
+        prompt = await self._timed(timings, "assemble_prompt", asyncio.to_thread(
+            prompt_budgeter.assemble, retrieval["english_query"], retrieval["context_chunks"]
+        ))
+        retrieval["prompt_tokens"] = prompt["prompt_tokens"]
+        return prompt
+    
+    def _prompt_debug(self, prompt: Dict[str, Any]) -> Dict[str, Any]:
+        """Prompt budgeting summary for debug output"""
+        return {key: value for key, value in prompt.items() if key != "context"}
+    
+    def _cached_retrieval(self, cached: Dict[str, Any]) -> Dict[str, Any]:
+        """Retrieval-shaped view of a cached answer, for logging"""
+        return {
+            "language": cached["language"],
+            "confidence": cached["confidence"],
+            "source_docs": cached["sources"]
+        }
+    
+    def _store_answer(
+        self,
+        query: str,
+        query_embedding: List[float],
+        response: str,
+        retrieval: Dict[str, Any],
+        start: float
+    ) -> None:
+        """Cache a freshly generated answer with the latency it took (in the background)"""
+        self._spawn(answer_cache_service.store(
+            query,
+            query_embedding,
+            {
+                "response": response,
+                "language": retrieval["language"],
+                "confidence": retrieval["confidence"],
+                "sources": retrieval["source_docs"]
+            },
+            (time.perf_counter() - start) * 1000
+        ))
+    
+    async def ask(
+        self,
+        db: Session,
+        query: str,
+        user_id: Optional[int] = None,
+        top_k: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Process a chatbot query.
+        
+        Language detection runs alongside query embedding; the answer cache
+        lookup (in the detected language) and a speculative retrieval on the
+        raw query then run concurrently. The ChatbotLog insert
+        and the answer cache write happen in the background after the
+        response is returned (on their own session, so `db` is not used
+        for them). `debug.timings_ms` holds per-stage wall times and
+        `debug.degraded` the retrieval stages dropped for exceeding their
+        latency budget. Retrieved chunks are fitted to the prompt token
+        budget before generation; `debug.prompt` reports prompt tokens,
+        max_new_tokens and dropped/truncated chunks.
+        """
+        timings: Dict[str, float] = {}
+        try:
+            start = time.perf_counter()
+            
+            query_embedding, cached, retrieval = await self._prepare(query, top_k, timings)
             
-            # Extract context from results
-            context_chunks = []
-            source_docs = []
+            # Semantic answer cache hit: translation, retrieval and generation skipped
+            if cached:
+                latency_saved_ms = cached["latency_ms"] - (time.perf_counter() - start) * 1000
+                answer_cache_service.record_saved(latency_saved_ms)
+                self._log_in_background(user_id, query, cached["response"], self._cached_retrieval(cached))
+                timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+                return {
+                    "success": True,
+                    "response": cached["response"],
+                    "language": cached["language"],
+                    "confidence": round(cached["confidence"], 4),
+                    "sources": cached["sources"][:3],  # Top 3 sources
+                    "cache": answer_cache_service.get_metadata(
+                        hit=True,
+                        similarity=cached["similarity"],
+                        latency_saved_ms=latency_saved_ms
+                    ),
+                    "debug": {"timings_ms": timings}
+                }
             
-            for result in search_results:
-                payload = result.payload
-                context_chunks.append(payload.get("text", ""))
-                source_docs.append({
-                    "document_id": payload.get("document_id"),
-                    "title": payload.get("title"),
-                    "category": payload.get("category"),
-                    "score": result.score
-                })
+            prompt = await self._assemble_prompt(retrieval, timings)
             
             # Generate response using LLM
-            llm_response = await llm_service.generate_chat_response(
-                query=english_query,
-                context=context_chunks,
-                language="en"
-            )
+            llm_response = await self._timed(timings, "generate", llm_service.generate_chat_response(
+                query=retrieval["english_query"],
+                context=prompt["context"],
+                language="en",
+                max_new_tokens=prompt["max_new_tokens"]
+            ))
+            retrieval["generation_ms"] = timings["generate"]
             
             response_text = llm_response.get("generated_text", "I'm sorry, I couldn't generate a response.")
-            confidence = search_results[0].score if search_results else 0.0
             
             # Translate response back if needed
-            final_response = response_text
-            if detected_language != "en":
-                back_translation = await translate_service.translate_from_english(
-                    response_text, detected_language
-                )
-                if back_translation.get("success"):
-                    final_response = back_translation.get("translated_text", response_text)
-            
-            # Log the interaction
-            log_entry = ChatbotLog(
-                user_id=user_id,
-                query=query,
-                response=final_response,
-                language=detected_language,
-                confidence=confidence,
-                source_docs=source_docs
+            final_response = await self._timed(
+                timings, "translate_response",
+                self._translate_response(response_text, retrieval["language"])
             )
-            db.add(log_entry)
-            db.commit()
             
+            # Log the interaction and cache the answer off the request path
+            self._log_in_background(user_id, query, final_response, retrieval)
+            if llm_response.get("success"):
+                self._store_answer(query, query_embedding, final_response, retrieval, start)
+            
+            timings["total"] = round((time.perf_counter() - start) * 1000, 1)
             return {
                 "success": True,
                 "response": final_response,
-                "language": detected_language,
-                "confidence": round(confidence, 4),
-                "sources": source_docs[:3],  # Top 3 sources
-                "log_id": log_entry.id
+                "language": retrieval["language"],
+                "confidence": round(retrieval["confidence"], 4),
+                "sources": retrieval["source_docs"][:3],  # Top 3 sources
+                "cache": answer_cache_service.get_metadata(hit=False),
+                "debug": {
+                    "timings_ms": timings,
+                    "degraded": retrieval["degraded"],
+                    "prompt": self._prompt_debug(prompt)
+                }
             }
             
         except Exception as e:
@@ -255,6 +769,120 @@ class ChatbotService:
             return {
                 "success": False,
                 "response": "I'm sorry, I encountered an error processing your request.",
+                "error": str(e),
+                "debug": {"timings_ms": timings}
+            }
+    
+    async def ask_stream(
+        self,
+        query: str,
+        user_id: Optional[int] = None,
+        top_k: int = 5
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a chatbot query, streaming the answer as it is generated.
+        
+        Yields events:
+        - {"event": "meta", ...}: language, confidence and top sources, before generation
+        - {"event": "token", "text": ...}: answer text as it arrives
+        - {"event": "done", "log_id": ..., "debug": ...}: after the ChatbotLog row is written
+        - {"event": "error", "error": ...}: on failure
+        
+        English answers are forwarded token by token. Answers in other
+        languages are translated once generation completes and sent as a
+        single token event. Semantic cache hits are sent as a single token
+        event as well.
+        
+        The ChatbotLog row is written on its own session in a worker thread
+        (a streamed response outlives the request's session).
+        """
+        timings: Dict[str, float] = {}
+        try:
+            start = time.perf_counter()
+            
+            query_embedding, cached, retrieval = await self._prepare(query, top_k, timings)
+            if cached:
+                latency_saved_ms = cached["latency_ms"] - (time.perf_counter() - start) * 1000
+                answer_cache_service.record_saved(latency_saved_ms)
+                yield {
+                    "event": "meta",
+                    "language": cached["language"],
+                    "confidence": round(cached["confidence"], 4),
+                    "sources": cached["sources"][:3],
+                    "cache": answer_cache_service.get_metadata(
+                        hit=True,
+                        similarity=cached["similarity"],
+                        latency_saved_ms=latency_saved_ms
+                    )
+                }
+                yield {"event": "token", "text": cached["response"]}
+                log_id = await asyncio.to_thread(
+                    self._write_log, user_id, query, cached["response"], self._cached_retrieval(cached)
+                )
+                timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+                yield {"event": "done", "log_id": log_id, "debug": {"timings_ms": timings}}
+                return
+            
+            yield {
+                "event": "meta",
+                "language": retrieval["language"],
+                "confidence": round(retrieval["confidence"], 4),
+                "sources": retrieval["source_docs"][:3],  # Top 3 sources
+                "cache": answer_cache_service.get_metadata(hit=False)
+            }
+            
+            prompt = await self._assemble_prompt(retrieval, timings)
+            
+            stream_tokens = retrieval["language"] == "en"
+            parts = []
+            generate_start = time.perf_counter()
+            
+            async for chunk in llm_service.generate_chat_response_stream(
+                query=retrieval["english_query"],
+                context=prompt["context"],
+                language="en",
+                max_new_tokens=prompt["max_new_tokens"]
+            ):
+                if not parts:
+                    timings["first_token"] = round((time.perf_counter() - generate_start) * 1000, 1)
+                parts.append(chunk["text"])
+                if stream_tokens:
+                    yield {"event": "token", "text": chunk["text"]}
+            timings["generate"] = round((time.perf_counter() - generate_start) * 1000, 1)
+            retrieval["generation_ms"] = timings["generate"]
+            
+            response_text = "".join(parts) or "I'm sorry, I couldn't generate a response."
+            final_response = await self._timed(
+                timings, "translate_response",
+                self._translate_response(response_text, retrieval["language"])
+            )
+            
+            if not stream_tokens or not parts:
+                yield {"event": "token", "text": final_response}
+            
+            # Log the interaction once the stream completes
+            log_id = await asyncio.to_thread(
+                self._write_log, user_id, query, final_response, retrieval
+            )
+            
+            if parts:
+                self._store_answer(query, query_embedding, final_response, retrieval, start)
+            
+            timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+            yield {
+                "event": "done",
+                "log_id": log_id,
+                "debug": {
+                    "timings_ms": timings,
+                    "degraded": retrieval["degraded"],
+                    "prompt": self._prompt_debug(prompt)
+                }
+            }
+        
+        except Exception as e:
+            logger.error(f"Chatbot stream error: {e}")
+            yield {
+                "event": "error",
                 "error": str(e)
             }
     
@@ -292,8 +920,7 @@ class ChatbotService:
     async def health_check(self) -> bool:
         """Check if Qdrant is healthy"""
         try:
-            client = self._get_qdrant_client()
-            client.get_collections()
+            await self._get_async_qdrant_client().get_collections()
             return True
         except Exception as e:
             logger.error(f"Qdrant health check failed: {e}")
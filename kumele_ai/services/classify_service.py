@@ -3,11 +3,12 @@ Classification Service - Handles text classification using Hugging Face models
 """
 import logging
 import hashlib
-from typing import Dict, Any, List, Optional
-from transformers import pipeline
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from kumele_ai.config import settings
 from kumele_ai.db.models import NLPSentiment, AIActionLog
+from kumele_ai.services.inference_backend import inference_backend
+from kumele_ai.services.result_cache import ResultCache
 
 logger = logging.getLogger(__name__)
 
@@ -16,18 +17,28 @@ class ClassifyService:
     """Service for text classification tasks"""
     
     def __init__(self):
+        self.sentiment_model = "distilbert-base-uncased-finetuned-sst-2-english"
+        self.toxicity_model = "unitary/toxic-bert"
         self._sentiment_pipeline = None
         self._toxicity_pipeline = None
         self._spam_pipeline = None
+        
+        # Raw pipeline results keyed by (model key, sha256(text)), shared by all callers
+        self._result_cache = ResultCache(
+            "classify",
+            lru_size=settings.CLASSIFY_CACHE_LRU_SIZE,
+            ttl_sec=settings.CLASSIFY_CACHE_TTL_SEC,
+            enabled=settings.CLASSIFY_CACHE_ENABLED
+        )
     
     @property
     def sentiment_pipeline(self):
         """Lazy load sentiment analysis pipeline"""
         if self._sentiment_pipeline is None:
             logger.info("Loading sentiment analysis model...")
-            self._sentiment_pipeline = pipeline(
+            self._sentiment_pipeline = inference_backend.load_text_classifier(
                 "sentiment-analysis",
-                model="distilbert-base-uncased-finetuned-sst-2-english"
+                self.sentiment_model
             )
             logger.info("Sentiment model loaded")
         return self._sentiment_pipeline
@@ -37,13 +48,74 @@ class ClassifyService:
         """Lazy load toxicity detection pipeline"""
         if self._toxicity_pipeline is None:
             logger.info("Loading toxicity detection model...")
-            self._toxicity_pipeline = pipeline(
+            self._toxicity_pipeline = inference_backend.load_text_classifier(
                 "text-classification",
-                model="unitary/toxic-bert"
+                self.toxicity_model
             )
             logger.info("Toxicity model loaded")
         return self._toxicity_pipeline
     
+    def _pipeline_kwargs(self, batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """Token-level truncation and batching options for HF pipelines"""
+        return {
+            "batch_size": batch_size or settings.CLASSIFY_BATCH_SIZE,
+            "truncation": True,
+            "max_length": 512
+        }
+    
+    def _classify_cached(
+        self,
+        model: str,
+        get_pipeline: Callable[[], Any],
+        texts: List[str],
+        batch_size: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], List[bool]]:
+        """
+        Raw {label, score} results for texts, running the pipeline only on cache misses.
+        
+        Results are keyed by the model and the backend it was loaded on
+        (torch and ONNX int8 scores differ), so the pipeline is loaded first.
+        
+        Returns:
+            (results, cached) with one entry per input text
+        """
+        pipe = get_pipeline()
+        model_key = inference_backend.model_key(model)
+        results = self._result_cache.get_many(model_key, texts)
+        cached = [r is not None for r in results]
+        
+        missing = list(dict.fromkeys(t for t, r in zip(texts, results) if r is None))
+        if missing:
+            outputs = pipe(missing, **self._pipeline_kwargs(batch_size))
+            computed = {
+                text: {"label": output["label"], "score": float(output["score"])}
+                for text, output in zip(missing, outputs)
+            }
+            self._result_cache.set_many(model_key, missing, [computed[t] for t in missing])
+            results = [r if r is not None else computed[t] for t, r in zip(texts, results)]
+        
+        return results, cached
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Per-model inference cache hit rates"""
+        return self._result_cache.get_stats()
+    
+    def _map_sentiment(self, result: Dict[str, Any]) -> str:
+        """Map a pipeline result to positive / neutral / negative"""
+        sentiment = "positive" if result["label"] == "POSITIVE" else "negative"
+        if result["score"] < 0.6:
+            sentiment = "neutral"
+        return sentiment
+    
+    def _map_toxicity(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a pipeline result to the toxicity response"""
+        is_toxic = result["label"] == "toxic" and result["score"] > settings.MODERATION_TEXT_TOXICITY_THRESHOLD
+        return {
+            "is_toxic": is_toxic,
+            "toxicity_score": result["score"] if result["label"] == "toxic" else 1 - result["score"],
+            "label": result["label"]
+        }
+    
     def analyze_sentiment(
         self,
         text: str,
@@ -67,17 +139,18 @@ class ClassifyService:
                     }
             
             # Run sentiment analysis
-            result = self.sentiment_pipeline(text[:512])[0]
+            results, cached = self._classify_cached(
+                self.sentiment_model, lambda: self.sentiment_pipeline, [text]
+            )
+            result = results[0]
             
             # Map to our schema
-            sentiment = "positive" if result["label"] == "POSITIVE" else "negative"
-            if result["score"] < 0.6:
-                sentiment = "neutral"
+            sentiment = self._map_sentiment(result)
             
             output = {
                 "sentiment": sentiment,
                 "confidence": result["score"],
-                "cached": False
+                "cached": cached[0]
             }
             
             # Store result
@@ -103,18 +176,94 @@ class ClassifyService:
                 "error": str(e)
             }
     
-    def detect_toxicity(self, text: str) -> Dict[str, Any]:
-        """Detect toxicity in text"""
+    def analyze_sentiment_batch(
+        self,
+        texts: List[str],
+        content_ids: Optional[List[Optional[str]]] = None,
+        db: Optional[Session] = None,
+        batch_size: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze sentiment of many texts in one batched pipeline run.
+        
+        With db and content_ids, cached results are loaded in one query and
+        new results are stored, as in analyze_sentiment.
+        
+        Returns:
+            One result dict per input text, in order
+        """
+        if not texts:
+            return []
+        
         try:
-            result = self.toxicity_pipeline(text[:512])[0]
+            results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+            store = db is not None and content_ids is not None
+            hashes = [hashlib.sha256(t.encode()).hexdigest() for t in texts] if store else []
             
-            is_toxic = result["label"] == "toxic" and result["score"] > settings.MODERATION_TEXT_TOXICITY_THRESHOLD
+            # Cached results, one query
+            if store:
+                lookup_hashes = [h for h, cid in zip(hashes, content_ids) if cid]
+                cached = {}
+                if lookup_hashes:
+                    for row in db.query(NLPSentiment).filter(
+                        NLPSentiment.content_hash.in_(lookup_hashes)
+                    ).all():
+                        cached.setdefault(row.content_hash, row)
+                
+                for i, (content_hash, content_id) in enumerate(zip(hashes, content_ids)):
+                    row = cached.get(content_hash) if content_id else None
+                    if row:
+                        results[i] = {
+                            "sentiment": row.sentiment,
+                            "confidence": row.confidence,
+                            "cached": True
+                        }
             
-            return {
-                "is_toxic": is_toxic,
-                "toxicity_score": result["score"] if result["label"] == "toxic" else 1 - result["score"],
-                "label": result["label"]
-            }
+            pending = [i for i, r in enumerate(results) if r is None]
+            if pending:
+                outputs, cached = self._classify_cached(
+                    self.sentiment_model,
+                    lambda: self.sentiment_pipeline,
+                    [texts[i] for i in pending],
+                    batch_size
+                )
+                
+                for i, result, was_cached in zip(pending, outputs, cached):
+                    sentiment = self._map_sentiment(result)
+                    results[i] = {
+                        "sentiment": sentiment,
+                        "confidence": result["score"],
+                        "cached": was_cached
+                    }
+                    
+                    if store and content_ids[i]:
+                        db.add(NLPSentiment(
+                            content_id=content_ids[i],
+                            content_hash=hashes[i],
+                            text=texts[i][:1000],
+                            sentiment=sentiment,
+                            confidence=result["score"]
+                        ))
+                
+                if store:
+                    db.commit()
+            
+            return results
+        
+        except Exception as e:
+            logger.error(f"Batch sentiment analysis error: {e}")
+            return [
+                {"sentiment": "neutral", "confidence": 0.0, "error": str(e)}
+                for _ in texts
+            ]
+    
+    def detect_toxicity(self, text: str) -> Dict[str, Any]:
+        """Detect toxicity in text"""
+        try:
+            results, _ = self._classify_cached(
+                self.toxicity_model, lambda: self.toxicity_pipeline, [text]
+            )
+            return self._map_toxicity(results[0])
         except Exception as e:
             logger.error(f"Toxicity detection error: {e}")
             return {
@@ -123,6 +272,27 @@ class ClassifyService:
                 "error": str(e)
             }
     
+    def detect_toxicity_batch(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Detect toxicity in many texts in one batched pipeline run"""
+        if not texts:
+            return []
+        
+        try:
+            outputs, _ = self._classify_cached(
+                self.toxicity_model, lambda: self.toxicity_pipeline, texts, batch_size
+            )
+            return [self._map_toxicity(result) for result in outputs]
+        except Exception as e:
+            logger.error(f"Batch toxicity detection error: {e}")
+            return [
+                {"is_toxic": False, "toxicity_score": 0.0, "error": str(e)}
+                for _ in texts
+            ]
+    
     def detect_spam(self, text: str) -> Dict[str, Any]:
         """Detect spam in text using heuristics and patterns"""
         try:
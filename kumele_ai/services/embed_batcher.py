@@ -0,0 +1,129 @@
+"""
+Embed Batcher - Micro-batching front-end for the embedding model
+
+Concurrent callers (FastAPI handlers, threadpool workers) used to run
+model.encode one string at a time. The batcher queues their texts and a
+dedicated worker thread flushes them as a single encode call when either
+EMBEDDING_BATCH_MAX_SIZE texts are queued or EMBEDDING_BATCH_MAX_WAIT_MS
+has passed since the first queued request. Each caller gets back only
+its own rows.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbedBatcher:
+    """Queue texts from concurrent callers and encode them in shared batches"""
+    
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5
+    ):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_sec = max_wait_ms / 1000
+        
+        self._queue: "queue.Queue[Optional[Tuple[List[str], Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0, "texts": 0}
+    
+    def _ensure_started(self) -> None:
+        """Start the worker thread on first use"""
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run,
+                        name="embed-batcher",
+                        daemon=True
+                    )
+                    self._thread.start()
+    
+    def submit(self, texts: List[str]) -> "Future[np.ndarray]":
+        """Queue texts for encoding; the future resolves to a (len(texts) x dim) array"""
+        future: "Future[np.ndarray]" = Future()
+        if not texts:
+            future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return future
+        
+        self._ensure_started()
+        self._queue.put((texts, future))
+        return future
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Blocking helper: submit and wait for the result"""
+        return self.submit(texts).result()
+    
+    def _collect(self, first: Tuple[List[str], Future]) -> List[Tuple[List[str], Future]]:
+        """Gather requests until the size limit or deadline is reached"""
+        pending = [first]
+        total = len(first[0])
+        deadline = time.monotonic() + self.max_wait_sec
+        
+        while total < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Stop requested: flush what we have, then exit
+                self._queue.put(None)
+                break
+            pending.append(item)
+            total += len(item[0])
+        
+        return pending
+    
+    def _run(self) -> None:
+        """Worker loop"""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            
+            pending = self._collect(first)
+            texts = [text for batch_texts, _ in pending for text in batch_texts]
+            
+            try:
+                embeddings = np.asarray(self.encode_fn(texts), dtype=np.float32)
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(texts)} texts failed: {e}")
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            
+            self._stats["requests"] += len(pending)
+            self._stats["batches"] += 1
+            self._stats["texts"] += len(texts)
+            
+            offset = 0
+            for batch_texts, future in pending:
+                future.set_result(embeddings[offset:offset + len(batch_texts)])
+                offset += len(batch_texts)
+    
+    def stop(self, timeout: float = 5) -> None:
+        """Flush queued requests and stop the worker thread"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+        self._thread = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Batching counters"""
+        stats = dict(self._stats)
+        stats["avg_batch_size"] = round(stats["texts"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["queued"] = self._queue.qsize()
+        return stats
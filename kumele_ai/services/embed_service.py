@@ -1,11 +1,29 @@
 """
 Embedding Service - Handles text embeddings using Hugging Face models
+
+Embeddings are cached in two tiers (ResultCache), keyed by (model_key,
+sha256 of the normalized text):
+- In-process LRU bounded by EMBEDDING_CACHE_LRU_SIZE
+- Shared Redis tier storing float32 vectors as raw bytes with a TTL
+Only cache misses are sent to the model, in one batch. With
+EMBEDDING_BATCHER_ENABLED, misses from concurrent callers are merged
+into shared encode calls by the EmbedBatcher worker thread.
+
+model_key (the model name plus its inference backend, see
+InferenceBackend.model_key) also keys every other store of vectors:
+event, hobby and knowledge-base embeddings. Vectors from torch and
+ONNX int8 differ slightly, so switching INFERENCE_BACKEND re-encodes
+them instead of mixing the two in one vector space.
 """
+import asyncio
 import logging
 from typing import List, Optional, Dict, Any
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from kumele_ai.config import settings
+from kumele_ai.services.embed_batcher import EmbedBatcher
+from kumele_ai.services.inference_backend import inference_backend
+from kumele_ai.services.result_cache import ResultCache
 
 logger = logging.getLogger(__name__)
 
@@ -16,34 +34,140 @@ class EmbedService:
     def __init__(self):
         self.model_name = settings.EMBEDDING_MODEL
         self._model: Optional[SentenceTransformer] = None
+        
+        # Embedding cache: float32 vectors, stored in Redis as raw bytes
+        self._cache = ResultCache(
+            "emb",
+            lru_size=settings.EMBEDDING_CACHE_LRU_SIZE,
+            ttl_sec=settings.EMBEDDING_CACHE_TTL_SEC,
+            enabled=settings.EMBEDDING_CACHE_ENABLED,
+            dumps=lambda vector: vector.tobytes(),
+            loads=lambda raw: np.frombuffer(raw, dtype=np.float32)
+        )
+        
+        # Micro-batching of model calls across concurrent callers
+        self.batcher_enabled = settings.EMBEDDING_BATCHER_ENABLED
+        self.batcher = EmbedBatcher(
+            self._encode_model,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS
+        )
     
     @property
     def model(self) -> SentenceTransformer:
         """Lazy load the embedding model"""
         if self._model is None:
             logger.info(f"Loading embedding model: {self.model_name}")
-            self._model = SentenceTransformer(self.model_name)
+            self._model = inference_backend.load_sentence_transformer(self.model_name)
             logger.info("Embedding model loaded successfully")
         return self._model
     
+    @property
+    def model_key(self) -> str:
+        """
+        Model name qualified with the backend it runs on, for keying stored vectors.
+        
+        Follows EMBEDDING_MODEL changes and loads the model, since an ONNX
+        backend can fall back to torch at load time.
+        """
+        self._check_model()
+        self.model
+        return inference_backend.model_key(self.model_name)
+    
+    def _encode_model(self, texts: List[str]) -> np.ndarray:
+        """Run the model on a list of texts"""
+        return np.asarray(self.model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts, through the micro-batcher when enabled"""
+        if self.batcher_enabled:
+            return self.batcher.encode(texts)
+        return self._encode_model(texts)
+    
+    # =========================================================================
+    # EMBEDDING CACHE
+    # =========================================================================
+    
+    def _normalize_text(self, text: str) -> str:
+        """Collapse whitespace so trivially different strings share a cache entry"""
+        return " ".join(text.split())
+    
+    def _check_model(self) -> None:
+        """Drop the in-process tier if EMBEDDING_MODEL changed"""
+        if settings.EMBEDDING_MODEL != self.model_name:
+            logger.info(f"Embedding model changed to {settings.EMBEDDING_MODEL}, invalidating cache")
+            self.model_name = settings.EMBEDDING_MODEL
+            self._model = None
+            self.invalidate_cache()
+    
+    def _encode_cached(self, texts: List[str]) -> np.ndarray:
+        """Encode texts, serving repeats from the cache and encoding only misses in one batch"""
+        model_key = self.model_key
+        normalized = [self._normalize_text(t) for t in texts]
+        
+        vectors = self._cache.get_many(model_key, normalized)
+        
+        # Encode remaining misses in one batch
+        missing = list(dict.fromkeys(t for t, v in zip(normalized, vectors) if v is None))
+        if missing:
+            encoded = dict(zip(missing, self._encode(missing)))
+            self._cache.set_many(model_key, missing, [encoded[t] for t in missing])
+            vectors = [v if v is not None else encoded[t] for t, v in zip(normalized, vectors)]
+        
+        return np.stack(vectors)
+    
+    def invalidate_cache(self, include_redis: bool = False) -> None:
+        """
+        Clear cached embeddings.
+        
+        Redis entries are keyed by model_key, so a model or backend change
+        never serves stale vectors; include_redis also deletes this model's
+        keys.
+        """
+        self._cache.clear(inference_backend.model_key(self.model_name), include_redis=include_redis)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Embedding cache hit/miss counters"""
+        cache_stats = self._cache.get_stats()
+        return {
+            **self._cache.get_model_stats(inference_backend.model_key(self.model_name)),
+            "lru_size": cache_stats["lru_size"],
+            "lru_max_size": cache_stats["lru_max_size"],
+            "model": self.model_name,
+            "model_key": inference_backend.model_key(self.model_name),
+            "enabled": cache_stats["enabled"]
+        }
+    
+    # =========================================================================
+    # EMBEDDING
+    # =========================================================================
+    
     def embed_text(self, text: str) -> List[float]:
         """Generate embedding for a single text"""
         try:
-            embedding = self.model.encode(text, convert_to_numpy=True)
-            return embedding.tolist()
+            return self._encode_cached([text])[0].tolist()
         except Exception as e:
             logger.error(f"Error embedding text: {e}")
             raise
     
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts"""
+        """Generate embeddings for multiple texts (only cache misses are encoded)"""
+        if not texts:
+            return []
         try:
-            embeddings = self.model.encode(texts, convert_to_numpy=True)
-            return embeddings.tolist()
+            return self._encode_cached(texts).tolist()
         except Exception as e:
             logger.error(f"Error embedding texts: {e}")
             raise
     
+    async def embed_text_async(self, text: str) -> List[float]:
+        """Generate embedding for a single text without blocking the event loop"""
+        return await asyncio.to_thread(self.embed_text, text)
+    
+    async def embed_texts_async(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for multiple texts without blocking the event loop"""
+        return await asyncio.to_thread(self.embed_texts, texts)
+    
     def compute_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """Compute cosine similarity between two embeddings"""
         vec1 = np.array(embedding1)
@@ -79,22 +203,28 @@ class EmbedService:
         
         return similarities[:top_k]
     
+    def build_hobby_text(self, hobby_name: str, description: Optional[str] = None) -> str:
+        """Build the text that is embedded for a hobby"""
+        if description:
+            return f"{hobby_name}: {description}"
+        return hobby_name
+    
     def embed_hobby(self, hobby_name: str, description: Optional[str] = None) -> List[float]:
         """Generate embedding for a hobby"""
-        text = hobby_name
-        if description:
-            text = f"{hobby_name}: {description}"
-        return self.embed_text(text)
+        return self.embed_text(self.build_hobby_text(hobby_name, description))
     
-    def embed_event(self, title: str, description: Optional[str] = None, tags: Optional[List[str]] = None) -> List[float]:
-        """Generate embedding for an event"""
+    def build_event_text(self, title: str, description: Optional[str] = None, tags: Optional[List[str]] = None) -> str:
+        """Build the text that is embedded for an event"""
         parts = [title]
         if description:
             parts.append(description)
         if tags:
             parts.append(", ".join(tags))
-        text = " | ".join(parts)
-        return self.embed_text(text)
+        return " | ".join(parts)
+    
+    def embed_event(self, title: str, description: Optional[str] = None, tags: Optional[List[str]] = None) -> List[float]:
+        """Generate embedding for an event"""
+        return self.embed_text(self.build_event_text(title, description, tags))
     
     def get_embedding_dimension(self) -> int:
         """Get the dimension of embeddings"""
@@ -102,6 +232,7 @@ class EmbedService:
     
     def unload(self):
         """Unload the model to free memory"""
+        self.batcher.stop()
         self._model = None
         logger.info("Embedding model unloaded")
 
@@ -0,0 +1,194 @@
+"""
+Event Embedding Service - Persistent store of precomputed event embeddings
+
+Matching used to re-encode every upcoming event on every request. This
+service keeps one vector per event in the event_embeddings table, keyed
+by event id, a content hash of title, description and hobby_tags, and
+the embedding model key (model name plus inference backend):
+- Filled when events are created or edited (POST /event/{id}/embedding)
+- Backfilled by the refresh_event_embeddings Celery task
+- Read in bulk by matching; stale or missing rows are re-encoded in one batch
+"""
+import hashlib
+import json
+import logging
+from typing import Dict, Any, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+
+from kumele_ai.db.models import Event, EventEmbedding
+from kumele_ai.services.embed_service import embed_service
+
+logger = logging.getLogger(__name__)
+
+
+class EventEmbeddingService:
+    """Service for storing and loading precomputed event embeddings"""
+    
+    def __init__(self):
+        self.batch_size = 256  # Events encoded per model.encode call
+    
+    def compute_content_hash(self, event: Event) -> str:
+        """Hash the event fields that feed the embedding"""
+        payload = json.dumps(
+            [event.title or "", event.description or "", event.hobby_tags or []],
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _is_fresh(self, record: Optional[EventEmbedding], content_hash: str) -> bool:
+        """Check whether a stored embedding is still valid for the event"""
+        return (
+            record is not None and
+            record.content_hash == content_hash and
+            record.embedding_model == embed_service.model_key
+        )
+    
+    def _encode_events(
+        self,
+        db: Session,
+        events: List[Event],
+        existing: Dict[int, EventEmbedding]
+    ) -> Dict[int, np.ndarray]:
+        """Encode events in batches and write the vectors to the store"""
+        vectors: Dict[int, np.ndarray] = {}
+        
+        for start in range(0, len(events), self.batch_size):
+            batch = events[start:start + self.batch_size]
+            texts = [
+                embed_service.build_event_text(
+                    e.title,
+                    e.description,
+                    e.hobby_tags if e.hobby_tags else []
+                )
+                for e in batch
+            ]
+            embeddings = np.asarray(embed_service.embed_texts(texts), dtype=np.float32)
+            
+            for event, vector in zip(batch, embeddings):
+                record = existing.get(event.id)
+                if record is None:
+                    record = EventEmbedding(event_id=event.id)
+                    db.add(record)
+                    existing[event.id] = record
+                
+                record.content_hash = self.compute_content_hash(event)
+                record.embedding_model = embed_service.model_key
+                record.dimension = int(vector.shape[0])
+                record.vector = vector.tobytes()
+                vectors[event.id] = vector
+        
+        return vectors
+    
+    def get_event_embeddings(
+        self,
+        db: Session,
+        events: List[Event]
+    ) -> Dict[int, np.ndarray]:
+        """
+        Load embeddings for a list of events.
+        
+        Reads all stored vectors in a single query. Events whose row is
+        missing or whose content hash / model no longer matches are
+        re-encoded in one batch and written back.
+        
+        Returns:
+            Dict mapping event_id to a float32 vector
+        """
+        if not events:
+            return {}
+        
+        event_ids = [e.id for e in events]
+        records = db.query(EventEmbedding).filter(
+            EventEmbedding.event_id.in_(event_ids)
+        ).all()
+        existing = {r.event_id: r for r in records}
+        
+        vectors: Dict[int, np.ndarray] = {}
+        stale: List[Event] = []
+        
+        for event in events:
+            record = existing.get(event.id)
+            if self._is_fresh(record, self.compute_content_hash(event)):
+                vectors[event.id] = np.frombuffer(record.vector, dtype=np.float32)
+            else:
+                stale.append(event)
+        
+        if stale:
+            logger.info(f"Encoding {len(stale)} missing or stale event embeddings")
+            try:
+                vectors.update(self._encode_events(db, stale, existing))
+                db.commit()
+            except Exception as e:
+                logger.error(f"Error refreshing event embeddings: {e}")
+                db.rollback()
+        
+        return vectors
+    
+    def refresh_events(
+        self,
+        db: Session,
+        event_ids: Optional[List[int]] = None,
+        force: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Refresh stored embeddings for events.
+        
+        Args:
+            event_ids: Events to refresh (defaults to all upcoming events)
+            force: Re-encode even if the stored content hash still matches
+        """
+        try:
+            query = db.query(Event)
+            if event_ids:
+                query = query.filter(Event.id.in_(event_ids))
+            else:
+                query = query.filter(Event.status == "upcoming")
+            
+            events = query.all()
+            if not events:
+                return {"success": True, "events_checked": 0, "events_encoded": 0}
+            
+            records = db.query(EventEmbedding).filter(
+                EventEmbedding.event_id.in_([e.id for e in events])
+            ).all()
+            existing = {r.event_id: r for r in records}
+            
+            to_encode = [
+                e for e in events
+                if force or not self._is_fresh(existing.get(e.id), self.compute_content_hash(e))
+            ]
+            
+            if to_encode:
+                self._encode_events(db, to_encode, existing)
+                db.commit()
+            
+            return {
+                "success": True,
+                "events_checked": len(events),
+                "events_encoded": len(to_encode),
+                "embedding_model": embed_service.model_key
+            }
+        
+        except Exception as e:
+            logger.error(f"Event embedding refresh error: {e}")
+            db.rollback()
+            return {"success": False, "error": str(e)}
+    
+    def delete_event(self, db: Session, event_id: int) -> bool:
+        """Remove the stored embedding for an event"""
+        try:
+            deleted = db.query(EventEmbedding).filter(
+                EventEmbedding.event_id == event_id
+            ).delete()
+            db.commit()
+            return deleted > 0
+        except Exception as e:
+            logger.error(f"Error deleting event embedding {event_id}: {e}")
+            db.rollback()
+            return False
+
+
+# Singleton instance
+event_embedding_service = EventEmbeddingService()
@@ -0,0 +1,316 @@
+"""
+Event Search Service - Qdrant ANN retrieval for matching and recommendations
+
+Mirrors upcoming events into a dedicated Qdrant collection so matching
+can retrieve candidates in two stages:
+1. ANN search by hobby embedding with payload filters (status, hobby, geo radius)
+2. Full rerank of those candidates with trust/reputation features
+
+Vectors come from the event embedding store; the collection is kept in
+sync by the periodic sync_event_vectors Celery task (beat schedule) and
+the event embedding hook. Until the collection covers every upcoming
+event and nothing else (e.g. right after deploy, or between an event
+being cancelled and the next sync), matching uses its non-ANN candidate
+path; run sync_event_vectors once to backfill.
+"""
+import logging
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    VectorParams, Distance, PointStruct, PointIdsList, PayloadSchemaType,
+    Filter, FieldCondition, MatchValue, MatchAny, GeoRadius, GeoPoint,
+    IsEmptyCondition, PayloadField, SearchRequest
+)
+
+from kumele_ai.config import settings
+from kumele_ai.db.models import Event
+from kumele_ai.services.embed_service import embed_service
+from kumele_ai.services.event_embedding_service import event_embedding_service
+
+logger = logging.getLogger(__name__)
+
+
+class EventSearchService:
+    """Service for ANN event retrieval backed by Qdrant"""
+    
+    def __init__(self):
+        self.qdrant_client: Optional[QdrantClient] = None
+        self.collection_name = settings.QDRANT_EVENTS_COLLECTION
+        self.upsert_batch_size = 256
+        self.coverage_check_sec = settings.MATCHING_ANN_COVERAGE_CHECK_SEC
+        self._collection_ready = False
+        # (checked at, synced) of the last coverage check
+        self._coverage: Optional[Tuple[float, bool]] = None
+    
+    def _get_qdrant_client(self) -> QdrantClient:
+        """Get or create Qdrant client"""
+        if self.qdrant_client is None:
+            self.qdrant_client = QdrantClient(url=settings.QDRANT_URL)
+        return self.qdrant_client
+    
+    def _ensure_collection(self):
+        """Ensure the events collection and its payload indexes exist"""
+        if self._collection_ready:
+            return
+        
+        client = self._get_qdrant_client()
+        collections = client.get_collections().collections
+        
+        if not any(c.name == self.collection_name for c in collections):
+            client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=VectorParams(
+                    size=embed_service.get_embedding_dimension(),
+                    distance=Distance.COSINE
+                )
+            )
+            for field_name, schema in (
+                ("status", PayloadSchemaType.KEYWORD),
+                ("hobby_id", PayloadSchemaType.INTEGER),
+                ("city", PayloadSchemaType.KEYWORD),
+                ("location", PayloadSchemaType.GEO),
+            ):
+                client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=schema
+                )
+            logger.info(f"Created Qdrant collection: {self.collection_name}")
+        
+        self._collection_ready = True
+    
+    def _build_payload(self, event: Event) -> Dict[str, Any]:
+        """Payload fields used for filtering"""
+        payload = {
+            "event_id": event.id,
+            "status": event.status,
+            "hobby_id": event.hobby_id,
+            "city": event.city,
+        }
+        if event.latitude and event.longitude:
+            payload["location"] = {"lat": event.latitude, "lon": event.longitude}
+        return payload
+    
+    def sync_events(
+        self,
+        db: Session,
+        event_ids: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Mirror upcoming events into the Qdrant events collection.
+        
+        Args:
+            event_ids: Events to sync; if omitted, all upcoming events are
+                upserted and points for any other event are removed
+        """
+        try:
+            self._ensure_collection()
+            client = self._get_qdrant_client()
+            
+            query = db.query(Event).filter(Event.status == "upcoming")
+            if event_ids:
+                query = query.filter(Event.id.in_(event_ids))
+            events = query.all()
+            
+            vectors = event_embedding_service.get_event_embeddings(db, events)
+            
+            upserted = 0
+            for start in range(0, len(events), self.upsert_batch_size):
+                batch = events[start:start + self.upsert_batch_size]
+                points = [
+                    PointStruct(
+                        id=event.id,
+                        vector=vectors[event.id].tolist(),
+                        payload=self._build_payload(event)
+                    )
+                    for event in batch
+                    if event.id in vectors
+                ]
+                if points:
+                    client.upsert(collection_name=self.collection_name, points=points)
+                    upserted += len(points)
+            
+            # Remove points for events that are no longer upcoming
+            upcoming_ids = {e.id for e in events}
+            if event_ids:
+                stale_ids = [eid for eid in event_ids if eid not in upcoming_ids]
+            else:
+                stale_ids = [
+                    point_id for point_id in self._scroll_point_ids()
+                    if point_id not in upcoming_ids
+                ]
+            
+            if stale_ids:
+                client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=PointIdsList(points=stale_ids)
+                )
+            self._coverage = None
+            
+            return {
+                "success": True,
+                "events_upserted": upserted,
+                "events_removed": len(stale_ids),
+                "collection": self.collection_name
+            }
+        
+        except Exception as e:
+            logger.error(f"Event vector sync error: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def _scroll_point_ids(self) -> List[int]:
+        """List all point ids in the events collection"""
+        client = self._get_qdrant_client()
+        point_ids: List[int] = []
+        offset = None
+        
+        while True:
+            points, offset = client.scroll(
+                collection_name=self.collection_name,
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            point_ids.extend(int(p.id) for p in points)
+            if offset is None:
+                break
+        
+        return point_ids
+    
+    def is_synced(self, db: Session) -> bool:
+        """
+        Whether the collection holds exactly the upcoming events.
+        
+        Point ids are compared with the ids of upcoming events: a missing
+        point would silently leave an event out of ANN results, and a
+        stale point (an event cancelled or past since the last sync,
+        whose payload still says upcoming) would take one of its slots,
+        so callers only use search_candidates when this holds. Counts
+        alone are not enough, as stale points can make up for missing
+        ones. Checked at most every coverage_check_sec.
+        """
+        now = time.monotonic()
+        if self._coverage is not None and now - self._coverage[0] < self.coverage_check_sec:
+            return self._coverage[1]
+        
+        try:
+            self._ensure_collection()
+            indexed = set(self._scroll_point_ids())
+            upcoming = {
+                row[0] for row in db.query(Event.id).filter(Event.status == "upcoming").all()
+            }
+            missing = len(upcoming - indexed)
+            stale = len(indexed - upcoming)
+            synced = not missing and not stale
+            if not synced:
+                logger.warning(
+                    f"Events collection is missing {missing} upcoming events and holds "
+                    f"{stale} stale ones; using non-ANN candidates until sync_event_vectors catches up"
+                )
+        except Exception as e:
+            logger.error(f"Event collection coverage check error: {e}")
+            self._collection_ready = False
+            synced = False
+        
+        self._coverage = (now, synced)
+        return synced
+    
+    def _build_filter(
+        self,
+        search_lat: Optional[float],
+        search_lon: Optional[float],
+        radius_km: Optional[float],
+        hobby_ids: Optional[List[int]]
+    ) -> Filter:
+        """Status, hobby and geo radius filter for candidate search"""
+        must = [FieldCondition(key="status", match=MatchValue(value="upcoming"))]
+        should = None
+        
+        if hobby_ids is not None:
+            must.append(FieldCondition(key="hobby_id", match=MatchAny(any=hobby_ids)))
+        
+        if search_lat is not None and search_lon is not None and radius_km:
+            # Events without coordinates stay eligible, as in matching
+            should = [
+                FieldCondition(
+                    key="location",
+                    geo_radius=GeoRadius(
+                        center=GeoPoint(lat=search_lat, lon=search_lon),
+                        radius=radius_km * 1000
+                    )
+                ),
+                IsEmptyCondition(is_empty=PayloadField(key="location")),
+            ]
+        
+        return Filter(must=must, should=should)
+    
+    def search_candidates(
+        self,
+        query_vectors: List[List[float]],
+        limit: int,
+        search_lat: Optional[float] = None,
+        search_lon: Optional[float] = None,
+        radius_km: Optional[float] = None,
+        hobby_ids: Optional[List[int]] = None
+    ) -> Optional[List[int]]:
+        """
+        Top event ids by max cosine similarity to any query vector.
+        
+        Runs one filtered ANN search per query vector in a single batch
+        request and merges the hits.
+        
+        Returns:
+            Event ids ordered by similarity, or None if Qdrant is unavailable
+            (callers fall back to their non-ANN candidate path)
+        """
+        if not query_vectors:
+            return None
+        
+        try:
+            self._ensure_collection()
+            client = self._get_qdrant_client()
+            
+            search_filter = self._build_filter(search_lat, search_lon, radius_km, hobby_ids)
+            results = client.search_batch(
+                collection_name=self.collection_name,
+                requests=[
+                    SearchRequest(
+                        vector=list(vector),
+                        filter=search_filter,
+                        limit=limit,
+                        with_payload=False
+                    )
+                    for vector in query_vectors
+                ]
+            )
+            
+            best: Dict[int, float] = {}
+            for hits in results:
+                for hit in hits:
+                    event_id = int(hit.id)
+                    if hit.score > best.get(event_id, float("-inf")):
+                        best[event_id] = hit.score
+            
+            ranked = sorted(best.items(), key=lambda x: x[1], reverse=True)
+            return [event_id for event_id, _ in ranked[:limit]]
+        
+        except Exception as e:
+            logger.error(f"Event ANN search error: {e}")
+            self._collection_ready = False
+            return None
+    
+    def health_check(self) -> bool:
+        """Check if the events collection is reachable"""
+        try:
+            self._ensure_collection()
+            return True
+        except Exception as e:
+            logger.error(f"Event search health check failed: {e}")
+            return False
+
+
+# Singleton instance
+event_search_service = EventSearchService()
@@ -0,0 +1,235 @@
+"""
+Geo Index Service - In-process spatial grid over upcoming events
+
+Used by matching to fetch only events within the search radius before
+any scoring or embedding work:
+- Events are bucketed into fixed lat/lon grid cells
+- Radius queries scan only the cells overlapping the bounding box,
+  then apply an exact haversine filter
+- The index refreshes incrementally from events changed since the last
+  refresh (created_at / updated_at watermark), with a periodic full
+  rebuild to drop hard-deleted events
+"""
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+
+from kumele_ai.config import settings
+from kumele_ai.db.models import Event
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE_LAT = 111.32
+
+
+class GeoIndexService:
+    """
+    Grid index of upcoming event locations.
+    
+    Events without coordinates are tracked separately and always
+    returned as candidates, since their distance cannot be checked.
+    """
+    
+    def __init__(self):
+        self.cell_size_deg = settings.MATCHING_GEO_CELL_DEG
+        self.refresh_interval_sec = settings.MATCHING_GEO_REFRESH_SEC
+        self.rebuild_interval_sec = settings.MATCHING_GEO_REBUILD_SEC
+        
+        self._lon_cells = int(math.ceil(360 / self.cell_size_deg))
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._points: Dict[int, Tuple[float, float, Tuple[int, int]]] = {}
+        self._unlocated: Set[int] = set()
+        
+        self._watermark: Optional[datetime] = None
+        self._last_refresh: float = 0
+        self._last_rebuild: float = 0
+        self._lock = threading.Lock()
+    
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Grid cell for a coordinate"""
+        row = int(math.floor((lat + 90) / self.cell_size_deg))
+        col = int(math.floor((lon + 180) / self.cell_size_deg)) % self._lon_cells
+        return row, col
+    
+    def _remove(self, event_id: int) -> None:
+        """Remove an event from the index (caller holds the lock)"""
+        self._unlocated.discard(event_id)
+        point = self._points.pop(event_id, None)
+        if point:
+            cell_events = self._cells.get(point[2])
+            if cell_events is not None:
+                cell_events.discard(event_id)
+                if not cell_events:
+                    del self._cells[point[2]]
+    
+    def _apply(
+        self,
+        event_id: int,
+        latitude: Optional[float],
+        longitude: Optional[float],
+        status: Optional[str]
+    ) -> None:
+        """Insert, move or remove an event based on its current row (caller holds the lock)"""
+        self._remove(event_id)
+        
+        if status != "upcoming":
+            return
+        
+        # Same truthiness check matching uses for "has a location"
+        if not (latitude and longitude):
+            self._unlocated.add(event_id)
+            return
+        
+        cell = self._cell(latitude, longitude)
+        self._points[event_id] = (latitude, longitude, cell)
+        self._cells.setdefault(cell, set()).add(event_id)
+    
+    def _load_rows(self, db: Session, since: Optional[datetime] = None) -> List[Any]:
+        """Load (id, lat, lon, status, changed_at) rows, optionally only those changed since a timestamp"""
+        changed_at = func.coalesce(Event.updated_at, Event.created_at)
+        query = db.query(
+            Event.id,
+            Event.latitude,
+            Event.longitude,
+            Event.status,
+            changed_at
+        )
+        
+        if since is None:
+            query = query.filter(Event.status == "upcoming")
+        else:
+            # >= so rows committed with the same timestamp are not missed
+            query = query.filter(changed_at >= since)
+        
+        return query.all()
+    
+    def rebuild(self, db: Session) -> Dict[str, Any]:
+        """Rebuild the whole index from upcoming events"""
+        rows = self._load_rows(db)
+        
+        with self._lock:
+            self._cells = {}
+            self._points = {}
+            self._unlocated = set()
+            self._watermark = None
+            
+            for event_id, lat, lon, status, changed_at in rows:
+                self._apply(event_id, lat, lon, status)
+                if changed_at and (self._watermark is None or changed_at > self._watermark):
+                    self._watermark = changed_at
+            
+            self._last_refresh = self._last_rebuild = time.monotonic()
+        
+        logger.info(f"Geo index rebuilt: {len(self._points)} located, {len(self._unlocated)} unlocated events")
+        return self.get_stats()
+    
+    def refresh(self, db: Session) -> Dict[str, Any]:
+        """Apply events created or edited since the last refresh"""
+        if self._watermark is None or time.monotonic() - self._last_rebuild > self.rebuild_interval_sec:
+            return self.rebuild(db)
+        
+        rows = self._load_rows(db, since=self._watermark)
+        
+        with self._lock:
+            for event_id, lat, lon, status, changed_at in rows:
+                self._apply(event_id, lat, lon, status)
+                if changed_at and changed_at > self._watermark:
+                    self._watermark = changed_at
+            
+            self._last_refresh = time.monotonic()
+        
+        if rows:
+            logger.debug(f"Geo index refreshed {len(rows)} changed events")
+        return self.get_stats()
+    
+    def ensure_fresh(self, db: Session) -> None:
+        """Refresh the index if it is older than the refresh interval"""
+        if time.monotonic() - self._last_refresh > self.refresh_interval_sec:
+            try:
+                self.refresh(db)
+            except Exception as e:
+                logger.error(f"Geo index refresh error: {e}")
+    
+    def query_radius(
+        self,
+        db: Session,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        include_unlocated: bool = True
+    ) -> List[int]:
+        """
+        Event IDs within radius_km of a point.
+        
+        Args:
+            latitude, longitude: Search point
+            radius_km: Search radius
+            include_unlocated: Also return events that have no coordinates
+        """
+        self.ensure_fresh(db)
+        
+        lat_delta = radius_km / KM_PER_DEGREE_LAT
+        min_lat = max(latitude - lat_delta, -90.0)
+        max_lat = min(latitude + lat_delta, 90.0)
+        
+        # Longitude span widens with latitude; near the poles scan every column
+        cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+        lon_delta = radius_km / (KM_PER_DEGREE_LAT * cos_lat) if cos_lat > 1e-6 else 180.0
+        
+        min_row = self._cell(min_lat, 0)[0]
+        max_row = self._cell(max_lat, 0)[0]
+        if lon_delta >= 180:
+            cols = range(self._lon_cells)
+        else:
+            min_col = int(math.floor((longitude - lon_delta + 180) / self.cell_size_deg))
+            max_col = int(math.floor((longitude + lon_delta + 180) / self.cell_size_deg))
+            cols = {c % self._lon_cells for c in range(min_col, max_col + 1)}
+        
+        with self._lock:
+            candidate_ids = [
+                event_id
+                for row in range(min_row, max_row + 1)
+                for col in cols
+                for event_id in self._cells.get((row, col), ())
+            ]
+            coords = np.array(
+                [self._points[event_id][:2] for event_id in candidate_ids],
+                dtype=np.float64
+            ).reshape(-1, 2)
+            unlocated = list(self._unlocated) if include_unlocated else []
+        
+        if not candidate_ids:
+            return unlocated
+        
+        # Exact haversine filter on the bounding-box candidates
+        lat1 = math.radians(latitude)
+        lat2 = np.radians(coords[:, 0])
+        delta_lat = lat2 - lat1
+        delta_lon = np.radians(coords[:, 1] - longitude)
+        a = (np.sin(delta_lat / 2) ** 2 +
+             math.cos(lat1) * np.cos(lat2) * np.sin(delta_lon / 2) ** 2)
+        distances = 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        
+        within = [event_id for event_id, d in zip(candidate_ids, distances) if d <= radius_km]
+        return within + unlocated
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Index size and freshness"""
+        return {
+            "located_events": len(self._points),
+            "unlocated_events": len(self._unlocated),
+            "cells": len(self._cells),
+            "cell_size_deg": self.cell_size_deg,
+            "watermark": self._watermark.isoformat() if self._watermark else None
+        }
+
+
+# Singleton instance
+geo_index_service = GeoIndexService()
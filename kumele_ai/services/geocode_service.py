@@ -9,6 +9,7 @@ import httpx
 import redis
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from kumele_ai.config import settings
+from kumele_ai.services.http_clients import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -105,14 +106,14 @@ class GeocodeService:
             "addressdetails": 1
         }
         
-        with httpx.Client(timeout=settings.NOMINATIM_TIMEOUT_SEC) as client:
-            response = client.get(
-                f"{settings.NOMINATIM_URL}/search",
-                params=params,
-                headers=headers
-            )
-            response.raise_for_status()
-            return response.json()
+        client = http_clients.get_client("nominatim", settings.NOMINATIM_TIMEOUT_SEC)
+        response = client.get(
+            f"{settings.NOMINATIM_URL}/search",
+            params=params,
+            headers=headers
+        )
+        response.raise_for_status()
+        return response.json()
     
     def geocode(self, address: str) -> Optional[Dict[str, Any]]:
         """
@@ -0,0 +1,450 @@
+"""
+Heavy Hitters - Approximate top-K counting for keywords and search queries
+
+Extracted keywords and search queries have unbounded cardinality, so
+exact per-item counts do not scale. Each process keeps, per metric and
+time bucket (hourly, and daily), a mergeable sketch:
+- Count-Min Sketch: width ceil(e / HEAVY_HITTERS_EPSILON), depth
+  ceil(ln(1 / HEAVY_HITTERS_DELTA)); frequency of any item
+- Space-Saving summary: HEAVY_HITTERS_CAPACITY counters; the top items
+
+Sketches are fed by StreamService.publish_keywords_event and
+publish_search_event in whichever process publishes, and written to
+Redis every HEAVY_HITTERS_FLUSH_SEC as that process's part of the bucket
+(kumele:hh:{metric}:{h|d}:{bucket}:{cms|ss}, one hash field per
+process). Queries merge all parts of the buckets in the window; parts of
+closed buckets are compacted into a single "merged" field.
+
+Error bounds, for a window of N events:
+- Counts are never underestimated.
+- Count-Min: an estimate exceeds the true count by more than
+  epsilon * N with probability at most delta (epsilon = e / width,
+  delta = e^-depth; 0.002 and 0.02 by default).
+- Space-Saving: every item occurring more than N / capacity times is in
+  the summary, and its count is at most N / capacity too high.
+Reported frequencies are the smaller of the two upper bounds.
+"""
+import atexit
+import functools
+import hashlib
+import heapq
+import logging
+import math
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import numpy as np
+import orjson
+import redis
+from kumele_ai.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "kumele:hh"
+METRIC_KEYWORDS = "keywords"
+METRIC_SEARCH = "search_queries"
+MERGED_FIELD = b"merged"
+FINAL_SUFFIX = b":final"
+
+
+@functools.lru_cache(maxsize=65536)
+def _cms_indexes(item: str, width: int, depth: int) -> np.ndarray:
+    """Counter index of an item in each row (double hashing, stable across processes)"""
+    digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return np.array([(h1 + i * h2) % width for i in range(depth)])
+
+
+class CountMinSketch:
+    """Count-Min Sketch (depth rows of width counters)"""
+    
+    def __init__(self, width: int, depth: int, counts: Optional[np.ndarray] = None):
+        self.width = width
+        self.depth = depth
+        self.counts = counts if counts is not None else np.zeros((depth, width), dtype=np.int64)
+        self._rows = np.arange(depth)
+    
+    def _indexes(self, item: str) -> np.ndarray:
+        return _cms_indexes(item, self.width, self.depth)
+    
+    def add(self, item: str, count: int = 1) -> None:
+        self.counts[self._rows, self._indexes(item)] += count
+    
+    def estimate(self, item: str) -> int:
+        return int(self.counts[self._rows, self._indexes(item)].min())
+    
+    def merge(self, other: "CountMinSketch") -> None:
+        self.counts += other.counts
+    
+    def to_bytes(self) -> bytes:
+        return self.counts.astype(np.uint32).tobytes()
+    
+    @classmethod
+    def from_bytes(cls, data: bytes, width: int, depth: int) -> "CountMinSketch":
+        counts = np.frombuffer(data, dtype=np.uint32).astype(np.int64).reshape(depth, width)
+        return cls(width, depth, counts)
+
+
+class SpaceSaving:
+    """Space-Saving top-K summary: item -> [count, max overcount]"""
+    
+    def __init__(self, capacity: int, counters: Optional[Dict[str, List[int]]] = None):
+        self.capacity = capacity
+        self.counters: Dict[str, List[int]] = counters or {}
+        # Lazy min-heap of (count, item); an entry is stale once the item's count grew
+        self._heap: Optional[List[Tuple[int, str]]] = None
+    
+    def _floor(self) -> int:
+        """Upper bound on the count of any item not in a full summary"""
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(count for count, _ in self.counters.values())
+    
+    def _pop_smallest(self) -> Tuple[str, int]:
+        """Remove the item with the smallest count"""
+        if self._heap is None:
+            self._heap = [(count, item) for item, (count, _) in self.counters.items()]
+            heapq.heapify(self._heap)
+        while True:
+            count, item = heapq.heappop(self._heap)
+            current = self.counters[item][0]
+            if current == count:
+                del self.counters[item]
+                return item, count
+            heapq.heappush(self._heap, (current, item))
+    
+    def add(self, item: str, count: int = 1) -> None:
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += count
+            return
+        if len(self.counters) < self.capacity:
+            self.counters[item] = [count, 0]
+        else:
+            # Replace the smallest counter; its count becomes the new item's error
+            _, floor = self._pop_smallest()
+            self.counters[item] = [floor + count, floor]
+        if self._heap is not None:
+            heapq.heappush(self._heap, (self.counters[item][0], item))
+    
+    def merge(self, other: "SpaceSaving") -> None:
+        """Combine two summaries (absent items count as each summary's floor)"""
+        floor_self, floor_other = self._floor(), other._floor()
+        merged = {}
+        for item in self.counters.keys() | other.counters.keys():
+            count_a, error_a = self.counters.get(item, (floor_self, floor_self))
+            count_b, error_b = other.counters.get(item, (floor_other, floor_other))
+            merged[item] = [count_a + count_b, error_a + error_b]
+        top = sorted(merged.items(), key=lambda kv: kv[1][0], reverse=True)[:self.capacity]
+        self.counters = dict(top)
+        self._heap = None
+    
+    def top(self, n: int) -> List[Tuple[str, int, int]]:
+        """(item, count, max overcount) of the n largest counters"""
+        items = sorted(self.counters.items(), key=lambda kv: kv[1][0], reverse=True)[:n]
+        return [(item, count, error) for item, (count, error) in items]
+
+
+class BucketSketch:
+    """Count-Min + Space-Saving + event total for one metric bucket"""
+    
+    def __init__(self, width: int, depth: int, capacity: int):
+        self.cms = CountMinSketch(width, depth)
+        self.ss = SpaceSaving(capacity)
+        self.total = 0
+        self.dirty = False
+    
+    def add(self, item: str, count: int = 1) -> None:
+        self.cms.add(item, count)
+        self.ss.add(item, count)
+        self.total += count
+        self.dirty = True
+    
+    def merge(self, other: "BucketSketch") -> None:
+        self.cms.merge(other.cms)
+        self.ss.merge(other.ss)
+        self.total += other.total
+    
+    def dump(self) -> Tuple[bytes, bytes]:
+        """(CMS bytes, Space-Saving JSON)"""
+        return self.cms.to_bytes(), orjson.dumps({"n": self.total, "c": self.ss.counters})
+    
+    @classmethod
+    def load(cls, cms: bytes, ss: bytes, width: int, depth: int, capacity: int) -> "BucketSketch":
+        sketch = cls(width, depth, capacity)
+        sketch.cms = CountMinSketch.from_bytes(cms, width, depth)
+        summary = orjson.loads(ss)
+        sketch.ss = SpaceSaving(capacity, summary["c"])
+        sketch.total = summary["n"]
+        return sketch
+
+
+class HeavyHitterService:
+    """Per-process sketches, periodically persisted to Redis and merged on query"""
+    
+    def __init__(self):
+        self.epsilon = settings.HEAVY_HITTERS_EPSILON
+        self.delta = settings.HEAVY_HITTERS_DELTA
+        self.width = math.ceil(math.e / self.epsilon)
+        self.depth = math.ceil(math.log(1 / self.delta))
+        self.capacity = settings.HEAVY_HITTERS_CAPACITY
+        self.flush_sec = settings.HEAVY_HITTERS_FLUSH_SEC
+        self.hourly_days = settings.HEAVY_HITTERS_HOURLY_DAYS
+        self.retention_days = settings.HEAVY_HITTERS_RETENTION_DAYS
+        
+        self._atexit_registered = False
+        self._reset()
+    
+    def _reset(self) -> None:
+        """Fresh local state (also after a fork)"""
+        self._pid = os.getpid()
+        self._part = f"{socket.gethostname()}-{self._pid}-{uuid.uuid4().hex[:6]}".encode()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # (metric, granularity, bucket) -> sketch
+        self._local: Dict[Tuple[str, str, str], BucketSketch] = {}
+        self._redis: Optional[redis.Redis] = None
+    
+    def _get_redis(self) -> redis.Redis:
+        """Get Redis client (binary values)"""
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+    
+    def _new_sketch(self) -> BucketSketch:
+        return BucketSketch(self.width, self.depth, self.capacity)
+    
+    # ============================================================
+    # Buckets
+    # ============================================================
+    
+    def _stamps(self, when: datetime) -> Dict[str, str]:
+        return {"h": when.strftime("%Y%m%d%H"), "d": when.strftime("%Y%m%d")}
+    
+    def _key(self, metric: str, granularity: str, bucket: str) -> str:
+        return f"{KEY_PREFIX}:{metric}:{granularity}:{bucket}"
+    
+    def _ttl(self, granularity: str) -> int:
+        days = self.hourly_days + 1 if granularity == "h" else self.retention_days
+        return days * 86400
+    
+    # ============================================================
+    # Counting
+    # ============================================================
+    
+    def add(self, metric: str, items: Iterable[str]) -> None:
+        """Count occurrences of items (thread-safe, in memory until the next flush)"""
+        if os.getpid() != self._pid:
+            # Forked worker: the parent's counts are the parent's to flush
+            self._reset()
+        items = [item for item in items if item]
+        if not items:
+            return
+        self._ensure_started()
+        
+        stamps = self._stamps(datetime.utcnow())
+        with self._lock:
+            for granularity, bucket in stamps.items():
+                sketch = self._local.get((metric, granularity, bucket))
+                if sketch is None:
+                    sketch = self._local[(metric, granularity, bucket)] = self._new_sketch()
+                for item in items:
+                    sketch.add(item)
+    
+    def flush(self, final: bool = False) -> None:
+        """
+        Write this process's sketches to Redis; compact closed buckets.
+        
+        With final=True (shutdown) every bucket is written as a final part.
+        """
+        current = self._stamps(datetime.utcnow())
+        with self._lock:
+            closed = [key for key in self._local if final or key[2] != current[key[1]]]
+            pending = {
+                key: sketch.dump()
+                for key, sketch in self._local.items()
+                if sketch.dirty or key in closed
+            }
+            for key in pending:
+                self._local[key].dirty = False
+        if not pending:
+            return
+        
+        try:
+            pipe = self._get_redis().pipeline(transaction=True)
+            for (metric, granularity, bucket), (cms, ss) in pending.items():
+                base = self._key(metric, granularity, bucket)
+                if (metric, granularity, bucket) in closed:
+                    # Final part: compaction may merge it from now on
+                    field = self._part + FINAL_SUFFIX
+                    pipe.hdel(f"{base}:cms", self._part)
+                    pipe.hdel(f"{base}:ss", self._part)
+                else:
+                    field = self._part
+                pipe.hset(f"{base}:cms", field, cms)
+                pipe.hset(f"{base}:ss", field, ss)
+                pipe.expire(f"{base}:cms", self._ttl(granularity))
+                pipe.expire(f"{base}:ss", self._ttl(granularity))
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Heavy-hitter sketch flush error: {e}")
+            with self._lock:
+                for key in pending:
+                    if key in self._local:
+                        self._local[key].dirty = True
+            return
+        
+        with self._lock:
+            for key in closed:
+                self._local.pop(key, None)
+        for metric, granularity, bucket in closed:
+            self._compact(self._key(metric, granularity, bucket), granularity)
+    
+    def _compact(self, base: str, granularity: str) -> None:
+        """Merge the final parts of a closed bucket into its "merged" field"""
+        cms_key, ss_key = f"{base}:cms", f"{base}:ss"
+        try:
+            with self._get_redis().pipeline(transaction=True) as pipe:
+                pipe.watch(cms_key, ss_key)
+                cms_parts = pipe.hgetall(cms_key)
+                ss_parts = pipe.hgetall(ss_key)
+                fields = [f for f in ss_parts if f.endswith(FINAL_SUFFIX) and f in cms_parts]
+                if not fields:
+                    return
+                
+                merged = self._new_sketch()
+                for field in fields + ([MERGED_FIELD] if MERGED_FIELD in ss_parts else []):
+                    merged.merge(self._load(cms_parts[field], ss_parts[field]))
+                cms, ss = merged.dump()
+                
+                pipe.multi()
+                pipe.hset(cms_key, MERGED_FIELD, cms)
+                pipe.hset(ss_key, MERGED_FIELD, ss)
+                pipe.hdel(cms_key, *fields)
+                pipe.hdel(ss_key, *fields)
+                pipe.expire(cms_key, self._ttl(granularity))
+                pipe.expire(ss_key, self._ttl(granularity))
+                pipe.execute()
+        except redis.WatchError:
+            pass  # another process is compacting or flushing this bucket
+        except Exception as e:
+            logger.warning(f"Heavy-hitter compaction error for {base}: {e}")
+    
+    def _load(self, cms: bytes, ss: bytes) -> BucketSketch:
+        return BucketSketch.load(cms, ss, self.width, self.depth, self.capacity)
+    
+    def _run(self) -> None:
+        """Flush thread loop"""
+        while not self._stop.wait(self.flush_sec):
+            self.flush()
+    
+    def _ensure_started(self) -> None:
+        """Start the flush thread on first use"""
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stop.clear()
+                    self._thread = threading.Thread(
+                        target=self._run,
+                        name="heavy-hitters",
+                        daemon=True
+                    )
+                    self._thread.start()
+                    if not self._atexit_registered:
+                        atexit.register(self.close)
+                        self._atexit_registered = True
+    
+    def close(self) -> None:
+        """Stop the flush thread and write what is left"""
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self._thread = None
+        self.flush(final=True)
+    
+    # ============================================================
+    # Queries
+    # ============================================================
+    
+    def _window_sketch(self, metric: str, granularity: str, buckets: List[str]) -> BucketSketch:
+        """All processes' sketches of the given buckets, merged"""
+        pipe = self._get_redis().pipeline(transaction=False)
+        for bucket in buckets:
+            base = self._key(metric, granularity, bucket)
+            pipe.hgetall(f"{base}:cms")
+            pipe.hgetall(f"{base}:ss")
+        results = pipe.execute()
+        
+        window = self._new_sketch()
+        for cms_parts, ss_parts in zip(results[0::2], results[1::2]):
+            for field, ss in ss_parts.items():
+                if field in cms_parts:
+                    window.merge(self._load(cms_parts[field], ss))
+        return window
+    
+    def get_top(self, metric: str, days: int = 30, top_k: int = 20) -> Dict[str, Any]:
+        """
+        Approximate top items of the last `days` days with their growth.
+        
+        Frequencies are upper bounds (see the module docstring for the
+        error bounds, reported under error_bounds). Growth compares the
+        most recent half of the window with the first half.
+        """
+        now = datetime.utcnow()
+        if days <= self.hourly_days:
+            granularity, step, fmt = "h", timedelta(hours=1), "%Y%m%d%H"
+            buckets = [(now - step * i).strftime(fmt) for i in range(days * 24)]
+            recent = buckets[:days * 12]
+        else:
+            granularity, step, fmt = "d", timedelta(days=1), "%Y%m%d"
+            buckets = [(now - step * i).strftime(fmt) for i in range(days)]
+            recent = buckets[:days // 2]
+        
+        window = self._window_sketch(metric, granularity, buckets)
+        half = self._window_sketch(metric, granularity, recent) if recent else self._new_sketch()
+        
+        items = []
+        for item, count, error in window.ss.top(top_k * 2):
+            frequency = min(count, window.cms.estimate(item))
+            second_half = min(half.cms.estimate(item), frequency)
+            first_half = frequency - second_half
+            
+            if first_half > 0:
+                growth_rate = (second_half - first_half) / first_half
+            elif second_half > 0:
+                growth_rate = 1.0  # New item
+            else:
+                growth_rate = 0.0
+            
+            items.append({
+                "item": item,
+                "frequency": frequency,
+                "max_overcount": min(error, math.ceil(self.epsilon * window.total)),
+                "growth_rate": round(growth_rate, 2),
+                "trend": "rising" if growth_rate > 0.2 else "falling" if growth_rate < -0.2 else "stable"
+            })
+        
+        return {
+            "items": items,
+            "error_bounds": {
+                "window_events": window.total,
+                "count_min": {
+                    "epsilon": round(math.e / self.width, 6),
+                    "delta": round(math.exp(-self.depth), 6),
+                    "max_overcount": math.ceil(math.e / self.width * window.total)
+                },
+                "space_saving": {
+                    "capacity": self.capacity,
+                    "max_overcount": window.total // self.capacity
+                }
+            }
+        }
+
+
+# Singleton instance
+heavy_hitters = HeavyHitterService()
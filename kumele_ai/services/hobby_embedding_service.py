@@ -0,0 +1,194 @@
+"""
+Hobby Embedding Service - Cached embedding matrix for the hobby catalog
+
+The hobby catalog is small and rarely changes, but matching and ad
+targeting used to re-embed hobbies on every request. This service keeps
+one (hobbies x dim) float32 matrix:
+- Built with a single batched embed_texts call
+- Shared across processes through Redis (raw float32 bytes), keyed by
+  embedding model key and a fingerprint of the catalog
+- Invalidated when a Hobby row is inserted, updated or deleted in this
+  process, and by a periodic fingerprint check for changes made elsewhere
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from kumele_ai.config import settings
+from kumele_ai.db.models import Hobby
+from kumele_ai.services.embed_service import embed_service
+
+logger = logging.getLogger(__name__)
+
+
+class HobbyEmbeddingService:
+    """Service for the cached hobby embedding matrix"""
+    
+    def __init__(self):
+        self.check_interval_sec = settings.HOBBY_EMBEDDING_CHECK_SEC
+        self.cache_ttl_sec = settings.HOBBY_EMBEDDING_CACHE_TTL_SEC
+        
+        self._redis_client: Optional[redis.Redis] = None
+        self._hobby_ids: List[int] = []
+        self._index: Dict[int, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._fingerprint: Optional[str] = None
+        self._model_name: Optional[str] = None
+        self._last_check: float = 0
+        self._dirty = True
+        self._lock = threading.Lock()
+    
+    def _get_redis(self) -> Optional[redis.Redis]:
+        """Get Redis client for the shared matrix cache"""
+        if self._redis_client is None:
+            try:
+                self._redis_client = redis.from_url(settings.REDIS_URL)
+                self._redis_client.ping()
+            except Exception as e:
+                logger.warning(f"Redis unavailable for hobby embedding cache: {e}")
+                self._redis_client = None
+        return self._redis_client
+    
+    def _get_cache_key(self, fingerprint: str) -> str:
+        """Redis key for a model key + catalog version"""
+        return f"hobby_embeddings:{embed_service.model_key}:{fingerprint}"
+    
+    def _load_catalog(self, db: Session) -> Tuple[List[Tuple[int, str, Optional[str]]], str]:
+        """Load (id, name, description) rows and their fingerprint"""
+        rows = [
+            (hobby_id, name, description)
+            for hobby_id, name, description in db.query(
+                Hobby.id, Hobby.name, Hobby.description
+            ).order_by(Hobby.id).all()
+        ]
+        fingerprint = hashlib.sha256(
+            json.dumps(rows, ensure_ascii=False).encode()
+        ).hexdigest()[:32]
+        return rows, fingerprint
+    
+    def _read_cache(self, fingerprint: str) -> Optional[Tuple[List[int], np.ndarray]]:
+        """Read a matrix built by another process"""
+        try:
+            r = self._get_redis()
+            if r:
+                cached = r.hmget(self._get_cache_key(fingerprint), "ids", "dim", "matrix")
+                if all(v is not None for v in cached):
+                    hobby_ids = json.loads(cached[0])
+                    matrix = np.frombuffer(cached[2], dtype=np.float32).reshape(
+                        len(hobby_ids), int(cached[1])
+                    )
+                    return hobby_ids, matrix
+        except Exception as e:
+            logger.warning(f"Hobby embedding cache read error: {e}")
+        return None
+    
+    def _write_cache(self, fingerprint: str, hobby_ids: List[int], matrix: np.ndarray) -> None:
+        """Share a freshly built matrix with other processes"""
+        try:
+            r = self._get_redis()
+            if r:
+                key = self._get_cache_key(fingerprint)
+                pipe = r.pipeline()
+                pipe.hset(key, mapping={
+                    "ids": json.dumps(hobby_ids),
+                    "dim": matrix.shape[1],
+                    "matrix": matrix.tobytes()
+                })
+                pipe.expire(key, self.cache_ttl_sec)
+                pipe.execute()
+        except Exception as e:
+            logger.warning(f"Hobby embedding cache write error: {e}")
+    
+    def _build(self, db: Session) -> None:
+        """Load the catalog and (re)build the matrix if it changed (caller holds the lock)"""
+        rows, fingerprint = self._load_catalog(db)
+        self._last_check = time.monotonic()
+        self._dirty = False
+        
+        if (
+            fingerprint == self._fingerprint and
+            self._model_name == embed_service.model_key and
+            self._matrix is not None
+        ):
+            return
+        
+        cached = self._read_cache(fingerprint)
+        if cached is not None:
+            hobby_ids, matrix = cached
+        else:
+            hobby_ids = [hobby_id for hobby_id, _, _ in rows]
+            if rows:
+                texts = [
+                    embed_service.build_hobby_text(name, description)
+                    for _, name, description in rows
+                ]
+                matrix = np.asarray(embed_service.embed_texts(texts), dtype=np.float32)
+            else:
+                matrix = np.zeros((0, embed_service.get_embedding_dimension()), dtype=np.float32)
+            self._write_cache(fingerprint, hobby_ids, matrix)
+            logger.info(f"Built hobby embedding matrix for {len(hobby_ids)} hobbies")
+        
+        self._hobby_ids = hobby_ids
+        self._index = {hobby_id: i for i, hobby_id in enumerate(hobby_ids)}
+        self._matrix = matrix
+        self._fingerprint = fingerprint
+        self._model_name = embed_service.model_key
+    
+    def _snapshot(self, db: Session) -> Tuple[List[int], Dict[int, int], np.ndarray]:
+        """Current (hobby_ids, id -> row index, matrix), refreshed if needed"""
+        with self._lock:
+            if (
+                self._dirty or
+                self._matrix is None or
+                time.monotonic() - self._last_check > self.check_interval_sec
+            ):
+                self._build(db)
+            return self._hobby_ids, self._index, self._matrix
+    
+    def get_matrix(self, db: Session) -> Tuple[List[int], np.ndarray]:
+        """
+        Get the hobby embedding matrix.
+        
+        Returns:
+            (hobby_ids, matrix) where matrix row i is the embedding of hobby_ids[i]
+        """
+        hobby_ids, _, matrix = self._snapshot(db)
+        return hobby_ids, matrix
+    
+    def get_embeddings(self, db: Session, hobby_ids: List[int]) -> np.ndarray:
+        """Embedding rows for the given hobby ids, in order (unknown ids are skipped)"""
+        _, index, matrix = self._snapshot(db)
+        rows = [index[hobby_id] for hobby_id in hobby_ids if hobby_id in index]
+        return matrix[rows]
+    
+    def invalidate(self) -> None:
+        """Force a catalog check on the next lookup"""
+        self._dirty = True
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache state"""
+        return {
+            "hobbies": len(self._hobby_ids),
+            "dimension": int(self._matrix.shape[1]) if self._matrix is not None else None,
+            "embedding_model": self._model_name,
+            "fingerprint": self._fingerprint
+        }
+
+
+# Singleton instance
+hobby_embedding_service = HobbyEmbeddingService()
+
+
+@event.listens_for(Hobby, "after_insert")
+@event.listens_for(Hobby, "after_update")
+@event.listens_for(Hobby, "after_delete")
+def _invalidate_hobby_embeddings(mapper, connection, target):
+    """Rebuild the matrix after any Hobby row change in this process"""
+    hobby_embedding_service.invalidate()
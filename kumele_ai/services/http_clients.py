@@ -0,0 +1,164 @@
+"""
+HTTP Clients - Shared, long-lived httpx clients per upstream
+
+LLMService, TranslateService and GeocodeService used to open a new
+client (and a new TCP/TLS connection) for every call. The pool keeps one
+client per upstream ("llm_local", "openrouter", "translate", "nominatim")
+with keep-alive, connection limits from HTTP_* settings and HTTP/2 when
+the h2 package is installed.
+
+Async clients are bound to the event loop that created them, so they are
+kept per loop: each loop gets its own client per upstream. Lifecycle:
+- FastAPI: closed in the lifespan shutdown (main.py)
+- Celery: closed on worker process shutdown (worker/celery_app.py)
+- any other loop (e.g. asyncio.run in a script): a watcher task started
+  with the loop's first client closes its clients when asyncio.run
+  cancels the remaining tasks, before the loop is closed
+"""
+import asyncio
+import logging
+import threading
+from typing import Dict, Any
+import httpx
+from kumele_ai.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    """HTTP/2 support needs the optional h2 package (httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HttpClientPool:
+    """Registry of pooled httpx clients keyed by upstream name"""
+    
+    def __init__(self):
+        self.http2 = settings.HTTP2_ENABLED and _http2_available()
+        self.limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SEC
+        )
+        
+        # loop -> name -> client, and the task closing each loop's clients on shutdown
+        self._async_clients: Dict[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]] = {}
+        self._watchers: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+        self._sync_clients: Dict[str, httpx.Client] = {}
+        self._lock = threading.Lock()
+        self._created = 0
+        
+        if settings.HTTP2_ENABLED and not self.http2:
+            logger.info("h2 not installed, pooled HTTP clients will use HTTP/1.1")
+    
+    def _register_loop(self, loop: asyncio.AbstractEventLoop) -> Dict[str, httpx.AsyncClient]:
+        """Client registry of a loop, starting its shutdown watcher (lock held)"""
+        # Loops closed without cancelling their tasks (the watcher never ran)
+        for stale in [other for other in self._async_clients if other.is_closed()]:
+            names = sorted(self._async_clients.pop(stale))
+            self._watchers.pop(stale, None)
+            if names:
+                logger.warning(f"Event loop closed with open HTTP clients {names}; call http_clients.aclose() first")
+        
+        clients = self._async_clients[loop] = {}
+        self._watchers[loop] = loop.create_task(self._close_on_shutdown(loop))
+        return clients
+    
+    async def _close_on_shutdown(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Wait until cancelled (loop shutdown), then close the loop's clients"""
+        try:
+            await loop.create_future()
+        finally:
+            self._watchers.pop(loop, None)
+            await self._close_loop_clients(loop)
+    
+    async def _close_loop_clients(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Close the async clients created on a loop (from that loop)"""
+        with self._lock:
+            clients = self._async_clients.pop(loop, {})
+        for name, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP client {name}: {e}")
+    
+    def get_async_client(self, name: str, timeout: float) -> httpx.AsyncClient:
+        """Shared AsyncClient for an upstream on the running event loop"""
+        loop = asyncio.get_running_loop()
+        clients = self._async_clients.get(loop)
+        client = clients.get(name) if clients is not None else None
+        if client is not None and not client.is_closed:
+            return client
+        
+        with self._lock:
+            clients = self._async_clients.get(loop)
+            if clients is None:
+                clients = self._register_loop(loop)
+            client = httpx.AsyncClient(
+                timeout=timeout,
+                limits=self.limits,
+                http2=self.http2
+            )
+            clients[name] = client
+            self._created += 1
+        logger.debug(f"Opened pooled async HTTP client for {name}")
+        return client
+    
+    def get_client(self, name: str, timeout: float) -> httpx.Client:
+        """Shared synchronous Client for an upstream"""
+        client = self._sync_clients.get(name)
+        if client is not None and not client.is_closed:
+            return client
+        
+        with self._lock:
+            client = self._sync_clients.get(name)
+            if client is None or client.is_closed:
+                client = httpx.Client(
+                    timeout=timeout,
+                    limits=self.limits,
+                    http2=self.http2
+                )
+                self._sync_clients[name] = client
+                self._created += 1
+                logger.debug(f"Opened pooled HTTP client for {name}")
+        return client
+    
+    async def aclose(self) -> None:
+        """Close async clients owned by the running loop, and all sync clients"""
+        loop = asyncio.get_running_loop()
+        watcher = self._watchers.pop(loop, None)
+        if watcher is not None:
+            watcher.cancel()
+            await asyncio.gather(watcher, return_exceptions=True)
+        await self._close_loop_clients(loop)
+        self.close()
+    
+    def close(self) -> None:
+        """Close sync clients"""
+        with self._lock:
+            for name, client in self._sync_clients.items():
+                try:
+                    client.close()
+                except Exception as e:
+                    logger.warning(f"Error closing HTTP client {name}: {e}")
+            self._sync_clients.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Open clients and pool settings"""
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "async_clients": sorted({name for clients in self._async_clients.values() for name in clients}),
+            "event_loops": len(self._async_clients),
+            "sync_clients": sorted(self._sync_clients),
+            "clients_created": self._created
+        }
+
+
+# Singleton instance
+http_clients = HttpClientPool()
@@ -0,0 +1,208 @@
+"""
+Inference Backend - Pluggable CPU inference for embedding and classifier models
+
+Selected with INFERENCE_BACKEND:
+- "torch": full-precision PyTorch (default, previous behaviour)
+- "onnx": ONNX Runtime export with dynamic int8 quantization
+
+ONNX exports are cached under ONNX_CACHE_DIR. When ONNX_PARITY_CHECK is
+on, each ONNX model is compared against its torch counterpart on a small
+sample at load time and the torch model is used instead if the outputs
+drift past the configured tolerances. Any export or load error also
+falls back to torch.
+"""
+import gc
+import logging
+import os
+from typing import Dict, Any
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from transformers import pipeline
+from kumele_ai.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sample texts for the load-time parity check
+PARITY_SAMPLE_TEXTS = [
+    "I really enjoyed the hiking meetup last weekend!",
+    "This event was a complete waste of time and money.",
+    "The host was late but the venue was fine.",
+    "Looking for people to play chess on Sunday afternoons.",
+    "You are an idiot and nobody wants you here.",
+    "Great photos, thanks for sharing with the group.",
+    "Is parking available near the community center?",
+    "Worst organiser ever, never coming back.",
+]
+
+
+class InferenceBackend:
+    """Loads embedding and classification models on the configured backend"""
+    
+    def __init__(self):
+        self.backend = settings.INFERENCE_BACKEND.lower()
+        self.cache_dir = settings.ONNX_CACHE_DIR
+        self.quantize = settings.ONNX_QUANTIZE
+        self.quantization_config = settings.ONNX_QUANTIZATION_CONFIG
+        # model id -> backend actually in use ("torch" / "onnx" / "onnx-int8")
+        self._loaded: Dict[str, str] = {}
+    
+    def _export_dir(self, model_id: str) -> str:
+        """Cache directory for a model's ONNX export"""
+        return os.path.join(self.cache_dir, model_id.replace("/", "__"))
+    
+    # =========================================================================
+    # SENTENCE EMBEDDINGS
+    # =========================================================================
+    
+    def load_onnx_sentence_transformer(self, model_name: str) -> SentenceTransformer:
+        """Export (once) and load a SentenceTransformer on ONNX Runtime"""
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+        
+        export_dir = self._export_dir(model_name)
+        if not os.path.exists(os.path.join(export_dir, "onnx", "model.onnx")):
+            logger.info(f"Exporting {model_name} to ONNX in {export_dir}")
+            SentenceTransformer(model_name, backend="onnx").save(export_dir)
+        
+        if not self.quantize:
+            return SentenceTransformer(export_dir, backend="onnx")
+        
+        file_name = f"onnx/model_qint8_{self.quantization_config}.onnx"
+        if not os.path.exists(os.path.join(export_dir, file_name)):
+            logger.info(f"Quantizing {model_name} ({self.quantization_config})")
+            export_dynamic_quantized_onnx_model(
+                SentenceTransformer(export_dir, backend="onnx"),
+                self.quantization_config,
+                export_dir
+            )
+        
+        return SentenceTransformer(
+            export_dir,
+            backend="onnx",
+            model_kwargs={"file_name": file_name}
+        )
+    
+    def check_embedding_parity(self, model: SentenceTransformer, model_name: str) -> bool:
+        """Compare ONNX embeddings with torch on the sample texts"""
+        reference = SentenceTransformer(model_name)
+        try:
+            expected = reference.encode(PARITY_SAMPLE_TEXTS, convert_to_numpy=True)
+            actual = model.encode(PARITY_SAMPLE_TEXTS, convert_to_numpy=True)
+            min_cosine = float(np.min(
+                np.sum(expected * actual, axis=1) /
+                (np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1))
+            ))
+        finally:
+            del reference
+            gc.collect()
+        
+        logger.info(f"ONNX parity for {model_name}: min cosine {min_cosine:.4f}")
+        return min_cosine >= settings.ONNX_PARITY_MIN_COSINE
+    
+    def load_sentence_transformer(self, model_name: str) -> SentenceTransformer:
+        """Load an embedding model on the configured backend"""
+        if self.backend == "onnx":
+            try:
+                model = self.load_onnx_sentence_transformer(model_name)
+                if not settings.ONNX_PARITY_CHECK or self.check_embedding_parity(model, model_name):
+                    self._loaded[model_name] = "onnx-int8" if self.quantize else "onnx"
+                    return model
+                logger.warning(f"ONNX parity check failed for {model_name}, using torch")
+            except Exception as e:
+                logger.warning(f"ONNX backend unavailable for {model_name}, using torch: {e}")
+        
+        self._loaded[model_name] = "torch"
+        return SentenceTransformer(model_name)
+    
+    # =========================================================================
+    # TEXT CLASSIFICATION
+    # =========================================================================
+    
+    def load_onnx_classifier(self, task: str, model_id: str):
+        """Export (once) and load a sequence classifier on ONNX Runtime"""
+        from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+        
+        export_dir = self._export_dir(model_id)
+        if not os.path.exists(os.path.join(export_dir, "model.onnx")):
+            logger.info(f"Exporting {model_id} to ONNX in {export_dir}")
+            ORTModelForSequenceClassification.from_pretrained(model_id, export=True).save_pretrained(export_dir)
+            AutoTokenizer.from_pretrained(model_id).save_pretrained(export_dir)
+        
+        file_name = "model.onnx"
+        if self.quantize:
+            file_name = "model_quantized.onnx"
+            if not os.path.exists(os.path.join(export_dir, file_name)):
+                logger.info(f"Quantizing {model_id} ({self.quantization_config})")
+                quantizer = ORTQuantizer.from_pretrained(export_dir, file_name="model.onnx")
+                qconfig = getattr(AutoQuantizationConfig, self.quantization_config)(
+                    is_static=False,
+                    per_channel=False
+                )
+                quantizer.quantize(save_dir=export_dir, quantization_config=qconfig)
+        
+        model = ORTModelForSequenceClassification.from_pretrained(export_dir, file_name=file_name)
+        tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        return pipeline(task, model=model, tokenizer=tokenizer)
+    
+    def check_classifier_parity(self, pipe, task: str, model_id: str) -> bool:
+        """Compare ONNX labels and scores with torch on the sample texts"""
+        reference = pipeline(task, model=model_id)
+        try:
+            expected = reference(PARITY_SAMPLE_TEXTS)
+            actual = pipe(PARITY_SAMPLE_TEXTS)
+        finally:
+            del reference
+            gc.collect()
+        
+        labels_match = all(e["label"] == a["label"] for e, a in zip(expected, actual))
+        max_diff = max(abs(e["score"] - a["score"]) for e, a in zip(expected, actual))
+        
+        logger.info(f"ONNX parity for {model_id}: labels match={labels_match}, max score diff {max_diff:.4f}")
+        return labels_match and max_diff <= settings.ONNX_PARITY_MAX_SCORE_DIFF
+    
+    def load_text_classifier(self, task: str, model_id: str):
+        """Load a Hugging Face text-classification pipeline on the configured backend"""
+        if self.backend == "onnx":
+            try:
+                pipe = self.load_onnx_classifier(task, model_id)
+                if not settings.ONNX_PARITY_CHECK or self.check_classifier_parity(pipe, task, model_id):
+                    self._loaded[model_id] = "onnx-int8" if self.quantize else "onnx"
+                    return pipe
+                logger.warning(f"ONNX parity check failed for {model_id}, using torch")
+            except Exception as e:
+                logger.warning(f"ONNX backend unavailable for {model_id}, using torch: {e}")
+        
+        self._loaded[model_id] = "torch"
+        return pipeline(task, model=model_id)
+    
+    def model_key(self, model_id: str) -> str:
+        """
+        Model id qualified with the backend it runs on, for keying stored outputs.
+        
+        torch keeps the bare id, so stores written before ONNX support stay
+        valid; ONNX adds the backend and quantization config, e.g.
+        "all-MiniLM-L6-v2@onnx-int8-avx2". Models not loaded yet report the
+        configured backend.
+        """
+        backend = self._loaded.get(model_id)
+        if backend is None:
+            backend = "torch" if self.backend != "onnx" else ("onnx-int8" if self.quantize else "onnx")
+        if backend == "torch":
+            return model_id
+        if backend == "onnx-int8":
+            backend = f"onnx-int8-{self.quantization_config}"
+        return f"{model_id}@{backend}"
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Configured backend and the backend each loaded model ended up on"""
+        return {
+            "configured_backend": self.backend,
+            "quantize": self.quantize,
+            "models": dict(self._loaded),
+            "model_keys": {model_id: self.model_key(model_id) for model_id in self._loaded}
+        }
+
+
+# Singleton instance
+inference_backend = InferenceBackend()
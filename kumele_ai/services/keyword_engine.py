@@ -0,0 +1,205 @@
+"""
+Keyword Engine - Batched TF-IDF keyword extraction over hashed features
+
+extract_keywords used to score each text on its own (term frequency x a
+word-length boost), so words common to every text ranked as high as
+specific ones. Texts are now scored in batches as a sparse document-term
+matrix, against document frequencies accumulated over every text seen:
+- terms (unigrams and bigrams) are hashed into KEYWORD_HASH_FEATURES
+  features (scikit-learn FeatureHasher), so the statistics have a fixed
+  size however large the vocabulary grows
+- per-feature document frequencies and the document count live in Redis
+  (kumele:nlp:df:{features}, kumele:nlp:docs:{features}) and are updated
+  with each batch in one pipeline, which also returns the new totals
+- score = tf * idf, tf = count / tokens in the text,
+  idf = ln((1 + N) / (1 + df)) + 1
+Without Redis, a batch is scored against its own document frequencies.
+"""
+import logging
+import re
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import redis
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction import FeatureHasher
+from kumele_ai.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "kumele:nlp"
+MAX_PHRASES = 5
+MAX_ENTITIES = 5
+
+_WORD = re.compile(r"\b[a-zA-Z]{3,}\b")
+_ENTITY = re.compile(r"\b[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*\b")
+
+STOPWORDS = frozenset([
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for",
+    "of", "with", "by", "from", "as", "is", "was", "are", "were", "been",
+    "be", "have", "has", "had", "do", "does", "did", "will", "would", "could",
+    "should", "may", "might", "must", "shall", "can", "need", "dare", "ought",
+    "used", "it", "its", "this", "that", "these", "those", "i", "you", "he",
+    "she", "we", "they", "what", "which", "who", "when", "where", "why", "how",
+    "all", "each", "every", "both", "few", "more", "most", "other", "some",
+    "such", "no", "not", "only", "same", "so", "than", "too", "very", "just",
+    "also", "now", "here", "there", "then", "once", "still", "already"
+])
+
+
+class KeywordEngine:
+    """TF-IDF keyword scoring with incrementally maintained document frequencies"""
+    
+    def __init__(self):
+        self.n_features = settings.KEYWORD_HASH_FEATURES
+        self._hasher = FeatureHasher(
+            n_features=self.n_features,
+            input_type="string",
+            alternate_sign=False
+        )
+        self._df_key = f"{KEY_PREFIX}:df:{self.n_features}"
+        self._docs_key = f"{KEY_PREFIX}:docs:{self.n_features}"
+        self._redis_client: Optional[redis.Redis] = None
+    
+    def _get_redis(self) -> Optional[redis.Redis]:
+        """Get Redis client for document frequencies"""
+        if self._redis_client is None:
+            try:
+                self._redis_client = redis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True
+                )
+                self._redis_client.ping()
+            except Exception as e:
+                logger.warning(f"Redis unavailable for keyword document frequencies: {e}")
+                self._redis_client = None
+        return self._redis_client
+    
+    def tokenize(self, text: str) -> List[str]:
+        """Lowercased words of 3+ letters, without stopwords"""
+        return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+    
+    # ============================================================
+    # Document frequencies
+    # ============================================================
+    
+    def _update_doc_freq(
+        self,
+        features: np.ndarray,
+        batch_df: np.ndarray,
+        batch_docs: int
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Add a batch's document frequencies (per term, with each term's
+        hashed feature) to the totals.
+        
+        Returns the updated document frequency of each term and the
+        updated document count.
+        """
+        unique, inverse = np.unique(features, return_inverse=True)
+        per_feature = np.bincount(inverse, weights=batch_df).astype(np.int64)
+        
+        r = self._get_redis()
+        if r is None:
+            return per_feature[inverse], batch_docs
+        
+        try:
+            pipe = r.pipeline(transaction=True)
+            pipe.incrby(self._docs_key, batch_docs)
+            for feature, count in zip(unique.tolist(), per_feature.tolist()):
+                pipe.hincrby(self._df_key, feature, count)
+            totals = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Keyword document frequency update failed: {e}")
+            return per_feature[inverse], batch_docs
+        
+        return np.array(totals[1:], dtype=np.int64)[inverse], totals[0]
+    
+    # ============================================================
+    # Extraction
+    # ============================================================
+    
+    def _entities(self, text: str, total_words: int) -> List[Dict[str, Any]]:
+        """Potential entities (simple capitalization heuristic)"""
+        entity_freq = Counter(_ENTITY.findall(text))
+        return [
+            {
+                "keyword": entity,
+                "type": "entity",
+                "score": round(count / total_words * 2, 4)
+            }
+            for entity, count in entity_freq.most_common(MAX_ENTITIES)
+            if len(entity) > 2
+        ]
+    
+    def extract(self, texts: List[str], top_k: int = 10) -> List[List[Dict[str, Any]]]:
+        """
+        Keywords of each text, in order: up to top_k topics (unigrams),
+        MAX_PHRASES phrases (bigrams seen at least twice) and MAX_ENTITIES
+        entities, as {keyword, type, score} dicts.
+        
+        The texts' terms are counted into the document frequencies.
+        """
+        if not texts:
+            return []
+        
+        # Sparse document-term counts over the batch vocabulary
+        docs = [self.tokenize(text) for text in texts]
+        vocab: Dict[str, int] = {}
+        indptr, indices, data = [0], [], []
+        for tokens in docs:
+            counts = Counter(tokens)
+            counts.update(" ".join(pair) for pair in zip(tokens, tokens[1:]))
+            for term, count in counts.items():
+                indices.append(vocab.setdefault(term, len(vocab)))
+                data.append(count)
+            indptr.append(len(indices))
+        
+        terms = list(vocab)
+        lengths = np.array([max(len(tokens), 1) for tokens in docs])
+        keywords: List[List[Dict[str, Any]]] = [[] for _ in texts]
+        
+        if terms:
+            counts = csr_matrix(
+                (np.array(data, dtype=np.float64), np.array(indices), np.array(indptr)),
+                shape=(len(docs), len(terms))
+            )
+            is_phrase = np.array([" " in term for term in terms])
+            # One hashed feature per term (each row holds a single term)
+            features = self._hasher.transform([term] for term in terms).indices
+            
+            df, n_docs = self._update_doc_freq(
+                features,
+                np.bincount(counts.indices, minlength=len(terms)),
+                len(docs)
+            )
+            idf = np.log((1 + n_docs) / (1 + df)) + 1
+            rows = np.repeat(np.arange(len(docs)), np.diff(counts.indptr))
+            scores = counts.data / lengths[rows] * idf[counts.indices]
+            
+            for i in range(len(docs)):
+                start, end = counts.indptr[i], counts.indptr[i + 1]
+                cols, row_scores = counts.indices[start:end], scores[start:end]
+                order = np.argsort(-row_scores, kind="stable")
+                phrase = is_phrase[cols[order]]
+                repeated = counts.data[start:end][order] >= 2
+                
+                topics = order[~phrase][:top_k]
+                phrases = order[phrase & repeated][:MAX_PHRASES]
+                for positions, kw_type in ((topics, "topic"), (phrases, "phrase")):
+                    keywords[i].extend(
+                        {
+                            "keyword": terms[cols[p]],
+                            "type": kw_type,
+                            "score": round(float(row_scores[p]), 4)
+                        }
+                        for p in positions
+                    )
+        
+        for i, text in enumerate(texts):
+            keywords[i].extend(self._entities(text, int(lengths[i])))
+        return keywords
+
+
+# Singleton instance
+keyword_engine = KeywordEngine()
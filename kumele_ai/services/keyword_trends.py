@@ -0,0 +1,232 @@
+"""
+Keyword Trends - Streaming keyword counts in time-bucketed Redis sorted sets
+
+get_keyword_trends used to GROUP BY the whole nlp_keywords table for the
+period and then run two COUNT queries per keyword for its growth. Now
+each keywords_extracted stream event (published by extract_keywords) is
+folded into sorted sets keyed by time bucket, member "{type}|{keyword}":
+- kumele:trends:count:{h|d}:{bucket} - occurrences
+- kumele:trends:score:{h|d}:{bucket} - summed extraction scores
+Hourly buckets (kept KEYWORD_TRENDS_HOURLY_DAYS + 1 days) serve windows
+of up to KEYWORD_TRENDS_HOURLY_DAYS days; daily buckets (kept
+KEYWORD_TRENDS_RETENTION_DAYS) serve longer ones.
+
+A query unions the window's buckets (and its most recent half, for
+growth) into keys cached for KEYWORD_TRENDS_CACHE_SEC, then reads the
+top keywords and their scores: O(top_k) once the window is cached.
+scripts/backfill_keyword_trends.py loads existing nlp_keywords rows.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import redis
+from kumele_ai.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "kumele:trends"
+MEMBER_SEPARATOR = "|"
+# Stream event ids already counted (redeliveries are skipped)
+SEEN_TTL_SEC = 86400
+
+
+class KeywordTrendAggregator:
+    """Hourly/daily keyword counts and windowed trend queries"""
+    
+    def __init__(self):
+        self.hourly_days = settings.KEYWORD_TRENDS_HOURLY_DAYS
+        self.retention_days = settings.KEYWORD_TRENDS_RETENTION_DAYS
+        self.cache_sec = settings.KEYWORD_TRENDS_CACHE_SEC
+        self._redis_client: Optional[redis.Redis] = None
+    
+    def _get_redis(self) -> Optional[redis.Redis]:
+        """Get Redis client for trend buckets"""
+        if self._redis_client is None:
+            try:
+                self._redis_client = redis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True
+                )
+                self._redis_client.ping()
+            except Exception as e:
+                logger.warning(f"Redis unavailable for keyword trends: {e}")
+                self._redis_client = None
+        return self._redis_client
+    
+    # ============================================================
+    # Buckets
+    # ============================================================
+    
+    def _hour_stamp(self, when: datetime) -> str:
+        return when.strftime("%Y%m%d%H")
+    
+    def _day_stamp(self, when: datetime) -> str:
+        return when.strftime("%Y%m%d")
+    
+    def _bucket_keys(self, when: datetime) -> List[Tuple[str, str, int]]:
+        """(count key, score key, TTL) of the hourly and daily buckets of a time"""
+        hour, day = self._hour_stamp(when), self._day_stamp(when)
+        return [
+            (f"{KEY_PREFIX}:count:h:{hour}", f"{KEY_PREFIX}:score:h:{hour}", (self.hourly_days + 1) * 86400),
+            (f"{KEY_PREFIX}:count:d:{day}", f"{KEY_PREFIX}:score:d:{day}", self.retention_days * 86400)
+        ]
+    
+    def _add(self, pipe, keywords: Iterable[Dict[str, Any]], when: datetime) -> None:
+        """Queue bucket increments for keywords extracted at a time"""
+        buckets = self._bucket_keys(when)
+        for kw in keywords:
+            member = f"{kw['type']}{MEMBER_SEPARATOR}{kw['keyword']}"
+            for count_key, score_key, _ in buckets:
+                pipe.zincrby(count_key, 1, member)
+                pipe.zincrby(score_key, float(kw.get("score") or 0.0), member)
+        for count_key, score_key, ttl in buckets:
+            pipe.expire(count_key, ttl)
+            pipe.expire(score_key, ttl)
+    
+    def record(
+        self,
+        keywords: List[Dict[str, Any]],
+        when: Optional[datetime] = None,
+        event_id: Optional[str] = None
+    ) -> bool:
+        """
+        Count extracted keywords ({keyword, type, score} dicts).
+        
+        With an event_id, an event already counted is skipped (returns False).
+        Raises if Redis is unavailable, so stream events are retried.
+        """
+        r = self._get_redis()
+        if r is None:
+            raise RuntimeError("Redis unavailable for keyword trends")
+        if not keywords:
+            return False
+        
+        # Claim the event atomically: of concurrent deliveries, only the
+        # one that sets the marker counts it
+        seen_key = f"{KEY_PREFIX}:seen:{event_id}" if event_id else None
+        if seen_key and not r.set(seen_key, 1, nx=True, ex=SEEN_TTL_SEC):
+            return False
+        
+        try:
+            pipe = r.pipeline(transaction=True)
+            self._add(pipe, keywords, when or datetime.utcnow())
+            pipe.execute()
+        except Exception:
+            # Release the claim so the retried event is counted
+            if seen_key:
+                r.delete(seen_key)
+            raise
+        return True
+    
+    def record_event(self, event: Dict[str, Any]) -> bool:
+        """Count a keywords_extracted stream event"""
+        try:
+            when = datetime.fromisoformat(event["timestamp"])
+        except (TypeError, ValueError):
+            when = datetime.utcnow()
+        
+        keywords = [
+            # Events from before keyword types/scores were published
+            {"keyword": kw, "type": "topic", "score": 0.0} if isinstance(kw, str) else kw
+            for kw in event["data"]["keywords"]
+        ]
+        return self.record(keywords, when, event_id=event.get("id"))
+    
+    # ============================================================
+    # Queries
+    # ============================================================
+    
+    def _window(self, r: redis.Redis, days: int, now: datetime) -> Tuple[str, str, str]:
+        """Cached union keys (count, recent-half count, score) for a window"""
+        if days <= self.hourly_days:
+            granularity, step, stamp = "h", timedelta(hours=1), self._hour_stamp
+            buckets = [stamp(now - step * i) for i in range(days * 24)]
+            recent = buckets[:days * 12]
+        else:
+            granularity, step, stamp = "d", timedelta(days=1), self._day_stamp
+            buckets = [stamp(now - step * i) for i in range(days)]
+            recent = buckets[:days // 2]
+        
+        window_key = f"{KEY_PREFIX}:window:{days}:{buckets[0]}"
+        count_key, half_key, score_key = (
+            f"{window_key}:count", f"{window_key}:half", f"{window_key}:score"
+        )
+        if r.exists(count_key):
+            return count_key, half_key, score_key
+        
+        pipe = r.pipeline(transaction=False)
+        pipe.zunionstore(count_key, [f"{KEY_PREFIX}:count:{granularity}:{b}" for b in buckets])
+        pipe.zunionstore(score_key, [f"{KEY_PREFIX}:score:{granularity}:{b}" for b in buckets])
+        if recent:
+            pipe.zunionstore(half_key, [f"{KEY_PREFIX}:count:{granularity}:{b}" for b in recent])
+        else:
+            pipe.delete(half_key)
+        for key in (count_key, half_key, score_key):
+            pipe.expire(key, self.cache_sec)
+        pipe.execute()
+        return count_key, half_key, score_key
+    
+    def get_trends(self, days: int = 30, top_k: int = 20) -> Dict[str, Any]:
+        """
+        Top keywords of the last `days` days with their growth.
+        
+        Growth compares the most recent half of the window with the first
+        half; candidates are the 2 * top_k most frequent keywords.
+        """
+        r = self._get_redis()
+        if r is None:
+            raise RuntimeError("Redis unavailable for keyword trends")
+        
+        count_key, half_key, score_key = self._window(r, days, datetime.utcnow())
+        candidates = r.zrevrange(count_key, 0, top_k * 2 - 1, withscores=True)
+        if not candidates:
+            return {
+                "period_days": days,
+                "trends": [],
+                "total_keywords_analyzed": 0,
+                "rising_count": 0,
+                "falling_count": 0
+            }
+        
+        members = [member for member, _ in candidates]
+        pipe = r.pipeline(transaction=False)
+        pipe.zmscore(half_key, members)
+        pipe.zmscore(score_key, members)
+        recent_counts, score_sums = pipe.execute()
+        
+        trends = []
+        for (member, count), second_half, score_sum in zip(candidates, recent_counts, score_sums):
+            kw_type, _, keyword = member.partition(MEMBER_SEPARATOR)
+            second_half = second_half or 0
+            first_half = count - second_half
+            
+            if first_half > 0:
+                growth_rate = (second_half - first_half) / first_half
+            elif second_half > 0:
+                growth_rate = 1.0  # New keyword
+            else:
+                growth_rate = 0.0
+            
+            trends.append({
+                "keyword": keyword,
+                "type": kw_type,
+                "frequency": int(count),
+                "avg_score": round((score_sum or 0.0) / count, 4),
+                "growth_rate": round(growth_rate, 2),
+                "trend": "rising" if growth_rate > 0.2 else "falling" if growth_rate < -0.2 else "stable"
+            })
+        
+        # Sort by combined score of frequency and growth
+        trends.sort(key=lambda x: x["frequency"] * (1 + x["growth_rate"]), reverse=True)
+        
+        return {
+            "period_days": days,
+            "trends": trends[:top_k],
+            "total_keywords_analyzed": len(trends),
+            "rising_count": sum(1 for t in trends if t["trend"] == "rising"),
+            "falling_count": sum(1 for t in trends if t["trend"] == "falling")
+        }
+
+
+# Singleton instance
+keyword_trends = KeywordTrendAggregator()
@@ -0,0 +1,473 @@
+"""
+Knowledge Ingest Service - Background bulk ingestion of knowledge files
+
+/chatbot/knowledge/bulk-upload only spools the uploads to
+KB_INGEST_SPOOL_DIR (shared by the API and Celery workers) and returns a
+job id; the ingest_knowledge_files task then runs the pipeline per file:
+- PDF pages are extracted in a process pool, KB_INGEST_PAGES_PER_TASK
+  pages per task, with a bounded number of ranges in flight; in daemonic
+  processes (Celery's default prefork pool), which may not start
+  children, they are extracted in threads instead. Run the "knowledge"
+  queue on a solo-pool worker (ingest_worker in docker-compose.yml) for
+  parallel extraction.
+- pages stream through the token-aware chunker while earlier chunks are
+  embedded (KB_INGEST_EMBED_BATCH chunks per batch)
+- the KnowledgeDocument row, all its KnowledgeEmbedding rows and BM25
+  postings are bulk-inserted, and the points upserted with the same
+  deterministic ids and content hash as sync_documents, so a later sync
+  skips the document
+
+Job and per-file progress live in a Redis hash (kb_ingest:{job_id}) that
+expires after KB_INGEST_JOB_TTL_SEC.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import uuid
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import BinaryIO, Dict, Any, Iterator, List, Optional, Tuple
+import redis
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from qdrant_client.models import PointStruct
+
+from kumele_ai.config import settings
+from kumele_ai.db.models import KnowledgeDocument, KnowledgeEmbedding
+from kumele_ai.services.embed_service import embed_service
+from kumele_ai.services.text_chunker import text_chunker
+from kumele_ai.services.lexical_index import lexical_index
+from kumele_ai.services.answer_cache_service import answer_cache_service
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ("pdf", "txt", "md")
+JOB_KEY_PREFIX = "kb_ingest"
+
+
+# ============================================================
+# Page extraction (runs in pool processes)
+# ============================================================
+
+def _count_pdf_pages(path: str) -> int:
+    """Number of pages in a PDF"""
+    try:
+        import pdfplumber
+        with pdfplumber.open(path) as pdf:
+            return len(pdf.pages)
+    except Exception:
+        from PyPDF2 import PdfReader
+        return len(PdfReader(path).pages)
+
+
+def _extract_pdf_pages(path: str, start: int, end: int) -> List[str]:
+    """Text of pages [start, end) of a PDF (pdfplumber, PyPDF2 fallback)"""
+    try:
+        import pdfplumber
+        with pdfplumber.open(path, pages=list(range(start + 1, end + 1))) as pdf:
+            return [page.extract_text() or "" for page in pdf.pages]
+    except Exception:
+        from PyPDF2 import PdfReader
+        reader = PdfReader(path)
+        return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+class KnowledgeIngestService:
+    """Spooled, streaming bulk ingestion of knowledge documents"""
+    
+    def __init__(self):
+        self.spool_dir = settings.KB_INGEST_SPOOL_DIR
+        self.pdf_workers = settings.KB_INGEST_PDF_WORKERS
+        self.pages_per_task = settings.KB_INGEST_PAGES_PER_TASK
+        self.embed_batch_size = settings.KB_INGEST_EMBED_BATCH
+        self.job_ttl_sec = settings.KB_INGEST_JOB_TTL_SEC
+        # Page ranges extracted ahead of the chunker
+        self.max_in_flight = self.pdf_workers * 2
+        self._redis_client: Optional[redis.Redis] = None
+    
+    def _get_redis(self) -> Optional[redis.Redis]:
+        """Get Redis client for job state"""
+        if self._redis_client is None:
+            try:
+                self._redis_client = redis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True
+                )
+                self._redis_client.ping()
+            except Exception as e:
+                logger.warning(f"Redis unavailable for knowledge ingestion: {e}")
+                self._redis_client = None
+        return self._redis_client
+    
+    # ============================================================
+    # Job state
+    # ============================================================
+    
+    def _job_key(self, job_id: str) -> str:
+        return f"{JOB_KEY_PREFIX}:{job_id}"
+    
+    def _save(self, job_id: str, fields: Dict[str, Dict[str, Any]]) -> None:
+        """Write job/file entries to the job hash and refresh its TTL"""
+        r = self._get_redis()
+        if r is None:
+            raise RuntimeError("Redis unavailable for knowledge ingestion jobs")
+        key = self._job_key(job_id)
+        pipe = r.pipeline()
+        pipe.hset(key, mapping={name: json.dumps(value) for name, value in fields.items()})
+        pipe.expire(key, self.job_ttl_sec)
+        pipe.execute()
+    
+    def _update(self, job_id: str, name: str, value: Dict[str, Any]) -> None:
+        try:
+            self._save(job_id, {name: value})
+        except Exception as e:
+            # Progress is best effort once the job is running
+            logger.warning(f"Ingest progress update error: {e}")
+    
+    def _update_job(self, job_id: str, job: Dict[str, Any], **changes) -> None:
+        job.update(changes)
+        self._update(job_id, "job", job)
+    
+    def _update_file(self, job_id: str, entry: Dict[str, Any], **changes) -> None:
+        entry.update(changes)
+        self._update(job_id, f"file:{entry['index']}", entry)
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status with per-file progress, or None if unknown/expired"""
+        r = self._get_redis()
+        if r is None:
+            raise RuntimeError("Redis unavailable for knowledge ingestion jobs")
+        
+        fields = r.hgetall(self._job_key(job_id))
+        if "job" not in fields:
+            return None
+        
+        files = [json.loads(value) for name, value in fields.items() if name.startswith("file:")]
+        return {
+            **json.loads(fields["job"]),
+            "files": sorted(files, key=lambda f: f["index"])
+        }
+    
+    # ============================================================
+    # Spooling (API side)
+    # ============================================================
+    
+    def _spool_path(self, job_id: str, entry: Dict[str, Any]) -> str:
+        return os.path.join(self.spool_dir, job_id, f"{entry['index']:04d}.{entry['extension']}")
+    
+    def _spool(self, fileobj: BinaryIO, path: str) -> int:
+        """Copy an upload to disk in 1 MB blocks"""
+        fileobj.seek(0)
+        with open(path, "wb") as out:
+            shutil.copyfileobj(fileobj, out, 1024 * 1024)
+            return out.tell()
+    
+    async def create_job(
+        self,
+        uploads: List[Tuple[str, BinaryIO]],
+        category: str,
+        language: str
+    ) -> Dict[str, Any]:
+        """
+        Spool uploaded files to disk and register an ingestion job.
+        
+        Args:
+            uploads: (filename, file object) pairs
+        
+        Unsupported formats are recorded as failed files; the caller enqueues
+        ingest_knowledge_files with the returned job id.
+        """
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.spool_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        
+        files = []
+        for index, (filename, fileobj) in enumerate(uploads):
+            filename = filename or "unknown"
+            extension = filename.lower().rsplit(".", 1)[-1] if "." in filename else ""
+            entry = {
+                "index": index,
+                "filename": filename,
+                "extension": extension,
+                "status": "queued",
+                "size_bytes": 0,
+                "pages_total": None,
+                "pages_done": 0,
+                "chunks": 0,
+                "document_id": None,
+                "error": None
+            }
+            if extension not in SUPPORTED_EXTENSIONS:
+                entry.update(status="failed", error="Unsupported format")
+            else:
+                entry["size_bytes"] = await asyncio.to_thread(
+                    self._spool, fileobj, self._spool_path(job_id, entry)
+                )
+            files.append(entry)
+        
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "category": category,
+            "language": language,
+            "files_total": len(files),
+            "files_done": 0,
+            "files_failed": sum(1 for f in files if f["status"] == "failed"),
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None
+        }
+        
+        try:
+            self._save(job_id, {"job": job, **{f"file:{f['index']}": f for f in files}})
+        except Exception:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        
+        logger.info(f"Knowledge ingest job {job_id} queued with {len(files)} files")
+        return {**job, "files": files}
+    
+    # ============================================================
+    # Pipeline (worker side)
+    # ============================================================
+    
+    def _pdf_pool(self) -> Executor:
+        """Executor for PDF page extraction"""
+        if multiprocessing.current_process().daemon:
+            # Prefork Celery children are daemonic and cannot start a process pool
+            logger.warning(
+                "Daemonic worker process: extracting PDF pages in threads "
+                "(run the knowledge queue with --pool=solo for a process pool)"
+            )
+            return ThreadPoolExecutor(max_workers=self.pdf_workers)
+        return ProcessPoolExecutor(max_workers=self.pdf_workers)
+    
+    def _iter_pages(
+        self,
+        pool: Executor,
+        job_id: str,
+        entry: Dict[str, Any]
+    ) -> Iterator[str]:
+        """Yield non-empty page texts of a spooled file, in order"""
+        path = self._spool_path(job_id, entry)
+        
+        if entry["extension"] != "pdf":
+            with open(path, "rb") as f:
+                raw = f.read()
+            try:
+                text = raw.decode("utf-8")
+            except UnicodeDecodeError:
+                text = raw.decode("latin-1")
+            self._update_file(job_id, entry, pages_total=1, pages_done=1)
+            if text.strip():
+                yield text
+            return
+        
+        page_count = _count_pdf_pages(path)
+        self._update_file(job_id, entry, pages_total=page_count)
+        
+        pending = deque()
+        
+        def drain_oldest() -> List[str]:
+            pages = pending.popleft().result()
+            self._update_file(job_id, entry, pages_done=entry["pages_done"] + len(pages))
+            return [page for page in pages if page.strip()]
+        
+        for start in range(0, page_count, self.pages_per_task):
+            end = min(start + self.pages_per_task, page_count)
+            pending.append(pool.submit(_extract_pdf_pages, path, start, end))
+            # Consume the oldest range while later ones are still extracting
+            if len(pending) >= self.max_in_flight:
+                yield from drain_oldest()
+        while pending:
+            yield from drain_oldest()
+    
+    def _next_batch(self, chunks: Iterator[str]) -> List[str]:
+        return list(itertools.islice(chunks, self.embed_batch_size))
+    
+    async def _embed_stream(
+        self,
+        job_id: str,
+        entry: Dict[str, Any],
+        chunks: Iterator[str]
+    ) -> Tuple[List[str], List[List[float]]]:
+        """
+        Embed a chunk stream batch by batch.
+        
+        The next batch is chunked (pulling pages from the pool) in a thread
+        while the current one is being embedded.
+        """
+        texts: List[str] = []
+        vectors: List[List[float]] = []
+        seen = set()
+        
+        pending = asyncio.ensure_future(asyncio.to_thread(self._next_batch, chunks))
+        try:
+            while True:
+                batch = await pending
+                if not batch:
+                    break
+                pending = asyncio.ensure_future(asyncio.to_thread(self._next_batch, chunks))
+                
+                # Identical chunks within a document share one point
+                batch = [chunk for chunk in batch if not (chunk in seen or seen.add(chunk))]
+                if batch:
+                    texts.extend(batch)
+                    vectors.extend(await embed_service.embed_texts_async(batch))
+                self._update_file(job_id, entry, chunks=len(texts))
+        finally:
+            if not pending.done():
+                await asyncio.gather(pending, return_exceptions=True)
+        
+        return texts, vectors
+    
+    async def _ingest_file(
+        self,
+        db: Session,
+        pool: Executor,
+        job: Dict[str, Any],
+        entry: Dict[str, Any]
+    ) -> int:
+        """Extract, chunk, embed and index one spooled file; returns the document id"""
+        from kumele_ai.services.chatbot_service import chatbot_service
+        
+        job_id = job["job_id"]
+        self._update_file(job_id, entry, status="processing")
+        
+        # Page texts are kept for the document row as they stream past
+        pages: List[str] = []
+        
+        def page_stream() -> Iterator[str]:
+            for page in self._iter_pages(pool, job_id, entry):
+                pages.append(page)
+                yield page
+        
+        chunks, vectors = await self._embed_stream(
+            job_id, entry, text_chunker.iter_chunks(page_stream())
+        )
+        if not chunks:
+            raise ValueError("No text could be extracted")
+        
+        self._update_file(job_id, entry, status="indexing")
+        doc = KnowledgeDocument(
+            title=entry["filename"].rsplit(".", 1)[0].replace("_", " ").replace("-", " ").title(),
+            content="\n\n".join(page.strip() for page in pages),
+            category=job["category"],
+            language=job["language"]
+        )
+        
+        document_id = None
+        try:
+            db.add(doc)
+            db.flush()
+            document_id = doc.id
+            
+            chunk_ids = [chatbot_service._chunk_id(doc.id, chunk) for chunk in chunks]
+            term_counts = lexical_index.index_document(db, doc.id, zip(chunk_ids, chunks))
+            now = datetime.utcnow()
+            db.execute(insert(KnowledgeEmbedding), [
+                {
+                    "document_id": doc.id,
+                    "chunk_index": idx,
+                    "chunk_text": chunk,
+                    "embedding_model": embed_service.model_key,
+                    "vector_id": chunk_id,
+                    "term_count": term_counts[chunk_id],
+                    "last_indexed": now
+                }
+                for idx, (chunk_id, chunk) in enumerate(zip(chunk_ids, chunks))
+            ])
+            
+            client = chatbot_service._get_async_qdrant_client()
+            batch_size = chatbot_service.upsert_batch_size
+            for batch_start in range(0, len(chunks), batch_size):
+                await client.upsert(
+                    collection_name=chatbot_service.collection_name,
+                    points=[
+                        PointStruct(
+                            id=chunk_ids[idx],
+                            vector=vectors[idx],
+                            payload=chatbot_service._chunk_payload(doc, idx, chunks[idx])
+                        )
+                        for idx in range(batch_start, min(batch_start + batch_size, len(chunks)))
+                    ]
+                )
+            
+            # Same hash sync_documents computes, so the next sync skips it
+            doc.content_hash = chatbot_service._document_hash(doc)
+            db.commit()
+        except Exception:
+            db.rollback()
+            if document_id is not None:
+                try:
+                    await chatbot_service.delete_document_vectors(document_id)
+                except Exception as e:
+                    logger.warning(f"Cleanup of vectors for document {document_id} failed: {e}")
+            raise
+        
+        return document_id
+    
+    async def run_job(self, db: Session, job_id: str) -> Dict[str, Any]:
+        """
+        Ingest all queued files of a job.
+        
+        Files are processed one after another (each file's pages are
+        extracted in parallel); a failing file is recorded and skipped.
+        """
+        from kumele_ai.services.chatbot_service import chatbot_service
+        
+        job = self.get_job(job_id)
+        if job is None:
+            return {"success": False, "error": f"Ingest job {job_id} not found"}
+        
+        files = job.pop("files")
+        self._update_job(job_id, job, status="running", started_at=datetime.utcnow().isoformat())
+        
+        document_ids: List[int] = []
+        try:
+            await chatbot_service._ensure_collection()
+            
+            with self._pdf_pool() as pool:
+                for entry in files:
+                    if entry["status"] != "queued":
+                        continue
+                    try:
+                        document_id = await self._ingest_file(db, pool, job, entry)
+                        document_ids.append(document_id)
+                        self._update_file(job_id, entry, status="done", document_id=document_id)
+                        self._update_job(job_id, job, files_done=job["files_done"] + 1)
+                    except Exception as e:
+                        logger.error(f"Ingest of {entry['filename']} (job {job_id}) failed: {e}")
+                        self._update_file(job_id, entry, status="failed", error=str(e))
+                        self._update_job(job_id, job, files_failed=job["files_failed"] + 1)
+            
+            # Cached answers predate the new documents
+            if document_ids:
+                await answer_cache_service.invalidate()
+            
+            self._update_job(job_id, job, status="completed", finished_at=datetime.utcnow().isoformat())
+        except Exception as e:
+            logger.error(f"Knowledge ingest job {job_id} error: {e}")
+            self._update_job(
+                job_id, job, status="failed", error=str(e), finished_at=datetime.utcnow().isoformat()
+            )
+            return {"success": False, "job_id": job_id, "error": str(e)}
+        finally:
+            shutil.rmtree(os.path.join(self.spool_dir, job_id), ignore_errors=True)
+        
+        return {
+            "success": True,
+            "job_id": job_id,
+            "documents": document_ids,
+            "files_done": job["files_done"],
+            "files_failed": job["files_failed"]
+        }
+
+
+# Singleton instance
+knowledge_ingest_service = KnowledgeIngestService()
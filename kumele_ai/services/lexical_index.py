@@ -0,0 +1,166 @@
+"""
+Lexical Index - BM25 inverted index over knowledge chunks
+
+Dense retrieval misses exact-term queries (coupon codes, feature names,
+policy numbers). Postings live in Postgres next to the chunks:
+- knowledge_terms: (document_id, vector_id, term, tf) per chunk term
+- knowledge_embeddings.term_count: chunk length for BM25 normalization
+A document's postings are replaced whenever sync_documents (or bulk
+ingestion) re-indexes it, in the same transaction as its chunk rows.
+
+Terms are lowercased alphanumeric tokens without stopwords. Compound
+tokens such as "SUMMER-25" or "POL/2024.01" are indexed whole, joined
+("summer25") and as their parts, so codes match however they are typed.
+"""
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, Any, Iterable, List, Tuple
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from kumele_ai.config import settings
+from kumele_ai.db.models import KnowledgeDocument, KnowledgeEmbedding, KnowledgeTerm
+
+logger = logging.getLogger(__name__)
+
+# Bump when tokenization changes; part of the document hash so documents are re-indexed
+TOKENIZER_VERSION = 1
+MAX_TERM_LENGTH = 64
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+_SEPARATOR = re.compile(r"[-_./]")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in is it its
+me my no not of on or our so that the their them then there these they this to
+us was we what when where which who why will with you your
+""".split())
+
+
+class LexicalIndex:
+    """BM25 search over knowledge_terms postings"""
+    
+    def __init__(self):
+        self.k1 = settings.KB_BM25_K1
+        self.b = settings.KB_BM25_B
+    
+    def get_config(self) -> str:
+        """Index parameters, for detecting when documents need re-indexing"""
+        return f"bm25_tokenizer={TOKENIZER_VERSION}"
+    
+    def tokenize(self, text: str) -> List[str]:
+        """Index terms of a text, in order"""
+        terms = []
+        for token in _TOKEN.findall(text.lower()):
+            if token in STOPWORDS:
+                continue
+            terms.append(token[:MAX_TERM_LENGTH])
+            
+            parts = _SEPARATOR.split(token)
+            if len(parts) > 1:
+                terms.append("".join(parts)[:MAX_TERM_LENGTH])
+                terms.extend(part for part in parts if part not in STOPWORDS)
+        return terms
+    
+    def index_document(
+        self,
+        db: Session,
+        document_id: int,
+        chunks: Iterable[Tuple[str, str]]
+    ) -> Dict[str, int]:
+        """
+        Replace a document's postings (not committed).
+        
+        Args:
+            chunks: (vector_id, chunk text) pairs
+        
+        Returns the BM25 length (term count) of each chunk, by vector id.
+        """
+        db.query(KnowledgeTerm).filter(
+            KnowledgeTerm.document_id == document_id
+        ).delete(synchronize_session=False)
+        
+        rows = []
+        lengths: Dict[str, int] = {}
+        for vector_id, text in chunks:
+            terms = self.tokenize(text)
+            lengths[vector_id] = len(terms)
+            rows.extend(
+                {"document_id": document_id, "vector_id": vector_id, "term": term, "tf": tf}
+                for term, tf in Counter(terms).items()
+            )
+        
+        if rows:
+            db.execute(insert(KnowledgeTerm), rows)
+        return lengths
+    
+    def search(self, db: Session, query: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Top chunks for a query by BM25 score.
+        
+        Returns dicts with vector_id, document_id, title, category, text
+        and bm25_score, best first.
+        """
+        terms = set(self.tokenize(query))
+        if not terms:
+            return []
+        
+        total_chunks, avg_length = db.query(
+            func.count(KnowledgeEmbedding.id),
+            func.avg(KnowledgeEmbedding.term_count)
+        ).filter(KnowledgeEmbedding.term_count.isnot(None)).one()
+        if not total_chunks:
+            return []
+        avg_length = float(avg_length) or 1.0
+        
+        postings = db.query(
+            KnowledgeTerm.term,
+            KnowledgeTerm.vector_id,
+            KnowledgeTerm.tf,
+            KnowledgeEmbedding.term_count
+        ).join(
+            KnowledgeEmbedding, KnowledgeEmbedding.vector_id == KnowledgeTerm.vector_id
+        ).filter(KnowledgeTerm.term.in_(terms)).all()
+        
+        doc_freq = Counter(term for term, _, _, _ in postings)
+        scores: Dict[str, float] = {}
+        for term, vector_id, tf, length in postings:
+            df = doc_freq[term]
+            idf = math.log(1 + (total_chunks - df + 0.5) / (df + 0.5))
+            norm = tf + self.k1 * (1 - self.b + self.b * (length or 0) / avg_length)
+            scores[vector_id] = scores.get(vector_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        if not top:
+            return []
+        
+        rows = {
+            row.vector_id: row
+            for row in db.query(
+                KnowledgeEmbedding.vector_id,
+                KnowledgeEmbedding.document_id,
+                KnowledgeEmbedding.chunk_text,
+                KnowledgeDocument.title,
+                KnowledgeDocument.category
+            ).join(
+                KnowledgeDocument, KnowledgeDocument.id == KnowledgeEmbedding.document_id
+            ).filter(KnowledgeEmbedding.vector_id.in_([vector_id for vector_id, _ in top])).all()
+        }
+        
+        return [
+            {
+                "vector_id": vector_id,
+                "document_id": rows[vector_id].document_id,
+                "title": rows[vector_id].title,
+                "category": rows[vector_id].category,
+                "text": rows[vector_id].chunk_text or "",
+                "bm25_score": score
+            }
+            for vector_id, score in top
+            if vector_id in rows
+        ]
+
+
+# Singleton instance
+lexical_index = LexicalIndex()
@@ -13,9 +13,11 @@ Configuration via environment variables:
 - OPENROUTER_MODEL: Model to use on OpenRouter
 """
 import httpx
+import json
 import logging
-from typing import Optional, List, Dict, Any
+from typing import AsyncIterator, Optional, List, Dict, Any, Tuple
 from kumele_ai.config import settings
+from kumele_ai.services.http_clients import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +51,64 @@ class LLMService:
         
         logger.info(f"LLM Service initialized with provider: {self.provider}")
     
+    def _format_local_prompt(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """Format prompt for Mistral instruction format"""
+        if system_prompt:
+            return f"<s>[INST] {system_prompt}\n\n{prompt} [/INST]"
+        return f"<s>[INST] {prompt} [/INST]"
+    
+    def _build_local_payload(
+        self,
+        prompt: str,
+        max_new_tokens: int,
+        temperature: float,
+        top_p: float,
+        system_prompt: Optional[str]
+    ) -> Dict[str, Any]:
+        """TGI request body"""
+        return {
+            "inputs": self._format_local_prompt(prompt, system_prompt),
+            "parameters": {
+                "max_new_tokens": max_new_tokens,
+                "temperature": temperature,
+                "top_p": top_p,
+                "do_sample": True,
+                "return_full_text": False
+            }
+        }
+    
+    def _build_openrouter_request(
+        self,
+        prompt: str,
+        max_new_tokens: int,
+        temperature: float,
+        top_p: float,
+        system_prompt: Optional[str]
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """OpenRouter chat completion body and headers"""
+        # Build messages for chat completion format
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        payload = {
+            "model": self.openrouter_model,
+            "messages": messages,
+            "max_tokens": max_new_tokens,
+            "temperature": temperature,
+            "top_p": top_p
+        }
+        
+        headers = {
+            "Authorization": f"Bearer {self.openrouter_key}",
+            "HTTP-Referer": self.openrouter_site_url,
+            "X-Title": self.openrouter_site_name,
+            "Content-Type": "application/json"
+        }
+        
+        return payload, headers
+    
     async def _generate_local(
         self,
         prompt: str,
@@ -59,38 +119,25 @@ class LLMService:
     ) -> Dict[str, Any]:
         """Generate text using local TGI/Mistral"""
         try:
-            # Format prompt for Mistral instruction format
-            if system_prompt:
-                formatted_prompt = f"<s>[INST] {system_prompt}\n\n{prompt} [/INST]"
-            else:
-                formatted_prompt = f"<s>[INST] {prompt} [/INST]"
+            payload = self._build_local_payload(
+                prompt, max_new_tokens, temperature, top_p, system_prompt
+            )
             
-            payload = {
-                "inputs": formatted_prompt,
-                "parameters": {
-                    "max_new_tokens": max_new_tokens,
-                    "temperature": temperature,
-                    "top_p": top_p,
-                    "do_sample": True,
-                    "return_full_text": False
-                }
-            }
+            client = http_clients.get_async_client("llm_local", self.timeout)
+            response = await client.post(
+                f"{self.local_url}/generate",
+                json=payload
+            )
+            response.raise_for_status()
+            result = response.json()
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.local_url}/generate",
-                    json=payload
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                self._local_available = True
-                return {
-                    "success": True,
-                    "generated_text": result.get("generated_text", ""),
-                    "model": self.local_model,
-                    "provider": "local"
-                }
+            self._local_available = True
+            return {
+                "success": True,
+                "generated_text": result.get("generated_text", ""),
+                "model": self.local_model,
+                "provider": "local"
+            }
                 
         except httpx.TimeoutException:
             logger.error("Local LLM request timed out")
@@ -129,48 +176,31 @@ class LLMService:
             }
         
         try:
-            # Build messages for chat completion format
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
+            payload, headers = self._build_openrouter_request(
+                prompt, max_new_tokens, temperature, top_p, system_prompt
+            )
             
-            payload = {
-                "model": self.openrouter_model,
-                "messages": messages,
-                "max_tokens": max_new_tokens,
-                "temperature": temperature,
-                "top_p": top_p
-            }
+            client = http_clients.get_async_client("openrouter", self.timeout)
+            response = await client.post(
+                f"{self.openrouter_url}/chat/completions",
+                json=payload,
+                headers=headers
+            )
+            response.raise_for_status()
+            result = response.json()
             
-            headers = {
-                "Authorization": f"Bearer {self.openrouter_key}",
-                "HTTP-Referer": self.openrouter_site_url,
-                "X-Title": self.openrouter_site_name,
-                "Content-Type": "application/json"
-            }
+            # Extract text from OpenAI-compatible response
+            generated_text = ""
+            if "choices" in result and len(result["choices"]) > 0:
+                generated_text = result["choices"][0].get("message", {}).get("content", "")
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.openrouter_url}/chat/completions",
-                    json=payload,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                # Extract text from OpenAI-compatible response
-                generated_text = ""
-                if "choices" in result and len(result["choices"]) > 0:
-                    generated_text = result["choices"][0].get("message", {}).get("content", "")
-                
-                return {
-                    "success": True,
-                    "generated_text": generated_text,
-                    "model": self.openrouter_model,
-                    "provider": "openrouter",
-                    "usage": result.get("usage", {})
-                }
+            return {
+                "success": True,
+                "generated_text": generated_text,
+                "model": self.openrouter_model,
+                "provider": "openrouter",
+                "usage": result.get("usage", {})
+            }
                 
         except httpx.TimeoutException:
             logger.error("OpenRouter request timed out")
@@ -261,13 +291,124 @@ class LLMService:
                 "provider": self.provider
             }
     
-    async def generate_chat_response(
+    # =========================================================================
+    # STREAMING
+    # =========================================================================
+    
+    async def _iter_sse_data(self, response: httpx.Response) -> AsyncIterator[str]:
+        """Yield the data field of each server-sent event"""
+        async for line in response.aiter_lines():
+            # Blank lines separate events; ":" lines are keep-alive comments
+            if line.startswith("data:"):
+                yield line[5:].strip()
+    
+    async def _stream_local(
         self,
-        query: str,
-        context: List[str],
-        language: str = "en"
-    ) -> Dict[str, Any]:
-        """Generate a chatbot response with RAG context"""
+        prompt: str,
+        max_new_tokens: int,
+        temperature: float,
+        top_p: float,
+        system_prompt: Optional[str]
+    ) -> AsyncIterator[str]:
+        """Stream tokens from TGI /generate_stream"""
+        payload = self._build_local_payload(
+            prompt, max_new_tokens, temperature, top_p, system_prompt
+        )
+        
+        client = http_clients.get_async_client("llm_local", self.timeout)
+        async with client.stream(
+            "POST",
+            f"{self.local_url}/generate_stream",
+            json=payload
+        ) as response:
+            response.raise_for_status()
+            self._local_available = True
+            
+            async for data in self._iter_sse_data(response):
+                event = json.loads(data)
+                if event.get("error"):
+                    raise RuntimeError(f"TGI stream error: {event['error']}")
+                token = event.get("token") or {}
+                if token.get("text") and not token.get("special"):
+                    yield token["text"]
+    
+    async def _stream_openrouter(
+        self,
+        prompt: str,
+        max_new_tokens: int,
+        temperature: float,
+        top_p: float,
+        system_prompt: Optional[str]
+    ) -> AsyncIterator[str]:
+        """Stream tokens from OpenRouter chat completions with stream: true"""
+        if not self.openrouter_key:
+            raise RuntimeError("OpenRouter API key not configured")
+        
+        payload, headers = self._build_openrouter_request(
+            prompt, max_new_tokens, temperature, top_p, system_prompt
+        )
+        payload["stream"] = True
+        
+        client = http_clients.get_async_client("openrouter", self.timeout)
+        async with client.stream(
+            "POST",
+            f"{self.openrouter_url}/chat/completions",
+            json=payload,
+            headers=headers
+        ) as response:
+            response.raise_for_status()
+            
+            async for data in self._iter_sse_data(response):
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                if event.get("error"):
+                    raise RuntimeError(f"OpenRouter stream error: {event['error']}")
+                for choice in event.get("choices", []):
+                    text = (choice.get("delta") or {}).get("content")
+                    if text:
+                        yield text
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        max_new_tokens: int = 512,
+        temperature: float = 0.7,
+        top_p: float = 0.95,
+        system_prompt: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream generated text from the configured LLM provider.
+        
+        Yields {"text": str, "provider": str, "model": str} per token chunk.
+        In "auto" mode, falls back to OpenRouter if local TGI fails before
+        producing its first token. Errors after the first token are raised.
+        """
+        if self.provider not in ("local", "openrouter", "auto"):
+            raise ValueError(f"Unknown LLM provider: {self.provider}")
+        
+        args = (prompt, max_new_tokens, temperature, top_p, system_prompt)
+        
+        # In auto mode, try local unless it is already known to be unavailable
+        if self.provider == "local" or (self.provider == "auto" and self._local_available is not False):
+            started = False
+            try:
+                async for text in self._stream_local(*args):
+                    started = True
+                    yield {"text": text, "provider": "local", "model": self.local_model}
+                return
+            except Exception as e:
+                self._local_available = False
+                if started or self.provider == "local":
+                    raise
+                logger.warning(f"Local LLM stream failed, falling back to OpenRouter: {e}")
+        
+        # Fallback to OpenRouter
+        async for text in self._stream_openrouter(*args):
+            yield {"text": text, "provider": "openrouter", "model": self.openrouter_model}
+    
+    def _build_chat_prompt(self, query: str, context: List[str]) -> Tuple[str, str]:
+        """System prompt and user prompt for a RAG chatbot answer"""
         system_prompt = """You are a helpful assistant for Kumele, a social platform for hobby enthusiasts.
 Answer questions based on the provided context. Be concise and helpful.
 If you don't know the answer based on the context, say so honestly."""
@@ -281,10 +422,40 @@ User question: {query}
 
 Please provide a helpful answer based on the context above."""
         
+        return system_prompt, prompt
+    
+    async def generate_chat_response_stream(
+        self,
+        query: str,
+        context: List[str],
+        language: str = "en",
+        max_new_tokens: int = 512
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a chatbot response with RAG context"""
+        system_prompt, prompt = self._build_chat_prompt(query, context)
+        
+        async for chunk in self.generate_stream(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            max_new_tokens=max_new_tokens,
+            temperature=0.7
+        ):
+            yield chunk
+    
+    async def generate_chat_response(
+        self,
+        query: str,
+        context: List[str],
+        language: str = "en",
+        max_new_tokens: int = 512
+    ) -> Dict[str, Any]:
+        """Generate a chatbot response with RAG context"""
+        system_prompt, prompt = self._build_chat_prompt(query, context)
+        
         return await self.generate(
             prompt=prompt,
             system_prompt=system_prompt,
-            max_new_tokens=512,
+            max_new_tokens=max_new_tokens,
             temperature=0.7
         )
     
@@ -327,9 +498,9 @@ Please write a professional support response:"""
         # Check local TGI
         if self.local_url:
             try:
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.get(f"{self.local_url}/health")
-                    health["local"]["healthy"] = response.status_code == 200
+                client = http_clients.get_async_client("llm_local", self.timeout)
+                response = await client.get(f"{self.local_url}/health", timeout=10.0)
+                health["local"]["healthy"] = response.status_code == 200
             except Exception as e:
                 logger.debug(f"Local LLM health check failed: {e}")
         
@@ -9,16 +9,22 @@ Enhanced with:
 """
 import logging
 import math
+import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
+from kumele_ai.config import settings
 from kumele_ai.db.models import (
     User, Event, Hobby, UserHobby, UserEvent, BlogInteraction,
     UserMLFeatures, NFTBadge, CheckIn, HostRating, EventMLFeatures
 )
 from kumele_ai.services.embed_service import embed_service
+from kumele_ai.services.event_embedding_service import event_embedding_service
+from kumele_ai.services.event_search_service import event_search_service
 from kumele_ai.services.geocode_service import geocode_service
+from kumele_ai.services.geo_index_service import geo_index_service
+from kumele_ai.services.hobby_embedding_service import hobby_embedding_service
 
 logger = logging.getLogger(__name__)
 
@@ -112,7 +118,7 @@ class MatchingService:
         event_embedding: List[float]
     ) -> float:
         """Calculate hobby similarity between user and event"""
-        if not user_hobby_embeddings or not event_embedding:
+        if not user_hobby_embeddings or event_embedding is None or len(event_embedding) == 0:
             return 0.0
         
         # Find max similarity across user's hobbies
@@ -130,8 +136,6 @@ class MatchingService:
         event: Event
     ) -> float:
         """Calculate engagement weight based on past interactions"""
-        weight = 1.0
-        
         # Check if user has attended similar events
         similar_events = db.query(UserEvent).join(Event).filter(
             and_(
@@ -141,14 +145,24 @@ class MatchingService:
             )
         ).count()
         
-        if similar_events > 0:
-            weight += min(similar_events * 0.1, 0.3)  # Max 30% boost
-        
         # Check if user has interacted with related blogs
         blog_interactions = db.query(BlogInteraction).filter(
             BlogInteraction.user_id == user_id
         ).count()
         
+        return self.engagement_weight_from_counts(similar_events, blog_interactions)
+    
+    def engagement_weight_from_counts(
+        self,
+        similar_events: int,
+        blog_interactions: int
+    ) -> float:
+        """Engagement weight from attended-similar-event and blog interaction counts"""
+        weight = 1.0
+        
+        if similar_events > 0:
+            weight += min(similar_events * 0.1, 0.3)  # Max 30% boost
+        
         if blog_interactions > 0:
             weight += min(blog_interactions * 0.02, 0.1)  # Max 10% boost
         
@@ -311,51 +325,284 @@ class MatchingService:
         
         # Get host ratings
         host_ratings = db.query(
-            func.avg(HostRating.overall_rating),
+            func.avg(HostRating.overall_score),
             func.count(HostRating.id)
         ).filter(
             HostRating.host_id == event.host_id
         ).first()
         
-        avg_rating = host_ratings[0] or 3.0
-        total_ratings = host_ratings[1] or 0
+        return self.host_reputation_from_stats(
+            host_ratings[0],
+            host_ratings[1],
+            host_ml.reward_tier if host_ml else None
+        )
+    
+    def host_reputation_from_stats(
+        self,
+        avg_rating: Optional[float],
+        total_ratings: Optional[int],
+        reward_tier: Optional[str]
+    ) -> float:
+        """Host reputation score from aggregated ratings and reward tier"""
+        avg_rating = avg_rating or 3.0
+        total_ratings = total_ratings or 0
         
         # Base score from rating (1-5 scale normalized)
         rating_score = (avg_rating - 1) / 4
         
         # Tier bonus
-        tier_bonus = 0.0
-        if host_ml:
-            tier_bonuses = {"Bronze": 0.05, "Silver": 0.10, "Gold": 0.15}
-            tier_bonus = tier_bonuses.get(host_ml.reward_tier, 0.0)
+        tier_bonuses = {"Bronze": 0.05, "Silver": 0.10, "Gold": 0.15}
+        tier_bonus = tier_bonuses.get(reward_tier, 0.0)
         
         # Experience bonus (more events = more trustworthy)
         experience_bonus = min(total_ratings / 100, 0.1)
         
         return min(rating_score + tier_bonus + experience_bonus, 1.0)
     
+    # ============================================================
+    # BULK FEATURE PREFETCH
+    # ============================================================
+    
+    def prefetch_event_features(
+        self,
+        db: Session,
+        user_id: int,
+        events: List[Event]
+    ) -> Dict[str, Any]:
+        """
+        Load per-event scoring inputs for all candidates at once.
+        
+        Replaces the per-event engagement and host reputation queries
+        with a constant number of grouped queries, independent of the
+        number of candidate events:
+        1. Verified check-in counts per hobby for the user
+        2. Blog interaction count for the user
+        3. AVG/COUNT of HostRating per candidate host
+        4. Reward tier per candidate host
+        
+        Returns:
+            Dict of lookups: checkins_by_hobby, blog_interactions,
+            host_ratings (host_id -> (avg, count)), host_tiers
+        """
+        checkins_by_hobby = dict(
+            db.query(
+                Event.hobby_id,
+                func.count(UserEvent.id)
+            ).join(Event, UserEvent.event_id == Event.id).filter(
+                and_(
+                    UserEvent.user_id == user_id,
+                    UserEvent.checked_in == True
+                )
+            ).group_by(Event.hobby_id).all()
+        )
+        
+        blog_interactions = db.query(func.count(BlogInteraction.id)).filter(
+            BlogInteraction.user_id == user_id
+        ).scalar() or 0
+        
+        host_ids = list({e.host_id for e in events if e.host_id})
+        host_ratings: Dict[int, Tuple[Optional[float], int]] = {}
+        host_tiers: Dict[int, Optional[str]] = {}
+        
+        if host_ids:
+            rating_rows = db.query(
+                HostRating.host_id,
+                func.avg(HostRating.overall_score),
+                func.count(HostRating.id)
+            ).filter(
+                HostRating.host_id.in_(host_ids)
+            ).group_by(HostRating.host_id).all()
+            host_ratings = {
+                host_id: (avg_rating, count)
+                for host_id, avg_rating, count in rating_rows
+            }
+            
+            host_tiers = dict(
+                db.query(
+                    UserMLFeatures.user_id,
+                    UserMLFeatures.reward_tier
+                ).filter(
+                    UserMLFeatures.user_id.in_(host_ids)
+                ).all()
+            )
+        
+        return {
+            "checkins_by_hobby": checkins_by_hobby,
+            "blog_interactions": blog_interactions,
+            "host_ratings": host_ratings,
+            "host_tiers": host_tiers,
+        }
+    
+    # ============================================================
+    # VECTORIZED SCORING ENGINE
+    # ============================================================
+    
+    def compute_hobby_similarity_matrix(
+        self,
+        event_matrix: np.ndarray,
+        user_matrix: np.ndarray
+    ) -> np.ndarray:
+        """
+        Max cosine similarity of each event against the user's hobbies.
+        
+        Args:
+            event_matrix: (events x dim) event embeddings
+            user_matrix: (hobbies x dim) user hobby embeddings
+        
+        Returns:
+            (events,) array, same values as calculate_hobby_similarity
+        """
+        n_events = event_matrix.shape[0]
+        if n_events == 0 or user_matrix.size == 0:
+            return np.zeros(n_events)
+        
+        dots = event_matrix @ user_matrix.T
+        norms = np.outer(
+            np.linalg.norm(event_matrix, axis=1),
+            np.linalg.norm(user_matrix, axis=1)
+        )
+        
+        # Zero-norm vectors score 0, matching compute_similarity
+        with np.errstate(divide="ignore", invalid="ignore"):
+            similarities = np.where(norms > 0, dots / norms, 0.0)
+        
+        # calculate_hobby_similarity starts from 0.0, so negatives clamp to 0
+        return np.maximum(similarities.max(axis=1), 0.0)
+    
+    def haversine_distances(
+        self,
+        lat: float,
+        lon: float,
+        lats: np.ndarray,
+        lons: np.ndarray
+    ) -> np.ndarray:
+        """Vectorized haversine distance from one point to many, in km"""
+        R = 6371  # Earth's radius in km
+        
+        lat1_rad = np.radians(lat)
+        lat2_rad = np.radians(lats)
+        delta_lat = np.radians(lats - lat)
+        delta_lon = np.radians(lons - lon)
+        
+        a = (np.sin(delta_lat / 2) ** 2 +
+             np.cos(lat1_rad) * np.cos(lat2_rad) *
+             np.sin(delta_lon / 2) ** 2)
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        
+        return R * c
+    
+    def calculate_distance_scores(self, distances_km: np.ndarray) -> np.ndarray:
+        """Vectorized calculate_distance_score"""
+        scores = 1.0 - (distances_km / self.max_distance_km)
+        scores = np.where(distances_km >= self.max_distance_km, 0.0, scores)
+        return np.where(distances_km <= 0, 1.0, scores)
+    
+    def score_events_batch(
+        self,
+        event_matrix: np.ndarray,
+        user_matrix: np.ndarray,
+        lats: np.ndarray,
+        lons: np.ndarray,
+        search_lat: Optional[float],
+        search_lon: Optional[float],
+        engagement_scores: np.ndarray,
+        host_reputation_scores: np.ndarray,
+        verified_attendance_score: float,
+        nft_badge_score: float,
+        payment_urgency_score: float,
+        nft_badge_type: Optional[str] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Score all candidate events in a few NumPy operations.
+        
+        Events without coordinates must have NaN in lats/lons; they get
+        the default distance score of 0.5 and no distance_km.
+        
+        Returns:
+            Dict of per-event arrays: match_score, distance_score,
+            distance_km (NaN if unknown) and hobby_similarity
+        """
+        n_events = event_matrix.shape[0]
+        
+        hobby_similarity = self.compute_hobby_similarity_matrix(event_matrix, user_matrix)
+        
+        distance_km = np.full(n_events, np.nan)
+        distance_score = np.full(n_events, 0.5)  # Default if no location
+        
+        if search_lat is not None and search_lon is not None:
+            has_location = ~(np.isnan(lats) | np.isnan(lons))
+            if has_location.any():
+                distance_km[has_location] = self.haversine_distances(
+                    search_lat, search_lon,
+                    lats[has_location], lons[has_location]
+                )
+                distance_score[has_location] = self.calculate_distance_scores(
+                    distance_km[has_location]
+                )
+        
+        # Same term order as the scalar weighted sum
+        match_score = (
+            distance_score * MATCHING_WEIGHTS["distance"] +
+            hobby_similarity * MATCHING_WEIGHTS["hobby_similarity"] +
+            engagement_scores * MATCHING_WEIGHTS["engagement"] +
+            verified_attendance_score * MATCHING_WEIGHTS["verified_attendance"] +
+            nft_badge_score * MATCHING_WEIGHTS["nft_badge"] +
+            payment_urgency_score * MATCHING_WEIGHTS["payment_urgency"] +
+            host_reputation_scores * MATCHING_WEIGHTS["host_reputation"]
+        )
+        
+        # Apply NFT badge multiplier to final score
+        if nft_badge_type:
+            match_score = match_score * NFT_BADGE_MULTIPLIERS.get(nft_badge_type, 1.0)
+        
+        return {
+            "match_score": match_score,
+            "distance_score": distance_score,
+            "distance_km": distance_km,
+            "hobby_similarity": hobby_similarity,
+        }
+    
+    def select_top_k(self, scores: np.ndarray, k: int) -> List[int]:
+        """
+        Indices of the k best scores, highest first.
+        
+        Ranks on the 4-decimal rounded score with ties kept in input
+        order, like the stable sort over rounded match_score it replaces.
+        """
+        n = scores.shape[0]
+        if n == 0 or k <= 0:
+            return []
+        
+        rounded = np.round(scores, 4)
+        if k < n:
+            # Keep everything tied with the k-th best so ties resolve by index
+            kth_value = rounded[np.argpartition(-rounded, k - 1)[k - 1]]
+            candidates = np.flatnonzero(rounded >= kth_value)
+        else:
+            candidates = np.arange(n)
+        
+        order = np.lexsort((candidates, -rounded[candidates]))
+        return candidates[order][:k].tolist()
+    
     def get_user_hobby_embeddings(
         self,
         db: Session,
         user_id: int
     ) -> List[List[float]]:
-        """Get embeddings for user's hobbies"""
-        user_hobbies = db.query(UserHobby).join(Hobby).filter(
-            UserHobby.user_id == user_id
-        ).all()
-        
-        embeddings = []
-        for uh in user_hobbies:
-            try:
-                emb = embed_service.embed_hobby(
-                    uh.hobby.name,
-                    uh.hobby.description
-                )
-                embeddings.append(emb)
-            except Exception as e:
-                logger.error(f"Error embedding hobby: {e}")
+        """Get embeddings for user's hobbies from the cached hobby matrix"""
+        hobby_ids = [
+            row[0] for row in db.query(UserHobby.hobby_id).filter(
+                UserHobby.user_id == user_id
+            ).all()
+        ]
+        if not hobby_ids:
+            return []
         
-        return embeddings
+        try:
+            return hobby_embedding_service.get_embeddings(db, hobby_ids).tolist()
+        except Exception as e:
+            logger.error(f"Error embedding hobbies: {e}")
+            return []
     
     def get_event_embedding(self, event: Event) -> List[float]:
         """Get embedding for an event"""
@@ -388,6 +635,11 @@ class MatchingService:
         
         If location_filter is provided as a string, it will be geocoded using
         Nominatim to get lat/lon coordinates for distance calculations.
+        
+        Candidates are retrieved in two stages: an ANN search over the
+        Qdrant events collection (top MATCHING_ANN_TOP_K by hobby
+        similarity within the search radius), then a full rerank with
+        the factors above. Without Qdrant, the geo index is used instead.
         """
         # Get user
         user = db.query(User).filter(User.id == user_id).first()
@@ -433,98 +685,171 @@ class MatchingService:
             query = query.join(Hobby).filter(Hobby.name.ilike(f"%{hobby_filter}%"))
         
         # Note: We don't filter by city name when location is geocoded
-        # Instead we compute distances and let the scoring handle it
+        # Instead we restrict candidates to the search radius
+        candidate_ids: Optional[List[int]] = None
+        has_search_point = search_lat is not None and search_lon is not None
+        
+        # Stage 1: ANN retrieval by hobby similarity with status/hobby/geo filters
+        # (only from a collection that covers every upcoming event)
+        if (
+            settings.MATCHING_ANN_ENABLED
+            and user_hobby_embeddings
+            and event_search_service.is_synced(db)
+        ):
+            hobby_ids = None
+            if hobby_filter:
+                hobby_ids = [
+                    h[0] for h in db.query(Hobby.id).filter(
+                        Hobby.name.ilike(f"%{hobby_filter}%")
+                    ).all()
+                ]
+                if not hobby_ids:
+                    return []
+            
+            candidate_ids = event_search_service.search_candidates(
+                user_hobby_embeddings,
+                limit=max(settings.MATCHING_ANN_TOP_K, limit),
+                search_lat=search_lat,
+                search_lon=search_lon,
+                radius_km=self.max_distance_km if has_search_point else None,
+                hobby_ids=hobby_ids
+            )
+        
+        # Fallback: geo index radius query
+        if candidate_ids is None and has_search_point:
+            candidate_ids = geo_index_service.query_radius(
+                db, search_lat, search_lon, self.max_distance_km
+            )
+        
+        if candidate_ids is not None:
+            if not candidate_ids:
+                return []
+            query = query.filter(Event.id.in_(candidate_ids))
         
         events = query.all()
         
-        # Score each event
-        scored_events = []
-        for event in events:
-            try:
-                # Calculate distance score
-                distance_score = 0.5  # Default if no location
-                distance_km = None
-                
-                if search_lat is not None and search_lon is not None and event.latitude and event.longitude:
-                    distance_km = self.haversine_distance(
-                        search_lat, search_lon,
-                        event.latitude, event.longitude
-                    )
-                    distance_score = self.calculate_distance_score(distance_km)
-                
-                # Calculate hobby similarity
-                event_embedding = self.get_event_embedding(event)
-                hobby_similarity = self.calculate_hobby_similarity(
-                    user_hobby_embeddings,
-                    event_embedding
-                )
-                
-                # Calculate engagement weight
-                engagement_weight = self.calculate_engagement_weight(db, user_id, event)
-                engagement_score = (engagement_weight - 1.0) / 0.5  # Normalize to 0-1
-                
-                # Calculate host reputation score
-                host_reputation_score = self.calculate_host_reputation_score(db, event)
-                
-                # Combined match score (weighted sum)
-                match_score = (
-                    distance_score * MATCHING_WEIGHTS["distance"] +
-                    hobby_similarity * MATCHING_WEIGHTS["hobby_similarity"] +
-                    engagement_score * MATCHING_WEIGHTS["engagement"] +
-                    verified_attendance_score * MATCHING_WEIGHTS["verified_attendance"] +
-                    nft_badge_score * MATCHING_WEIGHTS["nft_badge"] +
-                    payment_urgency_score * MATCHING_WEIGHTS["payment_urgency"] +
-                    host_reputation_score * MATCHING_WEIGHTS["host_reputation"]
+        # Load precomputed event embeddings (only stale/missing ones are encoded)
+        event_embeddings = event_embedding_service.get_event_embeddings(db, events)
+        
+        if not events:
+            return []
+        
+        # Build (events x dim) and (hobbies x dim) matrices
+        user_matrix = np.asarray(user_hobby_embeddings, dtype=np.float64)
+        dim = user_matrix.shape[1] if user_matrix.ndim == 2 and user_matrix.size else 0
+        if not dim and event_embeddings:
+            dim = len(next(iter(event_embeddings.values())))
+        
+        if user_matrix.size:
+            # Events whose embedding could not be loaded or encoded are left out:
+            # a zero vector would score them as unrelated to every hobby
+            unembedded = {
+                event.id for event in events
+                if event.id not in event_embeddings or len(event_embeddings[event.id]) != dim
+            }
+            if unembedded:
+                logger.warning(
+                    f"Skipping {len(unembedded)} events without an embedding: {sorted(unembedded)[:20]}"
                 )
-                
-                # Apply NFT badge multiplier to final score
-                if nft_badge_type:
-                    match_score *= NFT_BADGE_MULTIPLIERS.get(nft_badge_type, 1.0)
-                
-                event_data = {
-                    "event_id": event.id,
-                    "title": event.title,
-                    "description": event.description,
-                    "event_date": event.event_date.isoformat() if event.event_date else None,
-                    "location": event.location,
-                    "city": event.city,
-                    "is_paid": event.is_paid,
-                    "price": float(event.price) if event.price else 0,
-                    "match_score": round(match_score, 4),
-                    # Detailed scoring breakdown
-                    "score_breakdown": {
-                        "distance_score": round(distance_score, 4),
-                        "hobby_similarity": round(hobby_similarity, 4),
-                        "engagement_score": round(engagement_score, 4),
-                        "verified_attendance_score": round(verified_attendance_score, 4),
-                        "nft_badge_score": round(nft_badge_score, 4),
-                        "payment_urgency_score": round(payment_urgency_score, 4),
-                        "host_reputation_score": round(host_reputation_score, 4),
-                    },
-                    # User trust signals
-                    "user_trust": {
-                        "nft_badge_type": nft_badge_type,
-                        "verified_attendance_rate": round(verified_attendance_score, 4),
-                    }
+                events = [event for event in events if event.id not in unembedded]
+                if not events:
+                    return []
+        
+        event_matrix = np.zeros((len(events), dim))
+        for idx, event in enumerate(events):
+            vector = event_embeddings.get(event.id)
+            if vector is not None and len(vector) == dim:
+                event_matrix[idx] = vector
+        
+        lats = np.array([
+            event.latitude if event.latitude and event.longitude else np.nan
+            for event in events
+        ], dtype=np.float64)
+        lons = np.array([
+            event.longitude if event.latitude and event.longitude else np.nan
+            for event in events
+        ], dtype=np.float64)
+        
+        # Per-event features from in-memory lookups (no per-event queries)
+        features = self.prefetch_event_features(db, user_id, events)
+        checkins_by_hobby = features["checkins_by_hobby"]
+        host_ratings = features["host_ratings"]
+        host_tiers = features["host_tiers"]
+        
+        engagement_scores = np.array([
+            (self.engagement_weight_from_counts(
+                checkins_by_hobby.get(event.hobby_id, 0),
+                features["blog_interactions"]
+            ) - 1.0) / 0.5  # Normalize to 0-1
+            for event in events
+        ], dtype=np.float64)
+        host_reputation_scores = np.array([
+            self.host_reputation_from_stats(
+                *host_ratings.get(event.host_id, (None, 0)),
+                host_tiers.get(event.host_id)
+            ) if event.host_id else 0.5
+            for event in events
+        ], dtype=np.float64)
+        
+        scores = self.score_events_batch(
+            event_matrix=event_matrix,
+            user_matrix=user_matrix,
+            lats=lats,
+            lons=lons,
+            search_lat=search_lat,
+            search_lon=search_lon,
+            engagement_scores=engagement_scores,
+            host_reputation_scores=host_reputation_scores,
+            verified_attendance_score=verified_attendance_score,
+            nft_badge_score=nft_badge_score,
+            payment_urgency_score=payment_urgency_score,
+            nft_badge_type=nft_badge_type
+        )
+        
+        # Build results only for the top-k events
+        scored_events = []
+        for idx in self.select_top_k(scores["match_score"], limit):
+            event = events[idx]
+            distance_km = float(scores["distance_km"][idx])
+            
+            event_data = {
+                "event_id": event.id,
+                "title": event.title,
+                "description": event.description,
+                "event_date": event.event_date.isoformat() if event.event_date else None,
+                "location": event.location,
+                "city": event.city,
+                "is_paid": event.is_paid,
+                "price": float(event.price) if event.price else 0,
+                "match_score": round(float(scores["match_score"][idx]), 4),
+                # Detailed scoring breakdown
+                "score_breakdown": {
+                    "distance_score": round(float(scores["distance_score"][idx]), 4),
+                    "hobby_similarity": round(float(scores["hobby_similarity"][idx]), 4),
+                    "engagement_score": round(float(engagement_scores[idx]), 4),
+                    "verified_attendance_score": round(verified_attendance_score, 4),
+                    "nft_badge_score": round(nft_badge_score, 4),
+                    "payment_urgency_score": round(payment_urgency_score, 4),
+                    "host_reputation_score": round(float(host_reputation_scores[idx]), 4),
+                },
+                # User trust signals
+                "user_trust": {
+                    "nft_badge_type": nft_badge_type,
+                    "verified_attendance_rate": round(verified_attendance_score, 4),
                 }
-                
-                # Include distance in km if calculated
-                if distance_km is not None:
-                    event_data["distance_km"] = round(distance_km, 2)
-                
-                # Include geocoded location info if used
-                if geocoded_location:
-                    event_data["search_location"] = geocoded_location
-                
-                scored_events.append(event_data)
-                
-            except Exception as e:
-                logger.error(f"Error scoring event {event.id}: {e}")
-        
-        # Sort by match score descending
-        scored_events.sort(key=lambda x: x["match_score"], reverse=True)
-        
-        return scored_events[:limit]
+            }
+            
+            # Include distance in km if calculated
+            if not math.isnan(distance_km):
+                event_data["distance_km"] = round(distance_km, 2)
+            
+            # Include geocoded location info if used
+            if geocoded_location:
+                event_data["search_location"] = geocoded_location
+            
+            scored_events.append(event_data)
+        
+        return scored_events
     
     def find_similar_users(
         self,
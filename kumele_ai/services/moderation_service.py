@@ -3,7 +3,7 @@ Moderation Service - Handles content moderation for text, images, and video
 """
 import logging
 import hashlib
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
 from kumele_ai.config import settings
@@ -24,6 +24,48 @@ class ModerationService:
         content_hash = hashlib.sha256(f"{content_type}:{content}".encode()).hexdigest()[:16]
         return f"{content_type}_{content_hash}"
     
+    def _decide_text(
+        self,
+        toxicity: Dict[str, Any],
+        spam: Dict[str, Any],
+        sentiment: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], str]:
+        """Build text moderation labels and the approve / reject / needs_review decision"""
+        labels = {}
+        decision = "approve"
+        
+        # Toxicity check
+        labels["toxicity"] = {
+            "score": toxicity.get("toxicity_score", 0),
+            "is_toxic": toxicity.get("is_toxic", False)
+        }
+        
+        if toxicity.get("toxicity_score", 0) > settings.MODERATION_TEXT_TOXICITY_THRESHOLD:
+            decision = "reject"
+        
+        # Spam check
+        labels["spam"] = {
+            "score": spam.get("spam_score", 0),
+            "is_spam": spam.get("is_spam", False)
+        }
+        
+        if spam.get("spam_score", 0) > settings.MODERATION_TEXT_SPAM_THRESHOLD:
+            decision = "reject"
+        
+        # Sentiment (for context)
+        labels["sentiment"] = {
+            "value": sentiment.get("sentiment"),
+            "confidence": sentiment.get("confidence")
+        }
+        
+        # Check for needs_review (borderline cases)
+        if decision == "approve":
+            if (toxicity.get("toxicity_score", 0) > settings.MODERATION_TEXT_TOXICITY_THRESHOLD * 0.7 or
+                spam.get("spam_score", 0) > settings.MODERATION_TEXT_SPAM_THRESHOLD * 0.7):
+                decision = "needs_review"
+        
+        return labels, decision
+    
     def moderate_text(
         self,
         db: Session,
@@ -65,41 +107,11 @@ class ModerationService:
             db.commit()
             
             # Run moderation checks
-            labels = {}
-            decision = "approve"
-            
-            # Toxicity check
-            toxicity = classify_service.detect_toxicity(text)
-            labels["toxicity"] = {
-                "score": toxicity.get("toxicity_score", 0),
-                "is_toxic": toxicity.get("is_toxic", False)
-            }
-            
-            if toxicity.get("toxicity_score", 0) > settings.MODERATION_TEXT_TOXICITY_THRESHOLD:
-                decision = "reject"
-            
-            # Spam check
-            spam = classify_service.detect_spam(text)
-            labels["spam"] = {
-                "score": spam.get("spam_score", 0),
-                "is_spam": spam.get("is_spam", False)
-            }
-            
-            if spam.get("spam_score", 0) > settings.MODERATION_TEXT_SPAM_THRESHOLD:
-                decision = "reject"
-            
-            # Sentiment (for context)
-            sentiment = classify_service.analyze_sentiment(text)
-            labels["sentiment"] = {
-                "value": sentiment.get("sentiment"),
-                "confidence": sentiment.get("confidence")
-            }
-            
-            # Check for needs_review (borderline cases)
-            if decision == "approve":
-                if (toxicity.get("toxicity_score", 0) > settings.MODERATION_TEXT_TOXICITY_THRESHOLD * 0.7 or
-                    spam.get("spam_score", 0) > settings.MODERATION_TEXT_SPAM_THRESHOLD * 0.7):
-                    decision = "needs_review"
+            labels, decision = self._decide_text(
+                classify_service.detect_toxicity(text),
+                classify_service.detect_spam(text),
+                classify_service.analyze_sentiment(text)
+            )
             
             # Update job
             job.status = "completed"
@@ -127,6 +139,115 @@ class ModerationService:
                 "error": str(e)
             }
     
+    def moderate_texts(
+        self,
+        db: Session,
+        items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Moderate many texts with batched toxicity and sentiment inference.
+        
+        items: List of {"text": str, "subtype": Optional[str], "content_id": Optional[str]}
+        
+        Returns one result per item, in order, in the moderate_text format.
+        """
+        if not items:
+            return []
+        
+        try:
+            content_ids = [
+                item.get("content_id") or self._generate_content_id(item["text"], "text")
+                for item in items
+            ]
+            
+            # Already moderated content, one query
+            existing = {
+                job.content_id: job
+                for job in db.query(ModerationJob).filter(
+                    ModerationJob.content_id.in_(set(content_ids)),
+                    ModerationJob.status == "completed"
+                ).all()
+            }
+            
+            results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+            pending: Dict[str, int] = {}
+            for i, content_id in enumerate(content_ids):
+                job = existing.get(content_id)
+                if job:
+                    results[i] = {
+                        "content_id": content_id,
+                        "content_type": "text",
+                        "status": job.status,
+                        "decision": job.decision,
+                        "labels": job.labels,
+                        "cached": True
+                    }
+                elif content_id not in pending:
+                    pending[content_id] = i
+            
+            if pending:
+                # Create moderation jobs
+                jobs = {}
+                for content_id, i in pending.items():
+                    jobs[content_id] = ModerationJob(
+                        content_id=content_id,
+                        content_type="text",
+                        subtype=items[i].get("subtype"),
+                        content_data=items[i]["text"][:5000],  # Limit stored content
+                        status="processing"
+                    )
+                    db.add(jobs[content_id])
+                db.commit()
+                
+                # Run moderation checks, models batched across all pending texts
+                texts = [items[i]["text"] for i in pending.values()]
+                toxicities = classify_service.detect_toxicity_batch(texts)
+                sentiments = classify_service.analyze_sentiment_batch(texts)
+                
+                for (content_id, i), text, toxicity, sentiment in zip(
+                    pending.items(), texts, toxicities, sentiments
+                ):
+                    labels, decision = self._decide_text(
+                        toxicity,
+                        classify_service.detect_spam(text),
+                        sentiment
+                    )
+                    
+                    job = jobs[content_id]
+                    job.status = "completed"
+                    job.decision = decision
+                    job.labels = labels
+                    job.reviewed_at = datetime.utcnow()
+                    
+                    results[i] = {
+                        "content_id": content_id,
+                        "content_type": "text",
+                        "status": "completed",
+                        "decision": decision,
+                        "labels": labels,
+                        "cached": False
+                    }
+                
+                db.commit()
+            
+            # Duplicates within the batch share the first result
+            first_result = {r["content_id"]: r for r in results if r is not None}
+            return [r if r is not None else first_result[cid] for r, cid in zip(results, content_ids)]
+        
+        except Exception as e:
+            logger.error(f"Batch text moderation error: {e}")
+            db.rollback()
+            return [
+                {
+                    "content_id": item.get("content_id"),
+                    "content_type": "text",
+                    "status": "error",
+                    "decision": "needs_review",
+                    "error": str(e)
+                }
+                for item in items
+            ]
+    
     def moderate_image(
         self,
         db: Session,
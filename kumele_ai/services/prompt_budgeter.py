@@ -0,0 +1,188 @@
+"""
+Prompt Budgeter - Token-budgeted context assembly for RAG prompts
+
+Retrieved chunks used to be joined into the prompt whatever their size,
+with max_new_tokens fixed at 512. Before generation the chatbot now:
+- counts tokens with the target LLM's tokenizer (LLM_TOKENIZER, default
+  LLM_MODEL; ~4 characters per token if it cannot be loaded)
+- drops near-duplicate chunks (word 3-gram Jaccard similarity at or above
+  CHATBOT_CONTEXT_DEDUP_THRESHOLD), keeping the better-ranked one
+- keeps chunks in rank order until CHATBOT_CONTEXT_MAX_TOKENS is reached,
+  truncating the last one if at least CHATBOT_CONTEXT_MIN_CHUNK_TOKENS fit
+- sizes max_new_tokens from the context actually sent, within the TGI
+  input/total token limits
+"""
+import logging
+import math
+import re
+import threading
+from typing import Dict, Any, List, Set, Tuple
+from transformers import AutoTokenizer
+from kumele_ai.config import settings
+from kumele_ai.services.llm_service import llm_service
+
+logger = logging.getLogger(__name__)
+
+# Fallback estimate when the tokenizer is unavailable
+CHARS_PER_TOKEN = 4
+# "\n\n" between context chunks
+SEPARATOR_TOKENS = 2
+
+_WORD = re.compile(r"\w+")
+
+
+class PromptBudgeter:
+    """Fit retrieved context into a token budget for the chat prompt"""
+    
+    def __init__(self):
+        self.tokenizer_name = settings.LLM_TOKENIZER or settings.LLM_MODEL
+        self.context_max_tokens = settings.CHATBOT_CONTEXT_MAX_TOKENS
+        self.min_chunk_tokens = settings.CHATBOT_CONTEXT_MIN_CHUNK_TOKENS
+        self.dedup_threshold = settings.CHATBOT_CONTEXT_DEDUP_THRESHOLD
+        self.min_new_tokens = settings.CHATBOT_MIN_NEW_TOKENS
+        self.max_new_tokens = settings.CHATBOT_MAX_NEW_TOKENS
+        self.answer_ratio = settings.CHATBOT_ANSWER_TOKENS_PER_CONTEXT_TOKEN
+        self.max_input_tokens = settings.LLM_MAX_INPUT_TOKENS
+        self.max_total_tokens = settings.LLM_MAX_TOTAL_TOKENS
+        
+        self._tokenizer = None
+        self._tokenizer_loaded = False
+        self._lock = threading.Lock()
+    
+    def _get_tokenizer(self):
+        """Lazy load the LLM tokenizer (None if it cannot be loaded)"""
+        if not self._tokenizer_loaded:
+            with self._lock:
+                if not self._tokenizer_loaded:
+                    try:
+                        logger.info(f"Loading LLM tokenizer: {self.tokenizer_name}")
+                        self._tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+                    except Exception as e:
+                        logger.warning(
+                            f"LLM tokenizer unavailable ({e}), estimating {CHARS_PER_TOKEN} characters per token"
+                        )
+                        self._tokenizer = None
+                    self._tokenizer_loaded = True
+        return self._tokenizer
+    
+    def count_tokens(self, text: str) -> int:
+        """Number of LLM tokens in text (without special tokens)"""
+        tokenizer = self._get_tokenizer()
+        if tokenizer is None:
+            return math.ceil(len(text) / CHARS_PER_TOKEN)
+        return len(tokenizer.encode(text, add_special_tokens=False))
+    
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Leading part of text that fits in max_tokens, cut at a word boundary"""
+        tokenizer = self._get_tokenizer()
+        if tokenizer is None:
+            end = max_tokens * CHARS_PER_TOKEN
+        else:
+            offsets = tokenizer(
+                text,
+                add_special_tokens=False,
+                return_offsets_mapping=True
+            )["offset_mapping"]
+            if len(offsets) <= max_tokens:
+                return text
+            end = offsets[max_tokens - 1][1]
+        
+        if end >= len(text):
+            return text
+        cut = text[:end]
+        space = cut.rfind(" ")
+        return cut[:space] if space > 0 else cut
+    
+    def _shingles(self, text: str) -> Set[Tuple[str, ...]]:
+        """Word 3-grams of a text (its words, if shorter)"""
+        words = _WORD.findall(text.lower())
+        if len(words) < 3:
+            return {tuple(words)}
+        return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+    
+    def _dedupe(self, chunks: List[str]) -> List[str]:
+        """Drop chunks nearly identical to a better-ranked one"""
+        kept: List[str] = []
+        kept_shingles: List[Set[Tuple[str, ...]]] = []
+        for chunk in chunks:
+            shingles = self._shingles(chunk)
+            duplicate = any(
+                len(shingles & other) / len(shingles | other) >= self.dedup_threshold
+                for other in kept_shingles
+            )
+            if not duplicate:
+                kept.append(chunk)
+                kept_shingles.append(shingles)
+        return kept
+    
+    def _prompt_tokens(self, query: str, context: List[str]) -> int:
+        """Tokens of the full chat prompt as sent to the model"""
+        system_prompt, prompt = llm_service._build_chat_prompt(query, context)
+        return self.count_tokens(llm_service._format_local_prompt(prompt, system_prompt))
+    
+    def assemble(self, query: str, chunks: List[str]) -> Dict[str, Any]:
+        """
+        Select context for a chat prompt.
+        
+        Args:
+            query: The (English) user question
+            chunks: Retrieved chunk texts, best first
+        
+        Returns:
+            Dict with context (chunks to send), prompt_tokens, max_new_tokens,
+            context_tokens, chunks_retrieved, chunks_used, duplicates_dropped
+            and truncated
+        """
+        # Prompt without context: system prompt, template and question
+        overhead = self._prompt_tokens(query, [""])
+        budget = min(
+            self.context_max_tokens,
+            self.max_input_tokens - overhead,
+            self.max_total_tokens - overhead - self.min_new_tokens
+        )
+        
+        unique = self._dedupe([chunk for chunk in chunks if chunk.strip()])
+        
+        context: List[str] = []
+        context_tokens = 0
+        truncated = False
+        for chunk in unique:
+            tokens = self.count_tokens(chunk) + SEPARATOR_TOKENS
+            if context_tokens + tokens <= budget:
+                context.append(chunk)
+                context_tokens += tokens
+                continue
+            
+            # Lower-ranked chunks never displace higher-ranked ones
+            remaining = budget - context_tokens - SEPARATOR_TOKENS
+            if remaining >= self.min_chunk_tokens:
+                context.append(self._truncate(chunk, remaining))
+                context_tokens += remaining + SEPARATOR_TOKENS
+                truncated = True
+            break
+        
+        prompt_tokens = self._prompt_tokens(query, context)
+        
+        # Short answers without context, longer ones for richer context
+        max_new_tokens = self.min_new_tokens
+        if context:
+            max_new_tokens = min(
+                self.max_new_tokens,
+                self.min_new_tokens + int(context_tokens * self.answer_ratio)
+            )
+        max_new_tokens = max(1, min(max_new_tokens, self.max_total_tokens - prompt_tokens))
+        
+        return {
+            "context": context,
+            "prompt_tokens": prompt_tokens,
+            "max_new_tokens": max_new_tokens,
+            "context_tokens": context_tokens,
+            "chunks_retrieved": len(chunks),
+            "chunks_used": len(context),
+            "duplicates_dropped": len([c for c in chunks if c.strip()]) - len(unique),
+            "truncated": truncated
+        }
+
+
+# Singleton instance
+prompt_budgeter = PromptBudgeter()
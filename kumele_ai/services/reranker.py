@@ -0,0 +1,52 @@
+"""
+Reranker - Cross-encoder rescoring of retrieval candidates
+
+A small cross-encoder (CHATBOT_RERANK_MODEL, MiniLM by default) scores
+each (query, chunk) pair jointly. It is only applied to the top
+CHATBOT_RERANK_TOP_N fused candidates, and only when
+CHATBOT_RERANK_ENABLED is set.
+"""
+import asyncio
+import logging
+import threading
+from typing import List, Optional
+from sentence_transformers import CrossEncoder
+from kumele_ai.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Reranker:
+    """Lazy-loaded cross-encoder"""
+    
+    def __init__(self):
+        self.model_name = settings.CHATBOT_RERANK_MODEL
+        self.enabled = settings.CHATBOT_RERANK_ENABLED
+        self._model: Optional[CrossEncoder] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def model(self) -> CrossEncoder:
+        """Lazy load the cross-encoder"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    logger.info(f"Loading rerank model: {self.model_name}")
+                    self._model = CrossEncoder(self.model_name, max_length=512)
+                    logger.info("Rerank model loaded successfully")
+        return self._model
+    
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        """Relevance score of each text for the query"""
+        if not texts:
+            return []
+        scores = self.model.predict([(query, text) for text in texts])
+        return [float(s) for s in scores]
+    
+    async def score_async(self, query: str, texts: List[str]) -> List[float]:
+        """Score texts without blocking the event loop"""
+        return await asyncio.to_thread(self.score, query, texts)
+
+
+# Singleton instance
+reranker = Reranker()
@@ -0,0 +1,172 @@
+"""
+Result Cache - Two-tier cache for model inference results
+
+Keyed by (model, sha256 of the text):
+- In-process LRU bounded by lru_size
+- Shared Redis tier storing serialized results with a TTL (JSON by
+  default; callers pass dumps/loads for other formats, e.g. raw float32
+  bytes for embeddings)
+Hit and miss counters are kept per model. Used by EmbedService and
+ClassifyService.
+"""
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional
+import redis
+from kumele_ai.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """LRU + Redis cache of inference results"""
+    
+    def __init__(
+        self,
+        namespace: str,
+        lru_size: int,
+        ttl_sec: int,
+        enabled: bool = True,
+        dumps: Callable[[Any], Any] = json.dumps,
+        loads: Callable[[bytes], Any] = json.loads
+    ):
+        self.namespace = namespace
+        self.lru_size = lru_size
+        self.ttl_sec = ttl_sec
+        self.enabled = enabled
+        self._dumps = dumps
+        self._loads = loads
+        
+        self._lru: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis_client: Optional[redis.Redis] = None
+        self._stats: Dict[str, Dict[str, int]] = {}
+    
+    def _get_redis(self) -> Optional[redis.Redis]:
+        """Get Redis client for the shared tier (raw bytes, decoded by loads)"""
+        if self._redis_client is None:
+            try:
+                self._redis_client = redis.from_url(settings.REDIS_URL)
+                self._redis_client.ping()
+            except Exception as e:
+                logger.warning(f"Redis unavailable for {self.namespace} result cache: {e}")
+                self._redis_client = None
+        return self._redis_client
+    
+    def _get_cache_key(self, model: str, text: str) -> str:
+        """Cache key for a text under a model"""
+        text_hash = hashlib.sha256(text.encode()).hexdigest()
+        return f"{self.namespace}:{model}:{text_hash}"
+    
+    def _count(self, model: str, field: str, n: int = 1) -> None:
+        """Increment a per-model counter"""
+        stats = self._stats.setdefault(model, {"lru_hits": 0, "redis_hits": 0, "misses": 0})
+        stats[field] += n
+    
+    def _lru_put(self, key: str, value: Any) -> None:
+        """Write to the in-process tier, evicting least recently used entries"""
+        with self._lock:
+            self._lru[key] = value
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+    
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[Any]]:
+        """Cached results for texts, in order (None for misses)"""
+        if not self.enabled:
+            return [None] * len(texts)
+        
+        keys = [self._get_cache_key(model, t) for t in texts]
+        results: List[Optional[Any]] = [None] * len(texts)
+        
+        # Tier 1: in-process LRU
+        with self._lock:
+            for i, key in enumerate(keys):
+                value = self._lru.get(key)
+                if value is not None:
+                    self._lru.move_to_end(key)
+                    results[i] = value
+        self._count(model, "lru_hits", sum(1 for r in results if r is not None))
+        
+        # Tier 2: Redis (one MGET for the distinct LRU misses)
+        pending = list(dict.fromkeys(keys[i] for i, r in enumerate(results) if r is None))
+        if pending:
+            try:
+                r = self._get_redis()
+                if r:
+                    found = {}
+                    for key, raw in zip(pending, r.mget(pending)):
+                        if raw is not None:
+                            found[key] = self._loads(raw)
+                            self._lru_put(key, found[key])
+                    for i, key in enumerate(keys):
+                        if results[i] is None and key in found:
+                            results[i] = found[key]
+                            self._count(model, "redis_hits")
+            except Exception as e:
+                logger.warning(f"{self.namespace} result cache read error: {e}")
+        
+        self._count(model, "misses", sum(1 for r in results if r is None))
+        return results
+    
+    def set_many(self, model: str, texts: List[str], values: List[Any]) -> None:
+        """Store results for texts in both tiers"""
+        if not self.enabled or not texts:
+            return
+        
+        keys = [self._get_cache_key(model, t) for t in texts]
+        for key, value in zip(keys, values):
+            self._lru_put(key, value)
+        
+        try:
+            r = self._get_redis()
+            if r:
+                pipe = r.pipeline()
+                for key, value in zip(keys, values):
+                    pipe.setex(key, self.ttl_sec, self._dumps(value))
+                pipe.execute()
+        except Exception as e:
+            logger.warning(f"{self.namespace} result cache write error: {e}")
+    
+    def clear(self, model: Optional[str] = None, include_redis: bool = False) -> None:
+        """
+        Drop the in-process tier.
+        
+        include_redis also deletes the model's Redis keys.
+        """
+        with self._lock:
+            self._lru.clear()
+        
+        if include_redis and model is not None:
+            try:
+                r = self._get_redis()
+                if r:
+                    batch = []
+                    for key in r.scan_iter(match=f"{self.namespace}:{model}:*", count=1000):
+                        batch.append(key)
+                        if len(batch) >= 1000:
+                            r.delete(*batch)
+                            batch = []
+                    if batch:
+                        r.delete(*batch)
+            except Exception as e:
+                logger.warning(f"{self.namespace} result cache invalidation error: {e}")
+    
+    def get_model_stats(self, model: str) -> Dict[str, Any]:
+        """Hit/miss counters and hit rate of one model"""
+        stats = dict(self._stats.get(model, {"lru_hits": 0, "redis_hits": 0, "misses": 0}))
+        lookups = stats["lru_hits"] + stats["redis_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["lru_hits"] + stats["redis_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-model hit/miss counters and hit rates"""
+        return {
+            "enabled": self.enabled,
+            "lru_size": len(self._lru),
+            "lru_max_size": self.lru_size,
+            "models": {model: self.get_model_stats(model) for model in self._stats}
+        }
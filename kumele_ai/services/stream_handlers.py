@@ -0,0 +1,143 @@
+"""
+Stream Handlers - Default per-type handlers for the event streams
+
+Registered on stream_processor when a consumer starts:
+- ad_events: impressions, clicks and conversions become ad_interactions
+  rows (the source for ads analytics)
+- keywords_extracted: counted into the keyword trend buckets
+  (keyword_trends.py) behind GET /nlp/trends
+- other nlp_events, activity_events, moderation_events: hourly counters
+  in Redis hashes (kumele:metrics:{metric}:{YYYYMMDDHH}), e.g. sentiment
+  by content type or moderation decisions
+
+A missing field raises and the event is retried, then dead-lettered.
+
+Delivery is at-least-once (a batch is acked after all its handlers ran),
+so handlers are idempotent on the stream entry id: ad_interactions has a
+unique stream_entry_id column, and counters claim the entry id with
+SET NX before incrementing (as keyword_trends.record does).
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Any, Tuple
+from sqlalchemy.exc import IntegrityError
+from kumele_ai.db.database import SessionLocal
+from kumele_ai.db.models import AdInteraction
+from kumele_ai.services.stream_service import StreamService
+from kumele_ai.services.stream_processor import stream_processor, PoisonEvent, ANY_TYPE
+from kumele_ai.services.keyword_trends import keyword_trends
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY_PREFIX = "kumele:metrics"
+METRICS_TTL_SEC = 7 * 86400
+# Stream entry ids already counted (redeliveries are skipped)
+SEEN_TTL_SEC = 86400
+
+
+def _hour(event: Dict[str, Any]) -> str:
+    """Hour bucket of an event (publish time, else now)"""
+    try:
+        timestamp = datetime.fromisoformat(event["timestamp"])
+    except (TypeError, ValueError):
+        timestamp = datetime.utcnow()
+    return timestamp.strftime("%Y%m%d%H")
+
+
+def _count(event: Dict[str, Any], *counters: Tuple[str, str]) -> None:
+    """Increment hourly (metric, field) counters for an event, once per stream entry"""
+    r = stream_processor._get_redis()
+    seen_key = f"{METRICS_KEY_PREFIX}:seen:{counters[0][0]}:{event['id']}"
+    if not r.set(seen_key, 1, nx=True, ex=SEEN_TTL_SEC):
+        return
+    
+    hour = _hour(event)
+    try:
+        pipe = r.pipeline(transaction=True)
+        for metric, field in counters:
+            key = f"{METRICS_KEY_PREFIX}:{metric}:{hour}"
+            pipe.hincrby(key, field, 1)
+            pipe.expire(key, METRICS_TTL_SEC)
+        pipe.execute()
+    except Exception:
+        # Release the claim so the retried event is counted
+        r.delete(seen_key)
+        raise
+
+
+# ==========================================
+# NLP Events
+# ==========================================
+
+@stream_processor.handler(StreamService.STREAM_NLP, "sentiment_analyzed")
+def handle_sentiment(event: Dict[str, Any]) -> None:
+    data = event["data"]
+    _count(event, ("sentiment", f"{data['content_type']}:{data['sentiment']}"))
+
+
+@stream_processor.handler(StreamService.STREAM_NLP, "keywords_extracted")
+def handle_keywords(event: Dict[str, Any]) -> None:
+    keyword_trends.record_event(event)
+
+
+# ==========================================
+# Ad Events
+# ==========================================
+
+@stream_processor.handler(StreamService.STREAM_ADS, "ad_impression", "ad_click", "ad_conversion")
+def handle_ad_interaction(event: Dict[str, Any]) -> None:
+    data = event["data"]
+    try:
+        ad_id = int(data["ad_id"])
+    except (KeyError, TypeError, ValueError):
+        raise PoisonEvent(f"Invalid ad_id: {data.get('ad_id')!r}")
+    
+    db = SessionLocal()
+    try:
+        db.add(AdInteraction(
+            ad_id=ad_id,
+            user_id=data.get("user_id"),
+            interaction_type=event["type"][len("ad_"):],
+            stream_entry_id=event["id"]
+        ))
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if db.query(AdInteraction.id).filter(AdInteraction.stream_entry_id == event["id"]).first():
+            # Redelivered after its row was committed
+            logger.debug(f"Ad interaction for {event['id']} already recorded")
+            return
+        # Unknown ad or user; retrying cannot help
+        raise PoisonEvent(f"Ad interaction rejected: {e.orig}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# ==========================================
+# Activity Events
+# ==========================================
+
+@stream_processor.handler(StreamService.STREAM_ACTIVITY, ANY_TYPE)
+def handle_activity(event: Dict[str, Any]) -> None:
+    _count(event, ("activity", event["type"]))
+
+
+@stream_processor.handler(StreamService.STREAM_ACTIVITY, "search_performed")
+def handle_search(event: Dict[str, Any]) -> None:
+    counters = [("activity", event["type"])]
+    if not event["data"]["results_count"]:
+        counters.append(("activity", "search_no_results"))
+    _count(event, *counters)
+
+
+# ==========================================
+# Moderation Events
+# ==========================================
+
+@stream_processor.handler(StreamService.STREAM_MODERATION, "content_moderated")
+def handle_moderation(event: Dict[str, Any]) -> None:
+    data = event["data"]
+    _count(event, ("moderation", f"{data['content_type']}:{data['decision']}"))
@@ -0,0 +1,385 @@
+"""
+Stream Processor - Consumer-group runtime for the Redis event streams
+
+StreamService publishes events; this module consumes them. Every consumer
+joins the STREAM_CONSUMER_GROUP group on each stream and reads with
+XREADGROUP, so N consumers (scripts/run_stream_processors.py runs them
+as separate processes) share the load and each event is handled once:
+- events are dispatched to the handler registered for their stream and
+  "type" (stream_handlers.py); events without a type are acked and skipped
+- a failing handler is retried in-process with exponential backoff
+  (STREAM_HANDLER_RETRIES, STREAM_RETRY_BACKOFF_MS); if it still fails
+  the event stays pending and is redelivered later
+- pending events idle for STREAM_CLAIM_IDLE_MS (failed, or owned by a
+  consumer that died) are taken over with XAUTOCLAIM
+- after STREAM_MAX_DELIVERIES deliveries, or if it cannot be decoded, an
+  event is moved to the dead-letter stream and acked
+
+Delivery is at-least-once: a handler can see an event again if its
+consumer dies before the ack, so handlers must be idempotent on the
+entry id. Per-group lag, pending counts, outcome
+counters and throughput are reported by get_group_stats().
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional, Tuple
+import redis
+from kumele_ai.config import settings
+from kumele_ai.services.stream_service import StreamService
+from kumele_ai.services.stream_publisher import decode_data
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], None]
+
+STATS_KEY_PREFIX = "kumele:stream:stats"
+THROUGHPUT_KEY_PREFIX = "kumele:stream:throughput"
+# Throughput is averaged over the last few minutes
+THROUGHPUT_WINDOW_MIN = 5
+THROUGHPUT_TTL_SEC = 3600
+# Fallback handler for types without their own
+ANY_TYPE = "*"
+
+
+class PoisonEvent(Exception):
+    """Event that can never be processed (dead-lettered without retries)"""
+
+
+class StreamProcessor:
+    """XREADGROUP/XACK/XAUTOCLAIM consumer for the managed streams"""
+    
+    STREAMS = [
+        StreamService.STREAM_NLP,
+        StreamService.STREAM_ADS,
+        StreamService.STREAM_ACTIVITY,
+        StreamService.STREAM_MODERATION
+    ]
+    
+    def __init__(self):
+        self.group = settings.STREAM_CONSUMER_GROUP
+        self.batch_size = settings.STREAM_BATCH_SIZE
+        self.block_ms = settings.STREAM_BLOCK_MS
+        self.handler_retries = settings.STREAM_HANDLER_RETRIES
+        self.retry_backoff_ms = settings.STREAM_RETRY_BACKOFF_MS
+        self.claim_idle_ms = settings.STREAM_CLAIM_IDLE_MS
+        self.claim_interval_sec = settings.STREAM_CLAIM_INTERVAL_SEC
+        self.max_deliveries = settings.STREAM_MAX_DELIVERIES
+        
+        self._handlers: Dict[str, Dict[str, Handler]] = {}
+        self._redis: Optional[redis.Redis] = None
+        self._stop = threading.Event()
+    
+    def _get_redis(self) -> redis.Redis:
+        """Get Redis client"""
+        if self._redis is None:
+            self._redis = redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True
+            )
+        return self._redis
+    
+    # ============================================================
+    # Handler registry
+    # ============================================================
+    
+    def handler(self, stream: str, *event_types: str) -> Callable[[Handler], Handler]:
+        """
+        Register a handler for event types of a stream.
+        
+        Handlers receive {id, type, timestamp, data} and signal failure by
+        raising; PoisonEvent skips the retries. Use "*" for types without
+        a handler of their own.
+        """
+        def register(func: Handler) -> Handler:
+            for event_type in event_types:
+                self._handlers.setdefault(stream, {})[event_type] = func
+            return func
+        return register
+    
+    def _get_handler(self, stream: str, event_type: str) -> Optional[Handler]:
+        handlers = self._handlers.get(stream, {})
+        return handlers.get(event_type) or handlers.get(ANY_TYPE)
+    
+    # ============================================================
+    # Groups
+    # ============================================================
+    
+    def ensure_groups(self, streams: Optional[List[str]] = None) -> None:
+        """Create the consumer group on each stream (from its first entry)"""
+        r = self._get_redis()
+        for stream in streams or self.STREAMS:
+            try:
+                r.xgroup_create(stream, self.group, id="0", mkstream=True)
+                logger.info(f"Created consumer group {self.group} on {stream}")
+            except redis.ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+    
+    # ============================================================
+    # Processing
+    # ============================================================
+    
+    def _decode(self, entry_id: str, fields: Dict[str, str]) -> Dict[str, Any]:
+        try:
+            data = decode_data(fields.get("data"))
+        except (TypeError, ValueError) as e:
+            raise PoisonEvent(f"Undecodable event data: {e}")
+        return {
+            "id": entry_id,
+            "type": fields.get("type"),
+            "timestamp": fields.get("timestamp"),
+            "data": data
+        }
+    
+    def _dispatch(self, handler: Handler, event: Dict[str, Any]) -> None:
+        """Run a handler, retrying with exponential backoff"""
+        for attempt in range(self.handler_retries + 1):
+            try:
+                handler(event)
+                return
+            except PoisonEvent:
+                raise
+            except Exception:
+                if attempt == self.handler_retries:
+                    raise
+                time.sleep(self.retry_backoff_ms * (2 ** attempt) / 1000)
+    
+    def _dead_letter(
+        self,
+        stream: str,
+        entry_id: str,
+        fields: Dict[str, str],
+        error: str,
+        deliveries: int
+    ) -> None:
+        """Move an event to the dead-letter stream and ack it"""
+        pipe = self._get_redis().pipeline(transaction=True)
+        pipe.xadd(
+            StreamService.STREAM_DEAD_LETTER,
+            {
+                "stream": stream,
+                "group": self.group,
+                "entry_id": entry_id,
+                "type": fields.get("type") or "",
+                "timestamp": fields.get("timestamp") or "",
+                "data": fields.get("data") or "",
+                "error": error[:1000],
+                "deliveries": deliveries,
+                "dead_lettered_at": datetime.utcnow().isoformat()
+            },
+            maxlen=StreamService.DEFAULT_MAXLEN,
+            approximate=True
+        )
+        pipe.xack(stream, self.group, entry_id)
+        pipe.execute()
+        logger.warning(f"Dead-lettered {stream} {entry_id} after {deliveries} deliveries: {error}")
+    
+    def _process(
+        self,
+        stream: str,
+        entries: List[Tuple[str, Optional[Dict[str, str]]]],
+        deliveries: Dict[str, int]
+    ) -> Dict[str, int]:
+        """
+        Handle a batch of entries from one stream.
+        
+        Args:
+            deliveries: Delivery count per entry id (1 if not listed)
+        
+        Returns outcome counts (processed, skipped, failed, dead_lettered).
+        """
+        counts = {"processed": 0, "skipped": 0, "failed": 0, "dead_lettered": 0}
+        done: List[str] = []
+        
+        for entry_id, fields in entries:
+            delivery = deliveries.get(entry_id, 1)
+            try:
+                # Trimmed from the stream while pending
+                if not fields:
+                    done.append(entry_id)
+                    counts["skipped"] += 1
+                    continue
+                
+                # Redelivered too often (e.g. it keeps killing its consumer)
+                if delivery > self.max_deliveries:
+                    raise PoisonEvent(f"Exceeded {self.max_deliveries} deliveries")
+                
+                event = self._decode(entry_id, fields)
+                handler = self._get_handler(stream, event["type"]) if event["type"] else None
+                if handler is None:
+                    done.append(entry_id)
+                    counts["skipped"] += 1
+                    continue
+                
+                self._dispatch(handler, event)
+                done.append(entry_id)
+                counts["processed"] += 1
+            except Exception as e:
+                if isinstance(e, PoisonEvent) or delivery >= self.max_deliveries:
+                    self._dead_letter(stream, entry_id, fields or {}, str(e), delivery)
+                    counts["dead_lettered"] += 1
+                else:
+                    # Left pending; XAUTOCLAIM redelivers it once idle
+                    logger.error(f"Handler error for {stream} {entry_id} (delivery {delivery}): {e}")
+                    counts["failed"] += 1
+        
+        if done:
+            self._get_redis().xack(stream, self.group, *done)
+        return counts
+    
+    def _claim(self, consumer: str, cursors: Dict[str, str]) -> Dict[str, Dict[str, int]]:
+        """Take over and process events left pending for STREAM_CLAIM_IDLE_MS"""
+        r = self._get_redis()
+        results = {}
+        for stream in self.STREAMS:
+            cursor, claimed, _ = r.xautoclaim(
+                stream,
+                self.group,
+                consumer,
+                min_idle_time=self.claim_idle_ms,
+                start_id=cursors.get(stream, "0-0"),
+                count=self.batch_size
+            )
+            cursors[stream] = cursor
+            if not claimed:
+                continue
+            
+            pending = r.xpending_range(
+                stream,
+                self.group,
+                min=claimed[0][0],
+                max=claimed[-1][0],
+                count=len(claimed),
+                consumername=consumer
+            )
+            deliveries = {p["message_id"]: p["times_delivered"] for p in pending}
+            results[stream] = self._process(stream, claimed, deliveries)
+        return results
+    
+    def _record(self, stream: str, counts: Dict[str, int]) -> None:
+        """Add batch outcomes to the group counters"""
+        counts = {outcome: n for outcome, n in counts.items() if n}
+        if not counts:
+            return
+        try:
+            pipe = self._get_redis().pipeline(transaction=False)
+            stats_key = f"{STATS_KEY_PREFIX}:{self.group}"
+            for outcome, n in counts.items():
+                pipe.hincrby(stats_key, f"{stream}:{outcome}", n)
+            
+            handled = counts.get("processed", 0) + counts.get("skipped", 0)
+            if handled:
+                minute_key = f"{THROUGHPUT_KEY_PREFIX}:{self.group}:{int(time.time() // 60)}"
+                pipe.hincrby(minute_key, stream, handled)
+                pipe.expire(minute_key, THROUGHPUT_TTL_SEC)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Stream stats update error: {e}")
+    
+    def run(self, consumer: Optional[str] = None) -> None:
+        """
+        Consume all managed streams until stop() is called.
+        
+        Args:
+            consumer: Consumer name, unique within the group (host-pid by default)
+        """
+        # Registers the default handlers
+        import kumele_ai.services.stream_handlers  # noqa: F401
+        
+        consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self._stop.clear()
+        self.ensure_groups()
+        logger.info(f"Stream consumer {consumer} started in group {self.group}")
+        
+        r = self._get_redis()
+        cursors: Dict[str, str] = {}
+        next_claim = 0.0
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() >= next_claim:
+                    for stream, counts in self._claim(consumer, cursors).items():
+                        self._record(stream, counts)
+                    next_claim = time.monotonic() + self.claim_interval_sec
+                
+                response = r.xreadgroup(
+                    self.group,
+                    consumer,
+                    {stream: ">" for stream in self.STREAMS},
+                    count=self.batch_size,
+                    block=self.block_ms
+                )
+                for stream, entries in response or []:
+                    self._record(stream, self._process(stream, entries, {}))
+            except redis.ConnectionError as e:
+                logger.error(f"Stream consumer {consumer} lost Redis: {e}")
+                self._stop.wait(1.0)
+            except Exception as e:
+                logger.error(f"Stream consumer {consumer} error: {e}")
+                self._stop.wait(1.0)
+        
+        logger.info(f"Stream consumer {consumer} stopped")
+    
+    def stop(self) -> None:
+        """Stop run() after the current read"""
+        self._stop.set()
+    
+    # ============================================================
+    # Stats
+    # ============================================================
+    
+    def get_group_stats(self) -> Dict[str, Any]:
+        """Lag, pending events, outcome counters and throughput per stream"""
+        try:
+            r = self._get_redis()
+            counters = r.hgetall(f"{STATS_KEY_PREFIX}:{self.group}")
+            
+            now = time.time()
+            current_minute = int(now // 60)
+            pipe = r.pipeline(transaction=False)
+            for minute in range(current_minute - THROUGHPUT_WINDOW_MIN + 1, current_minute + 1):
+                pipe.hgetall(f"{THROUGHPUT_KEY_PREFIX}:{self.group}:{minute}")
+            buckets = pipe.execute()
+            window_sec = (THROUGHPUT_WINDOW_MIN - 1) * 60 + (now % 60)
+            
+            streams = {}
+            for stream in self.STREAMS:
+                group_info = None
+                try:
+                    group_info = next(
+                        (g for g in r.xinfo_groups(stream) if g["name"] == self.group), None
+                    )
+                except redis.ResponseError:
+                    pass  # stream does not exist yet
+                
+                handled = sum(int(bucket.get(stream, 0)) for bucket in buckets)
+                streams[stream] = {
+                    "length": r.xlen(stream),
+                    "consumers": group_info["consumers"] if group_info else 0,
+                    "pending": group_info["pending"] if group_info else 0,
+                    # Entries not yet delivered to the group (Redis 7+)
+                    "lag": group_info.get("lag") if group_info else None,
+                    "last_delivered_id": group_info["last-delivered-id"] if group_info else None,
+                    **{
+                        outcome: int(counters.get(f"{stream}:{outcome}", 0))
+                        for outcome in ("processed", "skipped", "failed", "dead_lettered")
+                    },
+                    "throughput_per_sec": round(handled / window_sec, 3)
+                }
+            
+            return {
+                "group": self.group,
+                "streams": streams,
+                "dead_letter_length": r.xlen(StreamService.STREAM_DEAD_LETTER),
+                "throughput_window_sec": round(window_sec, 1)
+            }
+        except Exception as e:
+            logger.error(f"Error getting stream group stats: {e}")
+            return {"error": str(e)}
+
+
+# Singleton instance
+stream_processor = StreamProcessor()
@@ -0,0 +1,403 @@
+"""
+Stream Publisher - Buffered, pipelined publishing to the Redis event streams
+
+StreamService.publish_event used to make one XADD round-trip per event,
+so high-volume producers (ad impressions, searches) waited on Redis for
+every event. Events are now queued in memory per stream and written in
+pipelined XADD batches when STREAM_PUBLISH_BATCH_SIZE events are queued
+or STREAM_PUBLISH_FLUSH_MS has passed:
+- sync code: a background flush thread, started on first publish
+- async code (the API): a flush task on the event loop, started with
+  start_async(); publish_async() never blocks the loop
+At most STREAM_PUBLISH_QUEUE_MAX events are held; when full,
+STREAM_PUBLISH_OVERFLOW decides between waiting up to
+STREAM_PUBLISH_BLOCK_MS for a flush ("block"), rejecting the new event
+("drop_newest") or dropping the stream's oldest queued event
+("drop_oldest"). Each XADD reply is checked: events that failed on a
+connection error or timeout are put back at the head of their stream
+buffers and retried on the next flush (if that would exceed
+STREAM_PUBLISH_QUEUE_MAX, the overflow policy picks which of them are
+discarded: the oldest for "drop_oldest", the newest otherwise); events
+Redis rejected (e.g. WRONGTYPE, OOM) are dropped. Only dropped and
+discarded events count as failed. close()/aclose() flush what is left on
+shutdown.
+
+Event data is serialized with orjson (compact JSON bytes, also handles
+datetimes and numpy values); consumers decode it with decode_data().
+"""
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import orjson
+import redis
+import redis.asyncio as aioredis
+from kumele_ai.config import settings
+
+logger = logging.getLogger(__name__)
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+OVERFLOW_POLICIES = ("block", "drop_newest", "drop_oldest")
+# Pipeline errors after which entries are retried; other errors (WRONGTYPE, OOM) drop them
+RETRYABLE_ERRORS = (redis.ConnectionError, redis.TimeoutError)
+
+# Queued entry: (stream fields, maxlen)
+Entry = Tuple[Dict[str, Any], int]
+
+
+def encode_event(event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Stream entry fields for an event"""
+    return {
+        "type": event_type,
+        "timestamp": datetime.utcnow().isoformat(),
+        "data": orjson.dumps(data, option=ORJSON_OPTIONS)
+    }
+
+
+def decode_data(raw: Optional[str]) -> Any:
+    """Event data from a stream entry's data field"""
+    return orjson.loads(raw) if raw else {}
+
+
+class StreamPublisher:
+    """Bounded in-memory event buffer flushed through Redis pipelines"""
+    
+    def __init__(self):
+        self.batch_size = settings.STREAM_PUBLISH_BATCH_SIZE
+        self.flush_sec = settings.STREAM_PUBLISH_FLUSH_MS / 1000
+        self.queue_max = settings.STREAM_PUBLISH_QUEUE_MAX
+        self.block_sec = settings.STREAM_PUBLISH_BLOCK_MS / 1000
+        self.overflow = settings.STREAM_PUBLISH_OVERFLOW
+        if self.overflow not in OVERFLOW_POLICIES:
+            logger.warning(f"Unknown STREAM_PUBLISH_OVERFLOW {self.overflow!r}, using 'block'")
+            self.overflow = "block"
+        
+        self._atexit_registered = False
+        self._reset()
+    
+    def _reset(self) -> None:
+        """Fresh buffer and flusher state (also after a fork)"""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        # Flusher waits for a full batch; blocked publishers wait for space
+        self._batch_ready = threading.Condition(self._lock)
+        self._space = threading.Condition(self._lock)
+        self._buffers: Dict[str, Deque[Entry]] = {}
+        self._size = 0
+        self._closing = False
+        
+        self._thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._async_wakeup: Optional[asyncio.Event] = None
+        self._redis: Optional[redis.Redis] = None
+        self._async_redis: Optional[aioredis.Redis] = None
+        self._stats = {"queued": 0, "published": 0, "dropped": 0, "failed": 0, "flushes": 0}
+    
+    def _get_redis(self) -> redis.Redis:
+        """Get Redis client"""
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+    
+    def _get_async_redis(self) -> aioredis.Redis:
+        """Get async Redis client (flush task)"""
+        if self._async_redis is None:
+            self._async_redis = aioredis.from_url(settings.REDIS_URL)
+        return self._async_redis
+    
+    # ============================================================
+    # Queueing
+    # ============================================================
+    
+    def _enqueue(self, stream: str, fields: Dict[str, Any], maxlen: int) -> bool:
+        """Add an entry to the buffer, applying the overflow policy (lock held)"""
+        if self._size >= self.queue_max:
+            self._stats["dropped"] += 1
+            buffer = self._buffers.get(stream)
+            if self.overflow != "drop_oldest" or not buffer:
+                return False
+            buffer.popleft()
+            self._size -= 1
+        
+        self._buffers.setdefault(stream, deque()).append((fields, maxlen))
+        self._size += 1
+        self._stats["queued"] += 1
+        
+        if self._size >= self.batch_size:
+            self._batch_ready.notify()
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._async_wakeup.set)
+        return True
+    
+    def publish(
+        self,
+        stream: str,
+        event_type: str,
+        data: Dict[str, Any],
+        maxlen: int
+    ) -> bool:
+        """
+        Queue an event for the next flush.
+        
+        Returns False if the event was dropped because the buffer is full.
+        """
+        if os.getpid() != self._pid:
+            # Forked worker: the parent's buffer and flusher are not ours
+            self._reset()
+        fields = encode_event(event_type, data)
+        self._ensure_started()
+        
+        with self._lock:
+            if self.overflow == "block" and self._size >= self.queue_max:
+                # Waiting on the flush task's own loop would stall it
+                if threading.get_ident() != self._loop_thread_id:
+                    self._space.wait_for(lambda: self._size < self.queue_max, timeout=self.block_sec)
+            return self._enqueue(stream, fields, maxlen)
+    
+    async def publish_async(
+        self,
+        stream: str,
+        event_type: str,
+        data: Dict[str, Any],
+        maxlen: int
+    ) -> bool:
+        """Queue an event without blocking the event loop"""
+        fields = encode_event(event_type, data)
+        self._ensure_started()
+        
+        if self.overflow == "block":
+            deadline = time.monotonic() + self.block_sec
+            while self._size >= self.queue_max and time.monotonic() < deadline:
+                await asyncio.sleep(0.005)
+        
+        with self._lock:
+            return self._enqueue(stream, fields, maxlen)
+    
+    # ============================================================
+    # Flushing
+    # ============================================================
+    
+    def _take(self) -> List[Tuple[str, Dict[str, Any], int]]:
+        """Remove all queued entries, in publish order per stream"""
+        with self._lock:
+            buffers, self._buffers = self._buffers, {}
+            self._size = 0
+            self._space.notify_all()
+        return [
+            (stream, fields, maxlen)
+            for stream, entries in buffers.items()
+            for fields, maxlen in entries
+        ]
+    
+    def _requeue(self, entries: List[Tuple[str, Dict[str, Any], int]]) -> List[Tuple[str, Dict[str, Any], int]]:
+        """
+        Put unwritten entries back at the head of their stream buffers (lock held).
+        
+        Returns the entries discarded to stay within queue_max.
+        """
+        excess = max(self._size + len(entries) - self.queue_max, 0)
+        if self.overflow == "drop_oldest":
+            discarded, entries = entries[:excess], entries[excess:]
+        else:
+            kept = len(entries) - excess
+            discarded, entries = entries[kept:], entries[:kept]
+        
+        by_stream: Dict[str, List[Entry]] = {}
+        for stream, fields, maxlen in entries:
+            by_stream.setdefault(stream, []).append((fields, maxlen))
+        for stream, stream_entries in by_stream.items():
+            self._buffers.setdefault(stream, deque()).extendleft(reversed(stream_entries))
+        self._size += len(entries)
+        return discarded
+    
+    def _check_results(
+        self,
+        batch: List[Tuple[str, Dict[str, Any], int]],
+        results: List[Any],
+        outcome: Dict[str, Any]
+    ) -> None:
+        """
+        Sort a pipeline's entries by their XADD reply into outcome:
+        written ("published" count), connection/timeout errors ("retry")
+        and entries Redis refused ("rejected", e.g. WRONGTYPE or OOM).
+        """
+        for entry, result in zip(batch, results):
+            if not isinstance(result, Exception):
+                outcome["published"] += 1
+                continue
+            outcome["error"] = outcome["error"] or result
+            outcome["retry" if isinstance(result, RETRYABLE_ERRORS) else "rejected"].append(entry)
+    
+    def _record_flush(self, outcome: Dict[str, Any], requeue: bool) -> int:
+        """Count a flush, re-queue retryable entries; returns the number written"""
+        retry, rejected = outcome["retry"], outcome["rejected"]
+        with self._lock:
+            self._stats["flushes"] += 1
+            self._stats["published"] += outcome["published"]
+            discarded = self._requeue(retry) if retry and requeue else retry
+            self._stats["failed"] += len(rejected) + len(discarded)
+        
+        if retry:
+            logger.error(
+                f"Stream publish flush failed for {len(retry)} events "
+                f"({len(retry) - len(discarded)} re-queued): {outcome['error']}"
+            )
+        if rejected:
+            logger.error(f"Stream publish: {len(rejected)} events rejected by Redis: {outcome['error']}")
+        return outcome["published"]
+    
+    def _new_outcome(self) -> Dict[str, Any]:
+        return {"published": 0, "retry": [], "rejected": [], "error": None}
+    
+    def flush(self, requeue: bool = True) -> int:
+        """
+        Write queued events through Redis pipelines; returns the number written.
+        
+        Events that failed on a connection error or timeout are re-queued for
+        the next flush unless requeue is False (shutdown); events Redis
+        rejected are dropped.
+        """
+        entries = self._take()
+        if not entries:
+            return 0
+        
+        outcome = self._new_outcome()
+        r = self._get_redis()
+        for start in range(0, len(entries), self.batch_size):
+            batch = entries[start:start + self.batch_size]
+            if outcome["retry"]:
+                # Redis unreachable: keep the rest for the next flush
+                outcome["retry"].extend(batch)
+                continue
+            try:
+                pipe = r.pipeline(transaction=False)
+                for stream, fields, maxlen in batch:
+                    pipe.xadd(stream, fields, maxlen=maxlen, approximate=True)
+                results = pipe.execute(raise_on_error=False)
+            except Exception as e:
+                results = [e] * len(batch)
+            self._check_results(batch, results, outcome)
+        
+        return self._record_flush(outcome, requeue)
+    
+    async def flush_async(self) -> int:
+        """Async flush (same as flush, on the event loop)"""
+        entries = self._take()
+        if not entries:
+            return 0
+        
+        outcome = self._new_outcome()
+        r = self._get_async_redis()
+        for start in range(0, len(entries), self.batch_size):
+            batch = entries[start:start + self.batch_size]
+            if outcome["retry"]:
+                outcome["retry"].extend(batch)
+                continue
+            try:
+                pipe = r.pipeline(transaction=False)
+                for stream, fields, maxlen in batch:
+                    pipe.xadd(stream, fields, maxlen=maxlen, approximate=True)
+                results = await pipe.execute(raise_on_error=False)
+            except Exception as e:
+                results = [e] * len(batch)
+            self._check_results(batch, results, outcome)
+        
+        return self._record_flush(outcome, requeue=True)
+    
+    def _run(self) -> None:
+        """Flush thread loop"""
+        while True:
+            with self._lock:
+                self._batch_ready.wait_for(
+                    lambda: self._closing or self._size >= self.batch_size,
+                    timeout=self.flush_sec
+                )
+                closing = self._closing
+            self.flush()
+            if closing:
+                return
+    
+    async def _run_async(self) -> None:
+        """Flush task loop"""
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._async_wakeup.wait(), timeout=self.flush_sec)
+            except asyncio.TimeoutError:
+                pass
+            self._async_wakeup.clear()
+            await self.flush_async()
+    
+    # ============================================================
+    # Lifecycle
+    # ============================================================
+    
+    def _ensure_started(self) -> None:
+        """Start the flush thread on first use (unless the flush task runs)"""
+        if self._task is not None and not self._task.done():
+            return
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._closing = False
+                    self._thread = threading.Thread(
+                        target=self._run,
+                        name="stream-publisher",
+                        daemon=True
+                    )
+                    self._thread.start()
+                    if not self._atexit_registered:
+                        atexit.register(self.close)
+                        self._atexit_registered = True
+    
+    async def start_async(self) -> None:
+        """Flush from a task on the running event loop instead of a thread"""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._async_wakeup = asyncio.Event()
+        self._closing = False
+        self._task = self._loop.create_task(self._run_async())
+    
+    def close(self, timeout: float = 5) -> None:
+        """Stop the flush thread and flush what is left"""
+        if self._thread is not None and self._thread.is_alive():
+            with self._lock:
+                self._closing = True
+                self._batch_ready.notify()
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        self.flush(requeue=False)
+    
+    async def aclose(self) -> None:
+        """Stop the flush task (and thread, if any) and flush what is left"""
+        if self._task is not None:
+            self._closing = True
+            self._async_wakeup.set()
+            await self._task
+            self._task = None
+            self._loop = None
+            self._loop_thread_id = None
+        await asyncio.to_thread(self.close)
+        if self._async_redis is not None:
+            await self._async_redis.aclose()
+            self._async_redis = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Publishing counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["buffered"] = self._size
+        stats["mode"] = "task" if self._task is not None and not self._task.done() else "thread"
+        return stats
+
+
+# Singleton instance
+stream_publisher = StreamPublisher()
@@ -9,11 +9,11 @@ Provides event ingestion for:
 This enables moving from batch → near-real-time processing without redesign.
 """
 import logging
-import json
 from typing import Dict, Any, List, Optional
-from datetime import datetime
 import redis
 from kumele_ai.config import settings
+from kumele_ai.services.stream_publisher import stream_publisher, encode_event, decode_data
+from kumele_ai.services.heavy_hitters import heavy_hitters, METRIC_KEYWORDS, METRIC_SEARCH
 
 logger = logging.getLogger(__name__)
 
@@ -34,12 +34,15 @@ class StreamService:
     STREAM_ADS = "kumele:stream:ad_events"
     STREAM_ACTIVITY = "kumele:stream:activity_events"
     STREAM_MODERATION = "kumele:stream:moderation_events"
+    # Events a consumer group gave up on (see stream_processor.py)
+    STREAM_DEAD_LETTER = "kumele:stream:dead_letter"
     
     # Default retention (max entries per stream)
     DEFAULT_MAXLEN = 10000
     
     def __init__(self):
         self._redis: Optional[redis.Redis] = None
+        self.buffered = settings.STREAM_PUBLISH_BUFFERED
     
     def _get_redis(self) -> redis.Redis:
         """Get Redis client"""
@@ -88,7 +91,8 @@ class StreamService:
         stream_name: str,
         event_type: str,
         data: Dict[str, Any],
-        maxlen: Optional[int] = None
+        maxlen: Optional[int] = None,
+        buffered: Optional[bool] = None
     ) -> Optional[str]:
         """
         Publish event to a Redis stream.
@@ -98,24 +102,26 @@ class StreamService:
             event_type: Type of event (e.g., 'sentiment_analyzed', 'ad_clicked')
             data: Event payload
             maxlen: Optional max stream length (uses default if not specified)
+            buffered: Queue for the next pipelined flush instead of a direct
+                XADD (STREAM_PUBLISH_BUFFERED if not specified)
             
         Returns:
-            Stream entry ID or None on failure
+            Stream entry ID, "*" if queued (the ID is assigned at flush),
+            or None on failure
         """
+        if self.buffered if buffered is None else buffered:
+            queued = stream_publisher.publish(
+                stream_name, event_type, data, maxlen or self.DEFAULT_MAXLEN
+            )
+            return "*" if queued else None
+        
         try:
             r = self._get_redis()
             
-            # Prepare event data
-            event = {
-                "type": event_type,
-                "timestamp": datetime.utcnow().isoformat(),
-                "data": json.dumps(data)
-            }
-            
             # Add to stream with retention policy
             entry_id = r.xadd(
                 stream_name,
-                event,
+                encode_event(event_type, data),
                 maxlen=maxlen or self.DEFAULT_MAXLEN,
                 approximate=True  # Better performance
             )
@@ -127,6 +133,22 @@ class StreamService:
             logger.error(f"Error publishing to stream {stream_name}: {e}")
             return None
     
+    async def publish_event_async(
+        self,
+        stream_name: str,
+        event_type: str,
+        data: Dict[str, Any],
+        maxlen: Optional[int] = None
+    ) -> bool:
+        """
+        Queue an event for buffered publishing from async code.
+        
+        Never blocks the event loop; returns False if the event was dropped.
+        """
+        return await stream_publisher.publish_async(
+            stream_name, event_type, data, maxlen or self.DEFAULT_MAXLEN
+        )
+    
     # ==========================================
     # NLP Events
     # ==========================================
@@ -155,11 +177,12 @@ class StreamService:
     def publish_keywords_event(
         self,
         content_id: str,
-        keywords: List[str],
+        keywords: List[Dict[str, Any]],
         entities: List[str],
         user_id: Optional[int] = None
     ) -> Optional[str]:
-        """Publish keyword extraction event"""
+        """Publish keyword extraction event (keywords as {keyword, type, score})"""
+        heavy_hitters.add(METRIC_KEYWORDS, (f"{kw['type']}|{kw['keyword']}" for kw in keywords))
         return self.publish_event(
             self.STREAM_NLP,
             "keywords_extracted",
@@ -271,6 +294,22 @@ class StreamService:
             }
         )
     
+    def _search_event_data(
+        self,
+        user_id: Optional[int],
+        query: str,
+        filters: Optional[Dict[str, Any]],
+        results_count: int
+    ) -> Dict[str, Any]:
+        """Search event payload; the query is also counted for top searches"""
+        heavy_hitters.add(METRIC_SEARCH, [" ".join(query.lower().split())[:200]])
+        return {
+            "user_id": user_id,
+            "query": query,
+            "filters": filters or {},
+            "results_count": results_count
+        }
+    
     def publish_search_event(
         self,
         user_id: Optional[int],
@@ -282,12 +321,21 @@ class StreamService:
         return self.publish_event(
             self.STREAM_ACTIVITY,
             "search_performed",
-            {
-                "user_id": user_id,
-                "query": query,
-                "filters": filters or {},
-                "results_count": results_count
-            }
+            self._search_event_data(user_id, query, filters, results_count)
+        )
+    
+    async def publish_search_event_async(
+        self,
+        user_id: Optional[int],
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        results_count: int = 0
+    ) -> bool:
+        """Publish search event from async code (buffered, never blocks the loop)"""
+        return await self.publish_event_async(
+            self.STREAM_ACTIVITY,
+            "search_performed",
+            self._search_event_data(user_id, query, filters, results_count)
         )
     
     # ==========================================
@@ -347,7 +395,7 @@ class StreamService:
                     "id": entry_id,
                     "type": data.get("type"),
                     "timestamp": data.get("timestamp"),
-                    "data": json.loads(data.get("data", "{}"))
+                    "data": decode_data(data.get("data"))
                 }
                 result.append(event)
             
@@ -0,0 +1,222 @@
+"""
+Text Chunker - Token-aware sliding-window chunking for knowledge ingestion
+
+Chunks are measured with the embedding model's own tokenizer and capped
+at the model's max sequence length (minus special tokens), so nothing is
+silently truncated at embedding time. Boundaries follow the text:
+- markdown headings start a new chunk (no overlap across sections) and
+  are never emitted alone: headings that do not fit beside the first
+  sentence of their section are truncated
+- chunks are packed from whole sentences; a sentence longer than the
+  limit is split on token offsets
+- consecutive chunks share up to KB_CHUNK_OVERLAP_TOKENS of trailing
+  sentences
+
+Input may be a string or an iterable of text parts (e.g. PDF pages); the
+text is consumed line by line without building a full word list.
+"""
+import logging
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from kumele_ai.config import settings
+from kumele_ai.services.embed_service import embed_service
+
+logger = logging.getLogger(__name__)
+
+_HEADING = re.compile(r"^#{1,6}\s")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\S+")
+
+
+class TextChunker:
+    """Split documents into chunks that fit the embedding model"""
+    
+    def __init__(self, max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None):
+        self._max_tokens_setting = max_tokens or settings.KB_CHUNK_MAX_TOKENS
+        self._overlap_setting = settings.KB_CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        self._tokenizer = None
+        self._max_tokens: Optional[int] = None
+    
+    def _load(self) -> None:
+        """Resolve the tokenizer and token limit from the embedding model"""
+        if self._max_tokens is not None:
+            return
+        
+        model = embed_service.model
+        self._tokenizer = getattr(model, "tokenizer", None)
+        limit = self._max_tokens_setting
+        
+        model_limit = getattr(model, "max_seq_length", None)
+        if model_limit:
+            special = self._tokenizer.num_special_tokens_to_add() if self._tokenizer is not None else 0
+            limit = min(limit, model_limit - special)
+        
+        if self._tokenizer is None:
+            logger.warning("Embedding model has no tokenizer, chunking on whitespace tokens")
+        
+        self._max_tokens = limit
+    
+    @property
+    def max_tokens(self) -> int:
+        """Effective chunk size in model tokens"""
+        self._load()
+        return self._max_tokens
+    
+    @property
+    def overlap_tokens(self) -> int:
+        """Effective overlap in model tokens (always below the chunk size)"""
+        return min(self._overlap_setting, self.max_tokens // 2)
+    
+    def get_config(self) -> str:
+        """Chunking parameters, for detecting when documents need re-chunking"""
+        return f"tokens={self.max_tokens},overlap={self.overlap_tokens}"
+    
+    def _token_offsets(self, text: str) -> List[Tuple[int, int]]:
+        """Character span of each model token in text"""
+        if self._tokenizer is None:
+            return [m.span() for m in _WORD.finditer(text)]
+        encoding = self._tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True
+        )
+        return encoding["offset_mapping"]
+    
+    def count_tokens(self, text: str) -> int:
+        """Number of model tokens in text (without special tokens)"""
+        self._load()
+        if self._tokenizer is None:
+            return len(_WORD.findall(text))
+        return len(self._tokenizer(text, add_special_tokens=False)["input_ids"])
+    
+    def _iter_units(self, parts: Iterable[str]) -> Iterator[Tuple[str, bool]]:
+        """Yield (sentence, is_heading) from a stream of text parts"""
+        buffer = ""
+        for part in parts:
+            for line in part.splitlines():
+                stripped = line.strip()
+                if not stripped or _HEADING.match(stripped):
+                    # Paragraph or section boundary
+                    if buffer:
+                        yield buffer, False
+                        buffer = ""
+                    if stripped:
+                        yield stripped, True
+                    continue
+                
+                buffer = f"{buffer} {stripped}" if buffer else stripped
+                # Emit complete sentences, keep the unfinished tail
+                sentences = _SENTENCE_END.split(buffer)
+                for sentence in sentences[:-1]:
+                    yield sentence, False
+                buffer = sentences[-1]
+            
+            # Parts (pages) end at a unit boundary
+            if buffer:
+                yield buffer, False
+                buffer = ""
+    
+    def _split_long(self, unit: str, first_limit: Optional[int] = None) -> Iterator[Tuple[str, int]]:
+        """
+        Yield (text, token count) pieces of a unit that fit the chunk size.
+        
+        The first piece is limited to first_limit tokens when given (room
+        left beside headings).
+        """
+        limit = first_limit or self.max_tokens
+        count = self.count_tokens(unit)
+        if count <= limit:
+            yield unit, count
+            return
+        
+        # Token windows over the original text, overlapping like chunks do
+        offsets = self._token_offsets(unit)
+        start = 0
+        while True:
+            window = offsets[start:start + limit]
+            yield unit[window[0][0]:window[-1][1]], len(window)
+            if start + limit >= len(offsets):
+                break
+            start += limit - self.overlap_tokens
+            limit = self.max_tokens
+    
+    def _fit_headings(
+        self,
+        headings: List[Tuple[str, int]],
+        unit: str
+    ) -> Tuple[List[Tuple[str, int]], Optional[int]]:
+        """
+        Make a section's headings fit in one chunk with its first text unit.
+        
+        Headings keep at least a quarter of the chunk: they are truncated
+        to the room the unit leaves, or to that quarter when the unit
+        itself has to be split. Returns the (possibly truncated) headings
+        and the first-piece limit for _split_long (None if the unit fits).
+        """
+        heading_tokens = sum(count for _, count in headings)
+        count = self.count_tokens(unit)
+        if heading_tokens + count <= self.max_tokens:
+            return headings, None
+        
+        budget = max(self.max_tokens - count, self.max_tokens // 4)
+        if heading_tokens > budget:
+            text = " ".join(piece for piece, _ in headings)
+            offsets = self._token_offsets(text)[:budget]
+            headings = [(text[:offsets[-1][1]], len(offsets))]
+            heading_tokens = len(offsets)
+        return headings, self.max_tokens - heading_tokens
+    
+    def _overlap_tail(self, window: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+        """Trailing sentences of a chunk that fit in the overlap budget"""
+        tail: List[Tuple[str, int]] = []
+        tokens = 0
+        for piece, count in reversed(window):
+            if tokens + count > self.overlap_tokens:
+                break
+            tail.insert(0, (piece, count))
+            tokens += count
+        return tail
+    
+    def iter_chunks(self, text: Union[str, Iterable[str]]) -> Iterator[str]:
+        """Yield chunks of at most max_tokens model tokens"""
+        parts = [text] if isinstance(text, str) else text
+        max_tokens = self.max_tokens
+        
+        window: List[Tuple[str, int]] = []
+        window_tokens = 0
+        # Consecutive headings stay together with the text below them
+        has_body = False
+        
+        for unit, is_heading in self._iter_units(parts):
+            if is_heading and has_body:
+                yield " ".join(piece for piece, _ in window)
+                window, window_tokens, has_body = [], 0, False
+            
+            first_limit = None
+            if not is_heading:
+                if window and not has_body:
+                    # Never emit the headings alone: they share a chunk with the first unit
+                    window, first_limit = self._fit_headings(window, unit)
+                    window_tokens = sum(c for _, c in window)
+                has_body = True
+            
+            for piece, count in self._split_long(unit, first_limit):
+                if window and window_tokens + count > max_tokens:
+                    yield " ".join(p for p, _ in window)
+                    window = self._overlap_tail(window)
+                    window_tokens = sum(c for _, c in window)
+                    if window_tokens + count > max_tokens:
+                        window, window_tokens = [], 0
+                window.append((piece, count))
+                window_tokens += count
+        
+        if window:
+            yield " ".join(piece for piece, _ in window)
+    
+    def chunk(self, text: Union[str, Iterable[str]]) -> List[str]:
+        """All chunks of a document"""
+        return list(self.iter_chunks(text))
+
+
+# Singleton instance
+text_chunker = TextChunker()
@@ -5,6 +5,7 @@ import httpx
 import logging
 from typing import Dict, Any, List, Optional
 from kumele_ai.config import settings
+from kumele_ai.services.http_clients import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -65,20 +66,20 @@ class TranslateService:
                 "format": "text"
             }
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/translate",
-                    json=payload
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                return {
-                    "success": True,
-                    "translated_text": result.get("translatedText", ""),
-                    "source_language": source_lang,
-                    "target_language": target_lang
-                }
+            client = http_clients.get_async_client("translate", self.timeout)
+            response = await client.post(
+                f"{self.base_url}/translate",
+                json=payload
+            )
+            response.raise_for_status()
+            result = response.json()
+            
+            return {
+                "success": True,
+                "translated_text": result.get("translatedText", ""),
+                "source_language": source_lang,
+                "target_language": target_lang
+            }
                 
         except httpx.TimeoutException:
             logger.error("Translation request timed out")
@@ -100,27 +101,27 @@ class TranslateService:
                 "q": text
             }
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/detect",
-                    json=payload
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                if result and len(result) > 0:
-                    detected = result[0]
-                    return {
-                        "success": True,
-                        "language": detected.get("language", "en"),
-                        "confidence": detected.get("confidence", 0.0)
-                    }
-                
+            client = http_clients.get_async_client("translate", self.timeout)
+            response = await client.post(
+                f"{self.base_url}/detect",
+                json=payload
+            )
+            response.raise_for_status()
+            result = response.json()
+            
+            if result and len(result) > 0:
+                detected = result[0]
                 return {
                     "success": True,
-                    "language": "en",
-                    "confidence": 0.0
+                    "language": detected.get("language", "en"),
+                    "confidence": detected.get("confidence", 0.0)
                 }
+            
+            return {
+                "success": True,
+                "language": "en",
+                "confidence": 0.0
+            }
                 
         except Exception as e:
             logger.error(f"Language detection error: {e}")
@@ -154,13 +155,13 @@ class TranslateService:
     async def get_supported_languages(self) -> Dict[str, Any]:
         """Get list of supported languages"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(f"{self.base_url}/languages")
-                response.raise_for_status()
-                return {
-                    "success": True,
-                    "languages": response.json()
-                }
+            client = http_clients.get_async_client("translate", self.timeout)
+            response = await client.get(f"{self.base_url}/languages")
+            response.raise_for_status()
+            return {
+                "success": True,
+                "languages": response.json()
+            }
         except Exception as e:
             logger.error(f"Error getting languages: {e}")
             return {
@@ -171,9 +172,9 @@ class TranslateService:
     async def health_check(self) -> bool:
         """Check if translation service is healthy"""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/languages")
-                return response.status_code == 200
+            client = http_clients.get_async_client("translate", self.timeout)
+            response = await client.get(f"{self.base_url}/languages", timeout=10.0)
+            return response.status_code == 200
         except Exception as e:
             logger.error(f"Translation health check failed: {e}")
             return False
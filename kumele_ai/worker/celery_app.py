@@ -1,9 +1,14 @@
 """
 Celery Application Configuration
 """
+import asyncio
+import logging
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
 from kumele_ai.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Create Celery app
 celery_app = Celery(
     "kumele_worker",
@@ -33,8 +38,84 @@ celery_app.conf.update(
 # Task routing
 celery_app.conf.task_routes = {
     "kumele_ai.worker.tasks.sync_knowledge_documents": {"queue": "knowledge"},
+    "kumele_ai.worker.tasks.ingest_knowledge_files": {"queue": "knowledge"},
     "kumele_ai.worker.tasks.moderate_content": {"queue": "moderation"},
+    "kumele_ai.worker.tasks.moderate_texts_batch": {"queue": "moderation"},
     "kumele_ai.worker.tasks.process_support_email": {"queue": "support"},
     "kumele_ai.worker.tasks.generate_embeddings": {"queue": "embeddings"},
+    "kumele_ai.worker.tasks.refresh_event_embeddings": {"queue": "embeddings"},
+    "kumele_ai.worker.tasks.sync_event_vectors": {"queue": "embeddings"},
     "kumele_ai.worker.tasks.*": {"queue": "default"},
 }
+
+# Periodic tasks (celery -A kumele_ai.worker.celery_app beat)
+celery_app.conf.beat_schedule = {
+    # Full sync also backfills events created without the embedding hook
+    "sync-event-vectors": {
+        "task": "kumele_ai.worker.tasks.sync_event_vectors",
+        "schedule": settings.EVENT_VECTOR_SYNC_INTERVAL_SEC,
+    },
+}
+
+
+# =============================================================================
+# WORKER EVENT LOOP
+# =============================================================================
+# Tasks run async service code on one event loop per worker process, so the
+# pooled HTTP clients (services/http_clients.py) keep their connections
+# between tasks instead of being rebuilt on a fresh loop each time.
+
+_worker_loop = None
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Event loop shared by tasks in this worker process"""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop
+
+
+def run_async(coro):
+    """Run a coroutine to completion on the worker event loop"""
+    return get_worker_loop().run_until_complete(coro)
+
+
+@worker_process_init.connect
+def _init_worker_process(**kwargs):
+    """Start each worker process with its own event loop"""
+    global _worker_loop
+    # Forked children must not reuse the parent's loop
+    _worker_loop = None
+    get_worker_loop()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _shutdown_worker(**kwargs):
+    """Flush buffered stream events, close pooled HTTP clients and the worker event loop"""
+    global _worker_loop
+    from kumele_ai.services.http_clients import http_clients
+    from kumele_ai.services.stream_publisher import stream_publisher
+    from kumele_ai.services.heavy_hitters import heavy_hitters
+    
+    try:
+        stream_publisher.close()
+    except Exception as e:
+        logger.warning(f"Error flushing buffered stream events: {e}")
+    
+    try:
+        heavy_hitters.close()
+    except Exception as e:
+        logger.warning(f"Error flushing heavy-hitter sketches: {e}")
+    
+    try:
+        if _worker_loop is not None and not _worker_loop.is_closed():
+            _worker_loop.run_until_complete(http_clients.aclose())
+            _worker_loop.close()
+        else:
+            http_clients.close()
+    except Exception as e:
+        logger.warning(f"Error closing worker HTTP clients: {e}")
+    _worker_loop = None
@@ -5,6 +5,7 @@ import logging
 from typing import Optional, List, Dict, Any
 from celery import shared_task
 from kumele_ai.db.database import SessionLocal
+from kumele_ai.worker.celery_app import run_async
 
 logger = logging.getLogger(__name__)
 
@@ -15,30 +16,30 @@ def get_db_session():
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def sync_knowledge_documents(self, document_ids: Optional[List[int]] = None):
+def sync_knowledge_documents(
+    self,
+    document_ids: Optional[List[int]] = None,
+    force: bool = False
+):
     """
     Sync knowledge documents to Qdrant.
     
-    - Chunks text (~500 tokens)
-    - Generates embeddings
-    - Upserts into Qdrant
+    - Skips documents whose content hash is unchanged (unless force)
+    - Chunks text to the embedding model's token limit, with overlap
+    - Embeds only new chunks, in batches
+    - Upserts into Qdrant and deletes stale chunks
     - Tracks version in Postgres
     """
-    import asyncio
     from kumele_ai.services.chatbot_service import chatbot_service
     
     try:
         db = get_db_session()
         
         # Run async function in sync context
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        result = loop.run_until_complete(
-            chatbot_service.sync_documents(db, document_ids)
+        result = run_async(
+            chatbot_service.sync_documents(db, document_ids, force=force)
         )
         
-        loop.close()
         db.close()
         
         logger.info(f"Document sync completed: {result}")
@@ -49,6 +50,35 @@ def sync_knowledge_documents(self, document_ids: Optional[List[int]] = None):
         self.retry(exc=e)
 
 
+@shared_task(bind=True, max_retries=1, default_retry_delay=60)
+def ingest_knowledge_files(self, job_id: str):
+    """
+    Ingest a spooled bulk-upload job into the knowledge base.
+    
+    - Extracts PDF pages in a process pool
+    - Streams pages through chunking and embedding
+    - Bulk-inserts documents/embeddings and upserts Qdrant points
+    - Reports per-file progress on the job (GET /chatbot/knowledge/jobs/{job_id})
+    """
+    from kumele_ai.services.knowledge_ingest_service import knowledge_ingest_service
+    
+    try:
+        db = get_db_session()
+        
+        result = run_async(
+            knowledge_ingest_service.run_job(db, job_id)
+        )
+        
+        db.close()
+        
+        logger.info(f"Knowledge ingest job completed: {result}")
+        return result
+    
+    except Exception as e:
+        logger.error(f"Knowledge ingest job {job_id} failed: {e}")
+        self.retry(exc=e)
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
 def moderate_content(
     self,
@@ -100,6 +130,30 @@ def moderate_content(
         self.retry(exc=e)
 
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def moderate_texts_batch(self, items: List[Dict[str, Any]]):
+    """
+    Moderate many texts with batched model inference.
+    
+    items: List of {"text": str, "subtype": Optional[str], "content_id": Optional[str]}
+    """
+    from kumele_ai.services.moderation_service import moderation_service
+    
+    try:
+        db = get_db_session()
+        
+        results = moderation_service.moderate_texts(db, items)
+        
+        db.close()
+        
+        logger.info(f"Batch text moderation completed: {len(results)} items")
+        return {"processed": len(results), "results": results}
+    
+    except Exception as e:
+        logger.error(f"Batch text moderation failed: {e}")
+        self.retry(exc=e)
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def process_support_email(
     self,
@@ -115,22 +169,17 @@ def process_support_email(
     - Classifies and analyzes sentiment
     - Generates AI response suggestion
     """
-    import asyncio
     from kumele_ai.services.support_service import support_service
     
     try:
         db = get_db_session()
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        result = loop.run_until_complete(
+        result = run_async(
             support_service.process_incoming_email(
                 db, from_email, to_email, subject, body
             )
         )
         
-        loop.close()
         db.close()
         
         logger.info(f"Support email processed: {result.get('email_id')}")
@@ -167,6 +216,61 @@ def generate_embeddings(self, texts: List[str], content_ids: Optional[List[str]]
         self.retry(exc=e)
 
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def refresh_event_embeddings(
+    self,
+    event_ids: Optional[List[int]] = None,
+    force: bool = False
+):
+    """
+    Fill the event embedding store used by matching.
+    
+    - With event_ids: refresh those events (create/edit hooks)
+    - Without: backfill all upcoming events
+    - Only events whose content hash or model changed are re-encoded
+    """
+    from kumele_ai.services.event_embedding_service import event_embedding_service
+    
+    try:
+        db = get_db_session()
+        
+        result = event_embedding_service.refresh_events(db, event_ids, force=force)
+        
+        db.close()
+        
+        logger.info(f"Event embedding refresh completed: {result}")
+        return result
+    
+    except Exception as e:
+        logger.error(f"Event embedding refresh failed: {e}")
+        self.retry(exc=e)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def sync_event_vectors(self, event_ids: Optional[List[int]] = None):
+    """
+    Mirror upcoming events into the Qdrant events collection.
+    
+    - Payload: status, hobby_id, city, geo point
+    - Without event_ids: full sync, removing points for past/cancelled events
+    """
+    from kumele_ai.services.event_search_service import event_search_service
+    
+    try:
+        db = get_db_session()
+        
+        result = event_search_service.sync_events(db, event_ids)
+        
+        db.close()
+        
+        logger.info(f"Event vector sync completed: {result}")
+        return result
+    
+    except Exception as e:
+        logger.error(f"Event vector sync failed: {e}")
+        self.retry(exc=e)
+
+
 @shared_task(bind=True, max_retries=2, default_retry_delay=30)
 def send_email_reply(
     self,
@@ -177,20 +281,15 @@ def send_email_reply(
     """
     Send email reply asynchronously.
     """
-    import asyncio
     from kumele_ai.services.support_service import support_service
     
     try:
         db = get_db_session()
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        result = loop.run_until_complete(
+        result = run_async(
             support_service.send_reply(db, email_id, response_text, response_type)
         )
         
-        loop.close()
         db.close()
         
         logger.info(f"Email reply sent: {result.get('reply_id')}")
@@ -273,6 +372,34 @@ def update_reward_tiers(self, user_ids: Optional[List[int]] = None):
         raise
 
 
+@shared_task(bind=True)
+def analyze_sentiment_batch(self, texts: List[Dict[str, str]]):
+    """
+    Analyze sentiment of multiple texts in one batched pipeline run.
+    
+    texts: List of {"content_id": str, "text": str}
+    """
+    from kumele_ai.services.classify_service import classify_service
+    
+    try:
+        db = get_db_session()
+        
+        results = classify_service.analyze_sentiment_batch(
+            [item.get("text", "") for item in texts],
+            content_ids=[item.get("content_id") for item in texts],
+            db=db
+        )
+        
+        db.close()
+        
+        logger.info(f"Analyzed sentiment of {len(results)} texts")
+        return {"processed": len(results)}
+    
+    except Exception as e:
+        logger.error(f"Batch sentiment analysis failed: {e}")
+        raise
+
+
 @shared_task(bind=True)
 def extract_keywords_batch(self, texts: List[Dict[str, str]]):
     """
@@ -285,14 +412,7 @@ def extract_keywords_batch(self, texts: List[Dict[str, str]]):
     try:
         db = get_db_session()
         
-        results = []
-        for item in texts:
-            result = nlp_service.extract_keywords(
-                db,
-                item.get("text", ""),
-                item.get("content_id")
-            )
-            results.append(result)
+        results = nlp_service.extract_keywords_batch(db, texts)
         
         db.close()
         
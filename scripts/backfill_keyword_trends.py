@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Keyword Trends Backfill
+
+Loads existing nlp_keywords rows into the Redis keyword trend buckets
+(kumele_ai/services/keyword_trends.py), which are otherwise only fed by
+keywords_extracted stream events. Run it once after deploying the stream
+processors, with --until set to the deploy time so keywords already
+counted from the stream are not counted twice.
+
+Usage:
+    python scripts/backfill_keyword_trends.py --until 2026-10-16T12:00:00
+    python scripts/backfill_keyword_trends.py --days 90 --until 2026-10-16T12:00:00
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from kumele_ai.db.database import SessionLocal
+from kumele_ai.db.models import NLPKeyword
+from kumele_ai.services.keyword_trends import keyword_trends
+
+BATCH_SIZE = 5000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill Redis keyword trend buckets from nlp_keywords")
+    parser.add_argument("--until", required=True, help="Only rows extracted before this UTC time (ISO 8601)")
+    parser.add_argument("--days", type=int, default=keyword_trends.retention_days, help="How far back to load")
+    args = parser.parse_args()
+    
+    until = datetime.fromisoformat(args.until)
+    since = until - timedelta(days=args.days)
+    
+    r = keyword_trends._get_redis()
+    if r is None:
+        sys.exit("Redis unavailable")
+    
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            NLPKeyword.keyword,
+            NLPKeyword.keyword_type,
+            NLPKeyword.score,
+            NLPKeyword.extracted_at
+        ).filter(
+            NLPKeyword.extracted_at >= since,
+            NLPKeyword.extracted_at < until
+        ).yield_per(BATCH_SIZE)
+        
+        total = 0
+        pipe = r.pipeline(transaction=False)
+        for row in rows:
+            keyword_trends._add(
+                pipe,
+                [{"keyword": row.keyword, "type": row.keyword_type, "score": row.score}],
+                row.extracted_at
+            )
+            total += 1
+            if total % BATCH_SIZE == 0:
+                pipe.execute()
+                print(f"  {total} keywords loaded")
+        pipe.execute()
+    finally:
+        db.close()
+    
+    print(f"Backfilled {total} keywords from {since.isoformat()} to {until.isoformat()}")
+
+
+if __name__ == "__main__":
+    main()
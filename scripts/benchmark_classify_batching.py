@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Classification Batching Benchmark
+
+Compares per-item ClassifyService calls (analyze_sentiment /
+detect_toxicity in a loop) with the batched analyze_sentiment_batch /
+detect_toxicity_batch methods on the same texts, and checks that both
+paths produce the same labels.
+
+The classification result cache is disabled by default, otherwise the
+batched pass would only measure cache hits on the texts the per-item pass
+just classified. --cache keeps it enabled but clears it (both tiers)
+before each timed pass, so each pass starts cold.
+
+Usage:
+    python scripts/benchmark_classify_batching.py
+    python scripts/benchmark_classify_batching.py --texts 200 --batch-size 64
+    python scripts/benchmark_classify_batching.py --cache
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from kumele_ai.services.classify_service import classify_service
+from kumele_ai.services.inference_backend import PARITY_SAMPLE_TEXTS
+
+
+def make_texts(count: int) -> list:
+    """Chat-message-like texts of mixed length"""
+    rng = random.Random(42)
+    texts = []
+    for _ in range(count):
+        parts = rng.sample(PARITY_SAMPLE_TEXTS, k=rng.randint(1, 4))
+        texts.append(" ".join(parts))
+    return texts
+
+
+def timed(fn, cache: bool):
+    if cache:
+        for model in (classify_service.sentiment_model, classify_service.toxicity_model):
+            classify_service._result_cache.clear(model, include_redis=True)
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def report(name: str, count: int, single_sec: float, batch_sec: float, matches: bool):
+    print(f"\n{name}")
+    print(f"  per-item : {single_sec:8.3f} s   {count / single_sec:9.1f} texts/s")
+    print(f"  batched  : {batch_sec:8.3f} s   {count / batch_sec:9.1f} texts/s")
+    print(f"  speedup  : {single_sec / batch_sec:8.2f}x   labels match: {'yes' if matches else 'NO'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-item vs batched classification")
+    parser.add_argument("--texts", type=int, default=100, help="Number of texts")
+    parser.add_argument("--batch-size", type=int, default=None, help="Pipeline batch size (default CLASSIFY_BATCH_SIZE)")
+    parser.add_argument("--cache", action="store_true", help="Keep the result cache enabled (cleared before each pass)")
+    args = parser.parse_args()
+
+    classify_service._result_cache.enabled = args.cache
+    texts = make_texts(args.texts)
+
+    # Load models before timing
+    classify_service.analyze_sentiment(texts[0])
+    classify_service.detect_toxicity(texts[0])
+
+    single, single_sec = timed(lambda: [classify_service.analyze_sentiment(t) for t in texts], args.cache)
+    batch, batch_sec = timed(lambda: classify_service.analyze_sentiment_batch(texts, batch_size=args.batch_size), args.cache)
+    report(
+        "Sentiment",
+        len(texts), single_sec, batch_sec,
+        [r["sentiment"] for r in single] == [r["sentiment"] for r in batch]
+    )
+
+    single, single_sec = timed(lambda: [classify_service.detect_toxicity(t) for t in texts], args.cache)
+    batch, batch_sec = timed(lambda: classify_service.detect_toxicity_batch(texts, batch_size=args.batch_size), args.cache)
+    report(
+        "Toxicity",
+        len(texts), single_sec, batch_sec,
+        [r["is_toxic"] for r in single] == [r["is_toxic"] for r in batch]
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+HTTP Client Pooling Benchmark
+
+Measures the per-call overhead removed by the pooled clients in
+kumele_ai/services/http_clients.py: each request is timed once with a
+fresh httpx client per call (the previous behaviour: new TCP, and TLS
+for HTTPS, handshake every time) and once through the shared pooled
+client.
+
+By default a local keep-alive HTTP server is started so the script runs
+anywhere; pass --url to measure a real upstream (an HTTPS URL shows the
+TLS handshake cost).
+
+Usage:
+    python scripts/benchmark_http_clients.py
+    python scripts/benchmark_http_clients.py --requests 200
+    python scripts/benchmark_http_clients.py --url http://argos:5000/languages
+    python scripts/benchmark_http_clients.py --url https://openrouter.ai/api/v1/models
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+import numpy as np
+
+from kumele_ai.services.http_clients import http_clients
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Minimal JSON endpoint that keeps connections open"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_local_server() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def summarize(latencies: list) -> dict:
+    return {
+        "mean_ms": float(np.mean(latencies)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95))
+    }
+
+
+async def bench_async(url: str, requests: int, timeout: float) -> tuple:
+    per_call, pooled = [], []
+
+    for _ in range(requests):
+        start = time.perf_counter()
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            (await client.get(url)).raise_for_status()
+        per_call.append((time.perf_counter() - start) * 1000)
+
+    client = http_clients.get_async_client("benchmark", timeout)
+    (await client.get(url)).raise_for_status()  # open the connection before timing
+    for _ in range(requests):
+        start = time.perf_counter()
+        (await client.get(url)).raise_for_status()
+        pooled.append((time.perf_counter() - start) * 1000)
+
+    await http_clients.aclose()
+    return summarize(per_call), summarize(pooled)
+
+
+def bench_sync(url: str, requests: int, timeout: float) -> tuple:
+    per_call, pooled = [], []
+
+    for _ in range(requests):
+        start = time.perf_counter()
+        with httpx.Client(timeout=timeout) as client:
+            client.get(url).raise_for_status()
+        per_call.append((time.perf_counter() - start) * 1000)
+
+    client = http_clients.get_client("benchmark", timeout)
+    client.get(url).raise_for_status()
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.get(url).raise_for_status()
+        pooled.append((time.perf_counter() - start) * 1000)
+
+    http_clients.close()
+    return summarize(per_call), summarize(pooled)
+
+
+def report(name: str, per_call: dict, pooled: dict):
+    print(f"\n{name}")
+    for label, result in (("per-call", per_call), ("pooled", pooled)):
+        print(
+            f"  {label:<9} mean {result['mean_ms']:8.2f} ms   "
+            f"p50 {result['p50_ms']:8.2f} ms   p95 {result['p95_ms']:8.2f} ms"
+        )
+    print(f"  overhead removed per call: {per_call['mean_ms'] - pooled['mean_ms']:8.2f} ms (mean)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-call vs pooled httpx clients")
+    parser.add_argument("--url", default=None, help="GET endpoint to call (default: local keep-alive server)")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per mode")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    url = args.url or start_local_server()
+    print(f"Target: {url}")
+    print(f"HTTP/2: {'on' if http_clients.http2 else 'off'}")
+
+    report("Async (LLM / translation)", *asyncio.run(bench_async(url, args.requests, args.timeout)))
+    report("Sync (geocoding)", *bench_sync(url, args.requests, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
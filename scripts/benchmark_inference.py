@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Inference Backend Benchmark
+
+Compares the torch and ONNX Runtime (int8) backends for the embedding,
+sentiment and toxicity models: output parity, single-text latency
+(p50/p95), batch throughput and resident memory after loading.
+
+Usage:
+    python scripts/benchmark_inference.py
+    python scripts/benchmark_inference.py --iterations 200 --batch-size 32
+    python scripts/benchmark_inference.py --models embedding sentiment
+"""
+import argparse
+import gc
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from transformers import pipeline
+
+from kumele_ai.config import settings
+from kumele_ai.services.inference_backend import inference_backend, PARITY_SAMPLE_TEXTS
+
+CLASSIFIERS = {
+    "sentiment": ("sentiment-analysis", "distilbert-base-uncased-finetuned-sst-2-english"),
+    "toxicity": ("text-classification", "unitary/toxic-bert"),
+}
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench(run, texts, iterations: int, batch_size: int) -> dict:
+    """Latency percentiles for single texts and throughput for batches"""
+    run(texts[:1])  # warm-up
+
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        run([texts[i % len(texts)]])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    batch = (texts * (batch_size // len(texts) + 1))[:batch_size]
+    start = time.perf_counter()
+    rounds = max(iterations // batch_size, 1)
+    for _ in range(rounds):
+        run(batch)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "texts_per_sec": rounds * batch_size / elapsed
+    }
+
+
+def print_row(backend: str, result: dict, rss_delta: float):
+    print(
+        f"  {backend:<10} p50 {result['p50_ms']:8.2f} ms   p95 {result['p95_ms']:8.2f} ms   "
+        f"{result['texts_per_sec']:9.1f} texts/s   +{rss_delta:7.1f} MB"
+    )
+
+
+def benchmark_embedding(args):
+    print(f"\nEmbedding: {settings.EMBEDDING_MODEL}")
+
+    before = rss_mb()
+    torch_model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    torch_rss = rss_mb() - before
+    torch_result = bench(
+        lambda t: torch_model.encode(t, convert_to_numpy=True),
+        PARITY_SAMPLE_TEXTS, args.iterations, args.batch_size
+    )
+    del torch_model
+    gc.collect()
+
+    before = rss_mb()
+    onnx_model = inference_backend.load_onnx_sentence_transformer(settings.EMBEDDING_MODEL)
+    onnx_rss = rss_mb() - before
+    onnx_result = bench(
+        lambda t: onnx_model.encode(t, convert_to_numpy=True),
+        PARITY_SAMPLE_TEXTS, args.iterations, args.batch_size
+    )
+    parity = inference_backend.check_embedding_parity(onnx_model, settings.EMBEDDING_MODEL)
+
+    print_row("torch", torch_result, torch_rss)
+    print_row("onnx", onnx_result, onnx_rss)
+    print(f"  parity: {'OK' if parity else 'FAILED'} (min cosine >= {settings.ONNX_PARITY_MIN_COSINE})")
+
+
+def benchmark_classifier(name: str, args):
+    task, model_id = CLASSIFIERS[name]
+    print(f"\n{name.capitalize()}: {model_id}")
+
+    before = rss_mb()
+    torch_pipe = pipeline(task, model=model_id)
+    torch_rss = rss_mb() - before
+    torch_result = bench(
+        lambda t: torch_pipe(t, batch_size=args.batch_size, truncation=True),
+        PARITY_SAMPLE_TEXTS, args.iterations, args.batch_size
+    )
+    del torch_pipe
+    gc.collect()
+
+    before = rss_mb()
+    onnx_pipe = inference_backend.load_onnx_classifier(task, model_id)
+    onnx_rss = rss_mb() - before
+    onnx_result = bench(
+        lambda t: onnx_pipe(t, batch_size=args.batch_size, truncation=True),
+        PARITY_SAMPLE_TEXTS, args.iterations, args.batch_size
+    )
+    parity = inference_backend.check_classifier_parity(onnx_pipe, task, model_id)
+
+    print_row("torch", torch_result, torch_rss)
+    print_row("onnx", onnx_result, onnx_rss)
+    print(f"  parity: {'OK' if parity else 'FAILED'} (same labels, score diff <= {settings.ONNX_PARITY_MAX_SCORE_DIFF})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark torch vs ONNX inference backends")
+    parser.add_argument("--iterations", type=int, default=100, help="Single-text calls per backend")
+    parser.add_argument("--batch-size", type=int, default=32, help="Batch size for the throughput run")
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        choices=["embedding", *CLASSIFIERS.keys()],
+        default=["embedding", *CLASSIFIERS.keys()]
+    )
+    args = parser.parse_args()
+
+    print(f"ONNX quantization: {'int8 ' + settings.ONNX_QUANTIZATION_CONFIG if settings.ONNX_QUANTIZE else 'off'}")
+    print("Memory column is the RSS growth while loading each model")
+
+    for name in args.models:
+        if name == "embedding":
+            benchmark_embedding(args)
+        else:
+            benchmark_classifier(name, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ Creates the new tables added for:
 - Temp Chat System (temp_chats, temp_chat_messages, temp_chat_participants)
 - ML Features (user_ml_features, event_ml_features)
 - AI Ops Monitoring (ai_metrics, model_drift_log)
+- Event Embedding Store (event_embeddings)
 
 Usage:
     docker compose exec api python scripts/create_new_tables.py
@@ -313,6 +314,25 @@ def create_tables():
         
         run_sql(conn, "idx_model_drift_name", "CREATE INDEX IF NOT EXISTS idx_model_drift_name ON model_drift_log(model_name)")
         run_sql(conn, "idx_model_drift_detected", "CREATE INDEX IF NOT EXISTS idx_model_drift_detected ON model_drift_log(drift_detected)")
+        
+        # ============================================================
+        # 11. EVENT EMBEDDINGS TABLE
+        # ============================================================
+        run_sql(conn, "event_embeddings table", """
+            CREATE TABLE IF NOT EXISTS event_embeddings (
+                id SERIAL PRIMARY KEY,
+                event_id INTEGER NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+                content_hash VARCHAR(64) NOT NULL,
+                embedding_model VARCHAR(255) NOT NULL,
+                dimension INTEGER NOT NULL,
+                vector BYTEA NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                CONSTRAINT unique_event_embedding UNIQUE (event_id)
+            )
+        """)
+        
+        run_sql(conn, "idx_event_embeddings_event", "CREATE INDEX IF NOT EXISTS idx_event_embeddings_event ON event_embeddings(event_id)")
+        run_sql(conn, "idx_event_embeddings_model", "CREATE INDEX IF NOT EXISTS idx_event_embeddings_model ON event_embeddings(embedding_model)")
     
     print("\n" + "=" * 60)
     print("Migration Complete!")
@@ -328,6 +348,7 @@ def create_tables():
     print("  - event_ml_features")
     print("  - ai_metrics")
     print("  - model_drift_log")
+    print("  - event_embeddings")
     print("\nNow run the seed script:")
     print("  docker compose exec api python scripts/seed_database.py --clear")
 
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Chatbot Retrieval Evaluation
+
+Runs a labeled query set through ChatbotService.search_knowledge in each
+retrieval mode and reports document-level recall@k, MRR and per-stage
+latency:
+- dense          Qdrant vector search only
+- lexical        BM25 over knowledge_terms only
+- hybrid         dense + BM25 fused with reciprocal rank fusion
+- hybrid_rerank  hybrid, then the cross-encoder over the top candidates
+
+The query set is JSON Lines, one labeled query per line, with the
+relevant documents given by id and/or title:
+    {"query": "How do I apply coupon SUMMER-25?", "relevant_document_ids": [12]}
+    {"query": "refund policy for cancelled events", "relevant_titles": ["Refund Policy"]}
+
+Queries are searched as-is (no language detection or translation).
+Latency budgets are disabled so every mode is measured in full.
+
+Usage:
+    python scripts/evaluate_retrieval.py queries.jsonl
+    python scripts/evaluate_retrieval.py queries.jsonl --k 1 3 5 10 --modes dense hybrid
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from kumele_ai.db.database import SessionLocal
+from kumele_ai.db.models import KnowledgeDocument
+from kumele_ai.services.chatbot_service import chatbot_service
+from kumele_ai.services.embed_service import embed_service
+
+MODES = {
+    "dense": {"dense": True, "lexical": False, "rerank": False},
+    "lexical": {"dense": False, "lexical": True, "rerank": False},
+    "hybrid": {"dense": True, "lexical": True, "rerank": False},
+    "hybrid_rerank": {"dense": True, "lexical": True, "rerank": True},
+}
+
+
+def load_queries(path: str) -> list:
+    """Labeled queries, with titles resolved to document ids"""
+    with open(path) as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+    
+    db = SessionLocal()
+    try:
+        title_ids = {}
+        for doc in db.query(KnowledgeDocument.id, KnowledgeDocument.title).all():
+            title_ids.setdefault(doc.title.lower(), set()).add(doc.id)
+    finally:
+        db.close()
+    
+    labeled = []
+    for item in queries:
+        relevant = set(item.get("relevant_document_ids", []))
+        for title in item.get("relevant_titles", []):
+            relevant |= title_ids.get(title.lower(), set())
+        if not relevant:
+            print(f"  skipping (no known relevant documents): {item['query']}")
+            continue
+        labeled.append({"query": item["query"], "relevant": relevant})
+    return labeled
+
+
+async def evaluate_mode(queries: list, mode: str, ks: list) -> dict:
+    depth = max(ks)
+    hits = {k: [] for k in ks}
+    reciprocal_ranks = []
+    stage_times = {}
+    totals = []
+    
+    for item in queries:
+        timings, degraded = {}, []
+        start = time.perf_counter()
+        embedding = await embed_service.embed_text_async(item["query"])
+        candidates = await chatbot_service.search_knowledge(
+            item["query"], embedding, depth, timings, degraded, **MODES[mode]
+        )
+        totals.append((time.perf_counter() - start) * 1000)
+        for stage, ms in timings.items():
+            stage_times.setdefault(stage, []).append(ms)
+        
+        # Document-level ranking (first chunk of each document)
+        ranked_docs = list(dict.fromkeys(c["document_id"] for c in candidates))
+        relevant = item["relevant"]
+        for k in ks:
+            hits[k].append(len(relevant & set(ranked_docs[:k])) / len(relevant))
+        first = next((i for i, doc_id in enumerate(ranked_docs, start=1) if doc_id in relevant), None)
+        reciprocal_ranks.append(1.0 / first if first else 0.0)
+    
+    return {
+        "recall": {k: float(np.mean(hits[k])) for k in ks},
+        "mrr": float(np.mean(reciprocal_ranks)),
+        "latency_ms": {
+            stage: (float(np.percentile(times, 50)), float(np.percentile(times, 95)))
+            for stage, times in [*stage_times.items(), ("total", totals)]
+        }
+    }
+
+
+def report(mode: str, result: dict):
+    print(f"\n{mode}")
+    recall = "   ".join(f"R@{k} {value:.3f}" for k, value in result["recall"].items())
+    print(f"  {recall}   MRR {result['mrr']:.3f}")
+    for stage, (p50, p95) in result["latency_ms"].items():
+        print(f"  {stage:<16} p50 {p50:8.1f} ms   p95 {p95:8.1f} ms")
+
+
+async def run(args):
+    queries = load_queries(args.queries)
+    print(f"Queries: {len(queries)}")
+    if not queries:
+        return
+    
+    # Measure every stage in full
+    chatbot_service.dense_budget_ms = None
+    chatbot_service.lexical_budget_ms = None
+    chatbot_service.rerank_budget_ms = None
+    
+    for mode in args.modes:
+        report(mode, await evaluate_mode(queries, mode, sorted(args.k)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate chatbot retrieval recall@k on a labeled query set")
+    parser.add_argument("queries", help="JSON Lines file of labeled queries")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10], help="Cutoffs for recall@k")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    args = parser.parse_args()
+    
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,11 @@ Migration Script - Add New Columns to Existing Tables
 
 Adds columns that were added after initial table creation:
 - temp_chat_messages.moderation_reason (TEXT)
+- knowledge_documents.content_hash (VARCHAR(64))
+- knowledge_embeddings.term_count (INTEGER)
+- knowledge_terms table (BM25 postings)
+- chatbot_logs.prompt_tokens (INTEGER), chatbot_logs.generation_ms (FLOAT)
+- ad_interactions.stream_entry_id (VARCHAR(64) UNIQUE)
 
 Usage:
     python scripts/migrate_add_columns.py
@@ -44,6 +49,69 @@ def run_migration():
             """,
             "ALTER TABLE temp_chat_messages ADD COLUMN moderation_reason TEXT"
         ),
+        # Add content_hash to knowledge_documents (incremental knowledge sync)
+        (
+            "Add content_hash to knowledge_documents",
+            """
+            SELECT column_name FROM information_schema.columns 
+            WHERE table_name = 'knowledge_documents' AND column_name = 'content_hash'
+            """,
+            "ALTER TABLE knowledge_documents ADD COLUMN content_hash VARCHAR(64)"
+        ),
+        # Add term_count to knowledge_embeddings (BM25 chunk length)
+        (
+            "Add term_count to knowledge_embeddings",
+            """
+            SELECT column_name FROM information_schema.columns 
+            WHERE table_name = 'knowledge_embeddings' AND column_name = 'term_count'
+            """,
+            "ALTER TABLE knowledge_embeddings ADD COLUMN term_count INTEGER"
+        ),
+        # Create knowledge_terms (BM25 inverted index, filled by the next sync)
+        (
+            "Create knowledge_terms table",
+            """
+            SELECT table_name FROM information_schema.tables 
+            WHERE table_name = 'knowledge_terms'
+            """,
+            """
+            CREATE TABLE knowledge_terms (
+                id SERIAL PRIMARY KEY,
+                document_id INTEGER NOT NULL REFERENCES knowledge_documents(id) ON DELETE CASCADE,
+                vector_id VARCHAR(255) NOT NULL,
+                term VARCHAR(64) NOT NULL,
+                tf INTEGER NOT NULL
+            );
+            CREATE INDEX idx_knowledge_terms_term ON knowledge_terms(term);
+            CREATE INDEX idx_knowledge_terms_doc ON knowledge_terms(document_id)
+            """
+        ),
+        # Add prompt_tokens / generation_ms to chatbot_logs (prompt budgeting)
+        (
+            "Add prompt_tokens to chatbot_logs",
+            """
+            SELECT column_name FROM information_schema.columns 
+            WHERE table_name = 'chatbot_logs' AND column_name = 'prompt_tokens'
+            """,
+            "ALTER TABLE chatbot_logs ADD COLUMN prompt_tokens INTEGER"
+        ),
+        (
+            "Add generation_ms to chatbot_logs",
+            """
+            SELECT column_name FROM information_schema.columns 
+            WHERE table_name = 'chatbot_logs' AND column_name = 'generation_ms'
+            """,
+            "ALTER TABLE chatbot_logs ADD COLUMN generation_ms FLOAT"
+        ),
+        # Add stream_entry_id to ad_interactions (stream redeliveries write one row)
+        (
+            "Add stream_entry_id to ad_interactions",
+            """
+            SELECT column_name FROM information_schema.columns 
+            WHERE table_name = 'ad_interactions' AND column_name = 'stream_entry_id'
+            """,
+            "ALTER TABLE ad_interactions ADD COLUMN stream_entry_id VARCHAR(64) UNIQUE"
+        ),
         # Add any future column migrations here in the same format
     ]
     
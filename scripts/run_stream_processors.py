@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Redis Streams Consumer Runner
+
+Starts N consumer processes (STREAM_CONSUMERS by default), each a member
+of the STREAM_CONSUMER_GROUP group on every managed stream, running the
+handlers in kumele_ai/services/stream_handlers.py. Run it on several
+hosts to scale further: consumer names are host-pid, so all of them share
+the same groups. SIGTERM/SIGINT stop the consumers after their current
+read; events they leave pending are claimed by the others.
+
+Usage:
+    python scripts/run_stream_processors.py
+    python scripts/run_stream_processors.py --consumers 4
+    python scripts/run_stream_processors.py --stats
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from kumele_ai.config import settings
+from kumele_ai.services.stream_processor import stream_processor
+
+
+def consume():
+    """Consumer process entry point"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    signal.signal(signal.SIGTERM, lambda *_: stream_processor.stop())
+    signal.signal(signal.SIGINT, lambda *_: stream_processor.stop())
+    stream_processor.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Redis Streams consumer-group processors")
+    parser.add_argument("--consumers", type=int, default=settings.STREAM_CONSUMERS, help="Consumer processes to start")
+    parser.add_argument("--stats", action="store_true", help="Print group lag/throughput and exit")
+    args = parser.parse_args()
+    
+    if args.stats:
+        print(json.dumps(stream_processor.get_group_stats(), indent=2))
+        return
+    
+    # Create the groups once, before the consumers race to do it
+    stream_processor.ensure_groups()
+    
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=consume, name=f"stream-consumer-{i}")
+        for i in range(args.consumers)
+    ]
+    for process in processes:
+        process.start()
+    
+    def shutdown(*_):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+    
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    
+    for process in processes:
+        process.join()
+    
+    # Exit non-zero if a consumer crashed so the container is restarted
+    sys.exit(1 if any(process.exitcode for process in processes) else 0)
+
+
+if __name__ == "__main__":
+    main()
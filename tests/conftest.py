@@ -0,0 +1,54 @@
+"""
+Shared test fixtures.
+
+Tests run against a throwaway SQLite database: DATABASE_URL is pointed at
+it before kumele_ai is imported (the engine is created at import time),
+and JSONB columns are rendered as JSON.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, List
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'kumele_test.db')}"
+
+import pytest
+from sqlalchemy import event as sa_event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(element, compiler, **kw):
+    return "JSON"
+
+
+from kumele_ai.db.database import Base, SessionLocal, engine  # noqa: E402
+from kumele_ai.db import models  # noqa: E402,F401  (registers all tables)
+
+
+@pytest.fixture
+def db():
+    """Session on freshly created tables"""
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+
+
+@contextmanager
+def count_statements() -> Iterator[List[str]]:
+    """Collect the SQL statements executed on the engine"""
+    statements: List[str] = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    sa_event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,93 @@
+"""
+Answer cache against an in-memory Qdrant and fakeredis: lookups match on
+language and knowledge-base version, invalidation drops older entries,
+and an unreachable Redis is not reconnected on every call.
+"""
+import asyncio
+
+import fakeredis
+import pytest
+import redis
+from qdrant_client import AsyncQdrantClient
+
+from kumele_ai.services.answer_cache_service import AnswerCacheService
+from kumele_ai.services.embed_service import embed_service
+
+QUERY = [1.0, 0.0, 0.0, 0.0]
+ANSWER = {"response": "Saturdays at 10am.", "language": "en", "confidence": 0.9, "sources": []}
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def cache(redis_server, monkeypatch):
+    monkeypatch.setattr(embed_service, "get_embedding_dimension", lambda: len(QUERY))
+    monkeypatch.setattr(type(embed_service), "model_key", property(lambda self: "test-model"))
+    monkeypatch.setattr(
+        redis, "from_url",
+        lambda url, **kwargs: fakeredis.FakeRedis(server=redis_server, **kwargs)
+    )
+    service = AnswerCacheService()
+    service.enabled = True
+    service.threshold = 0.95
+    service.qdrant_client = AsyncQdrantClient(location=":memory:")
+    return service
+
+
+def test_lookup_matches_language_and_kb_version(cache):
+    async def run():
+        await cache.store("When are pottery classes?", QUERY, ANSWER, latency_ms=850)
+        
+        hit = await cache.lookup(QUERY, "en")
+        other_language = await cache.lookup(QUERY, "fr")
+        
+        await cache.invalidate()
+        after_invalidate = await cache.lookup(QUERY, "en")
+        return hit, other_language, after_invalidate
+    
+    hit, other_language, after_invalidate = asyncio.run(run())
+    
+    assert hit["response"] == ANSWER["response"]
+    assert hit["kb_version"] == 0
+    assert other_language is None
+    assert after_invalidate is None
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_kb_version_is_shared_through_redis(cache):
+    other_process = AnswerCacheService()
+    
+    async def run():
+        await other_process.invalidate()
+        await other_process.invalidate()
+        return await cache.get_kb_version()
+    
+    assert asyncio.run(run()) == 2
+
+
+def test_unreachable_redis_is_retried_after_backoff(cache, redis_server, monkeypatch):
+    redis_server.connected = False
+    connects = []
+    from_url = redis.from_url
+    monkeypatch.setattr(redis, "from_url", lambda url, **kwargs: connects.append(url) or from_url(url, **kwargs))
+    
+    async def run():
+        versions = []
+        for _ in range(3):
+            versions.append(await cache.invalidate())
+            versions.append(await cache.get_kb_version())
+        return versions
+    
+    # In-process version while Redis is down, one connect attempt
+    assert asyncio.run(run()) == [1, 1, 2, 2, 3, 3]
+    assert len(connects) == 1
+    
+    # Backoff elapsed
+    redis_server.connected = True
+    cache._redis_retry_at = 0.0
+    
+    assert asyncio.run(cache.get_kb_version()) == 0
+    assert len(connects) == 2
@@ -0,0 +1,132 @@
+"""
+/chatbot/ask/stream against a local fake TGI server: tokens are forwarded
+as SSE token events as they arrive and the ChatbotLog row is written once
+the stream completes.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from kumele_ai.api import chatbot
+from kumele_ai.db.models import ChatbotLog
+from kumele_ai.services.answer_cache_service import answer_cache_service
+from kumele_ai.services.chatbot_service import chatbot_service
+from kumele_ai.services.llm_service import llm_service
+from kumele_ai.services.prompt_budgeter import prompt_budgeter
+
+TOKENS = ["Pottery", " classes", " run", " on", " Saturdays", "."]
+
+
+class FakeTGIHandler(BaseHTTPRequestHandler):
+    """TGI /generate_stream: one SSE data line per token, then the end-of-sequence token"""
+    
+    requests = []
+    
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        FakeTGIHandler.requests.append((self.path, json.loads(body)))
+        
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for i, text in enumerate(TOKENS):
+            event = {"token": {"id": i, "text": text, "logprob": -0.1, "special": False}, "generated_text": None}
+            self.wfile.write(f"data:{json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+        final = {
+            "token": {"id": 2, "text": "</s>", "logprob": 0.0, "special": True},
+            "generated_text": "".join(TOKENS)
+        }
+        self.wfile.write(f"data:{json.dumps(final)}\n\n".encode())
+        self.wfile.flush()
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_tgi():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeTGIHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    FakeTGIHandler.requests = []
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def client(db, fake_tgi, monkeypatch):
+    """Chatbot router with retrieval stubbed and the LLM pointed at the fake TGI server"""
+    retrieval = {
+        "english_query": "When are pottery classes?",
+        "context_chunks": ["Pottery classes take place every Saturday at 10am."],
+        "language": "en",
+        "confidence": 0.82,
+        "source_docs": [{"document_id": 1, "title": "Schedule"}],
+        "degraded": []
+    }
+    
+    async def prepare(query, top_k, timings):
+        return [0.0] * 8, None, dict(retrieval)
+    
+    async def store(*args, **kwargs):
+        return None
+    
+    monkeypatch.setattr(chatbot_service, "_prepare", prepare)
+    monkeypatch.setattr(answer_cache_service, "store", store)
+    monkeypatch.setattr(llm_service, "provider", "local")
+    monkeypatch.setattr(llm_service, "local_url", fake_tgi)
+    # Character-based token estimate instead of downloading the LLM tokenizer
+    monkeypatch.setattr(prompt_budgeter, "_tokenizer", None)
+    monkeypatch.setattr(prompt_budgeter, "_tokenizer_loaded", True)
+    
+    app = FastAPI()
+    app.include_router(chatbot.router, prefix="/chatbot")
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _read_events(response):
+    """(event name, data) pairs of an SSE response"""
+    events = []
+    name = None
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            name = line[len("event: "):]
+        elif line.startswith("data: "):
+            events.append((name, json.loads(line[len("data: "):])))
+    return events
+
+
+def test_stream_forwards_tgi_tokens_and_logs(client, db):
+    with client.stream("POST", "/chatbot/ask/stream", json={"query": "When are pottery classes?"}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _read_events(response)
+    
+    names = [name for name, _ in events]
+    assert names == ["meta"] + ["token"] * len(TOKENS) + ["done"]
+    assert [data["text"] for name, data in events if name == "token"] == TOKENS
+    
+    meta = events[0][1]
+    assert meta["language"] == "en"
+    assert meta["cache"]["hit"] is False
+    
+    path, payload = FakeTGIHandler.requests[0]
+    assert path == "/generate_stream"
+    assert payload["parameters"]["max_new_tokens"] > 0
+    
+    done = events[-1][1]
+    log = db.query(ChatbotLog).filter(ChatbotLog.id == done["log_id"]).one()
+    assert log.response == "".join(TOKENS)
+    assert log.query == "When are pottery classes?"
+    assert log.prompt_tokens > 0
+    assert log.generation_ms is not None
+    assert "first_token" in done["debug"]["timings_ms"]
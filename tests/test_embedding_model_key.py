@@ -0,0 +1,70 @@
+"""
+Stored embeddings are keyed by the model and the inference backend it
+runs on: switching between torch and ONNX int8 re-encodes them instead
+of mixing vectors from both in one store.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from kumele_ai.config import settings
+from kumele_ai.db.models import Event, EventEmbedding, User
+from kumele_ai.services.embed_service import embed_service
+from kumele_ai.services.event_embedding_service import event_embedding_service
+from kumele_ai.services.inference_backend import inference_backend
+
+MODEL = settings.EMBEDDING_MODEL
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Set the configured backend and the one the model was loaded on"""
+    def set_backend(configured, loaded=None, quantize=True):
+        monkeypatch.setattr(inference_backend, "backend", configured)
+        monkeypatch.setattr(inference_backend, "quantize", quantize)
+        monkeypatch.setattr(inference_backend, "quantization_config", "avx2")
+        monkeypatch.setattr(inference_backend, "_loaded", {MODEL: loaded} if loaded else {})
+    return set_backend
+
+
+@pytest.mark.parametrize("configured, loaded, quantize, expected", [
+    ("torch", "torch", True, MODEL),
+    ("onnx", "onnx-int8", True, f"{MODEL}@onnx-int8-avx2"),
+    ("onnx", "onnx", False, f"{MODEL}@onnx"),
+    # ONNX export or parity check failed at load time
+    ("onnx", "torch", True, MODEL),
+    # Not loaded yet: the configured backend
+    ("onnx", None, True, f"{MODEL}@onnx-int8-avx2"),
+])
+def test_model_key_names_the_backend(backend, configured, loaded, quantize, expected):
+    backend(configured, loaded, quantize)
+    
+    assert inference_backend.model_key(MODEL) == expected
+
+
+def test_event_embeddings_are_re_encoded_after_a_backend_switch(backend, db, monkeypatch):
+    host = User(username="host", email="host@example.com", password_hash="x")
+    db.add(host)
+    db.flush()
+    event = Event(host_id=host.id, title="chess meetup", event_date=datetime.utcnow() + timedelta(days=1))
+    db.add(event)
+    db.commit()
+    
+    encoded = []
+    
+    def embed_texts(texts):
+        encoded.extend(texts)
+        return np.ones((len(texts), 4), dtype=np.float32).tolist()
+    
+    monkeypatch.setattr(embed_service, "embed_texts", embed_texts)
+    
+    backend("torch", "torch")
+    event_embedding_service.get_event_embeddings(db, [event])
+    event_embedding_service.get_event_embeddings(db, [event])
+    assert len(encoded) == 1
+    
+    backend("onnx", "onnx-int8")
+    event_embedding_service.get_event_embeddings(db, [event])
+    assert len(encoded) == 2
+    assert db.query(EventEmbedding.embedding_model).scalar() == f"{MODEL}@onnx-int8-avx2"
@@ -0,0 +1,202 @@
+"""
+Event ANN retrieval against an in-memory Qdrant: payload filters, stale
+point removal on sync, the coverage check and match_events falling back
+to its non-ANN path while the collection is not synced.
+"""
+import importlib
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+from kumele_ai.config import settings
+from kumele_ai.db.models import Event, Hobby, User
+from kumele_ai.services.embed_service import embed_service
+from kumele_ai.services.event_embedding_service import event_embedding_service
+from kumele_ai.services.event_search_service import EventSearchService
+
+DIM = 4
+
+
+def _vector(i: int) -> np.ndarray:
+    return np.random.default_rng(i).normal(size=DIM).astype(np.float32)
+
+
+@pytest.fixture
+def search(monkeypatch):
+    monkeypatch.setattr(embed_service, "get_embedding_dimension", lambda: DIM)
+    monkeypatch.setattr(
+        event_embedding_service, "get_event_embeddings",
+        lambda db, events: {event.id: _vector(event.id) for event in events}
+    )
+    service = EventSearchService()
+    service.qdrant_client = QdrantClient(location=":memory:")
+    service.coverage_check_sec = 0
+    return service
+
+
+def _seed(db, statuses) -> list:
+    """Events by one host, with the given statuses, alternating between two hobbies"""
+    host = User(username="host", email="host@example.com", password_hash="x")
+    hobbies = [Hobby(name="chess"), Hobby(name="hiking")]
+    db.add_all([host, *hobbies])
+    db.flush()
+    events = [
+        Event(
+            host_id=host.id,
+            title=f"meetup {i}",
+            hobby_id=hobbies[i % 2].id,
+            event_date=datetime.utcnow() + timedelta(days=i + 1),
+            status=status
+        )
+        for i, status in enumerate(statuses)
+    ]
+    db.add_all(events)
+    db.commit()
+    return events
+
+
+def _point_ids(search) -> set:
+    return set(search._scroll_point_ids())
+
+
+# ============================================================
+# Filters
+# ============================================================
+
+def test_search_candidates_applies_status_hobby_and_geo_filters(search):
+    search._ensure_collection()
+    payloads = {
+        1: {"status": "upcoming", "hobby_id": 1, "location": {"lat": 52.52, "lon": 13.40}},  # Berlin
+        2: {"status": "upcoming", "hobby_id": 1, "location": {"lat": 48.14, "lon": 11.58}},  # Munich
+        3: {"status": "upcoming", "hobby_id": 1},                                           # no coordinates
+        4: {"status": "upcoming", "hobby_id": 2, "location": {"lat": 52.50, "lon": 13.45}},
+        5: {"status": "cancelled", "hobby_id": 1, "location": {"lat": 52.52, "lon": 13.40}},
+    }
+    search.qdrant_client.upsert(
+        collection_name=search.collection_name,
+        points=[
+            PointStruct(id=point_id, vector=_vector(point_id).tolist(), payload={"event_id": point_id, **payload})
+            for point_id, payload in payloads.items()
+        ]
+    )
+    
+    near_berlin = search.search_candidates(
+        [_vector(1).tolist()], limit=10,
+        search_lat=52.52, search_lon=13.40, radius_km=50, hobby_ids=[1]
+    )
+    anywhere = search.search_candidates([_vector(1).tolist()], limit=10)
+    
+    # Within the radius or without coordinates, hobby 1, upcoming only
+    assert sorted(near_berlin) == [1, 3]
+    assert sorted(anywhere) == [1, 2, 3, 4]
+    assert near_berlin[0] == 1
+
+
+def test_build_filter_without_search_point_has_no_geo_condition(search):
+    search_filter = search._build_filter(52.52, None, 50, None)
+    
+    assert search_filter.should is None
+    assert [c.key for c in search_filter.must] == ["status"]
+
+
+# ============================================================
+# Sync and coverage
+# ============================================================
+
+def test_full_sync_removes_points_of_events_no_longer_upcoming(search, db):
+    events = _seed(db, ["upcoming"] * 4)
+    search.sync_events(db)
+    
+    events[1].status = "cancelled"
+    events[3].status = "past"
+    db.commit()
+    result = search.sync_events(db)
+    
+    assert result["success"]
+    assert result["events_removed"] == 2
+    assert _point_ids(search) == {events[0].id, events[2].id}
+
+
+def test_partial_sync_removes_only_listed_events(search, db):
+    events = _seed(db, ["upcoming"] * 3)
+    search.sync_events(db)
+    
+    events[0].status = "cancelled"
+    events[1].status = "cancelled"
+    db.commit()
+    result = search.sync_events(db, event_ids=[events[0].id])
+    
+    assert result["events_removed"] == 1
+    assert _point_ids(search) == {events[1].id, events[2].id}
+
+
+def test_is_synced_compares_ids_not_counts(search, db):
+    events = _seed(db, ["upcoming"] * 3)
+    assert not search.is_synced(db)
+    
+    search.sync_events(db)
+    assert search.is_synced(db)
+    
+    # One event cancelled, one created: same count, but the collection
+    # still holds the cancelled one and lacks the new one
+    events[0].status = "cancelled"
+    db.add(Event(
+        host_id=events[0].host_id,
+        title="new meetup",
+        hobby_id=events[0].hobby_id,
+        event_date=datetime.utcnow() + timedelta(days=30),
+        status="upcoming"
+    ))
+    db.commit()
+    assert not search.is_synced(db)
+    
+    search.sync_events(db)
+    assert search.is_synced(db)
+
+
+# ============================================================
+# Matching fallback
+# ============================================================
+
+@pytest.fixture
+def matching(search, monkeypatch):
+    module = importlib.import_module("kumele_ai.services.matching_service")
+    monkeypatch.setattr(module, "event_search_service", search)
+    monkeypatch.setattr(settings, "MATCHING_ANN_ENABLED", True)
+    monkeypatch.setattr(
+        module.matching_service, "get_user_hobby_embeddings",
+        lambda db, user_id: [_vector(0).tolist()]
+    )
+    return module.matching_service
+
+
+def test_match_events_uses_non_ann_candidates_until_synced(matching, search, db, monkeypatch):
+    events = _seed(db, ["upcoming"] * 4)
+    user = User(username="member", email="member@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    
+    ann_calls = []
+    search_candidates = search.search_candidates
+    
+    def tracked(*args, **kwargs):
+        ann_calls.append(kwargs)
+        return search_candidates(*args, **kwargs)
+    
+    monkeypatch.setattr(search, "search_candidates", tracked)
+    
+    # Only half the events indexed: every upcoming event is still a candidate
+    search.sync_events(db, event_ids=[events[0].id, events[1].id])
+    results = matching.match_events(db, user.id, limit=10)
+    
+    assert ann_calls == []
+    assert {r["event_id"] for r in results} == {event.id for event in events}
+    
+    search.sync_events(db)
+    results = matching.match_events(db, user.id, limit=10)
+    
+    assert len(ann_calls) == 1
+    assert {r["event_id"] for r in results} == {event.id for event in events}
@@ -0,0 +1,141 @@
+"""
+Matching feature prefetch: the number of queries must not grow with the
+number of candidate events (no per-event engagement/host lookups).
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from kumele_ai.config import settings
+from kumele_ai.db.models import (
+    Blog, BlogInteraction, Event, Hobby, HostRating, User, UserEvent, UserMLFeatures
+)
+from kumele_ai.services.event_embedding_service import event_embedding_service
+from kumele_ai.services.matching_service import matching_service
+from tests.conftest import count_statements
+
+
+def _seed(db, n_events: int) -> tuple:
+    """(user id, events): a user with check-ins and blog interactions, and n_events upcoming events by distinct hosts"""
+    user = User(username="member", email="member@example.com", password_hash="x")
+    hobbies = [Hobby(name=name) for name in ("chess", "hiking", "pottery")]
+    db.add_all([user, *hobbies])
+    db.flush()
+    
+    hosts = [
+        User(username=f"host{i}", email=f"host{i}@example.com", password_hash="x")
+        for i in range(n_events)
+    ]
+    db.add_all(hosts)
+    db.flush()
+    
+    events = [
+        Event(
+            host_id=host.id,
+            title=f"{hobbies[i % len(hobbies)].name} meetup {i}",
+            hobby_id=hobbies[i % len(hobbies)].id,
+            event_date=datetime.utcnow() + timedelta(days=i + 1),
+            status="upcoming"
+        )
+        for i, host in enumerate(hosts)
+    ]
+    past = Event(
+        host_id=hosts[0].id,
+        title="past chess meetup",
+        hobby_id=hobbies[0].id,
+        event_date=datetime.utcnow() - timedelta(days=7),
+        status="past"
+    )
+    db.add_all([*events, past])
+    db.flush()
+    
+    blog = Blog(author_id=hosts[0].id, title="Openings", content="e4 or d4?")
+    db.add(blog)
+    db.flush()
+    db.add_all([
+        UserEvent(user_id=user.id, event_id=past.id, rsvp_status="attended", checked_in=True),
+        BlogInteraction(blog_id=blog.id, user_id=user.id, interaction_type="like"),
+        *[HostRating(host_id=host.id, overall_score=3.5 + (i % 3) / 2) for i, host in enumerate(hosts)],
+        *[UserMLFeatures(user_id=host.id, reward_tier="gold") for host in hosts[::2]],
+    ])
+    db.commit()
+    # Loaded fresh, as match_events loads candidates (nothing left to lazy-load)
+    events = db.query(Event).filter(Event.status == "upcoming").order_by(Event.id).all()
+    return user.id, events
+
+
+@pytest.mark.parametrize("n_events", [5, 50])
+def test_prefetch_returns_features_for_every_host(db, n_events):
+    user_id, events = _seed(db, n_events)
+    
+    features = matching_service.prefetch_event_features(db, user_id, events)
+    
+    assert features["blog_interactions"] == 1
+    assert features["checkins_by_hobby"] == {events[0].hobby_id: 1}
+    assert set(features["host_ratings"]) == {event.host_id for event in events}
+    assert set(features["host_tiers"]) == {event.host_id for event in events[::2]}
+
+
+def test_prefetch_query_count_is_constant(db):
+    user_id, events = _seed(db, 200)
+    
+    with count_statements() as small:
+        matching_service.prefetch_event_features(db, user_id, events[:5])
+    with count_statements() as large:
+        matching_service.prefetch_event_features(db, user_id, events)
+    
+    assert len(small) == len(large)
+
+
+def test_match_events_query_count_is_constant(db, monkeypatch):
+    """Whole match_events request (embeddings stubbed, no ANN or geo stage)"""
+    user_id, events = _seed(db, 200)
+    rng = np.random.default_rng(0)
+    
+    monkeypatch.setattr(settings, "MATCHING_ANN_ENABLED", False)
+    monkeypatch.setattr(
+        matching_service, "get_user_hobby_embeddings",
+        lambda db, user_id: rng.normal(size=(2, 8)).tolist()
+    )
+    monkeypatch.setattr(
+        event_embedding_service, "get_event_embeddings",
+        lambda db, events: {event.id: rng.normal(size=8) for event in events}
+    )
+    
+    def run(n_events):
+        # Only the first n_events events stay upcoming
+        for i, event in enumerate(events):
+            event.status = "upcoming" if i < n_events else "cancelled"
+        db.commit()
+        with count_statements() as statements:
+            results = matching_service.match_events(db, user_id, limit=10)
+        return statements, results
+    
+    small, small_results = run(5)
+    large, large_results = run(200)
+    
+    assert len(small_results) == 5
+    assert len(large_results) == 10
+    assert len(small) == len(large)
+
+
+def test_match_events_skips_events_without_embedding(db, monkeypatch):
+    """Events whose embedding is unavailable are left out, not scored with a zero vector"""
+    user_id, events = _seed(db, 6)
+    rng = np.random.default_rng(0)
+    unembedded = {events[1].id, events[4].id}
+    
+    monkeypatch.setattr(settings, "MATCHING_ANN_ENABLED", False)
+    monkeypatch.setattr(
+        matching_service, "get_user_hobby_embeddings",
+        lambda db, user_id: rng.normal(size=(2, 8)).tolist()
+    )
+    monkeypatch.setattr(
+        event_embedding_service, "get_event_embeddings",
+        lambda db, events: {event.id: rng.normal(size=8) for event in events if event.id not in unembedded}
+    )
+    
+    results = matching_service.match_events(db, user_id, limit=10)
+    
+    assert {r["event_id"] for r in results} == {event.id for event in events} - unembedded
@@ -0,0 +1,190 @@
+"""
+Consumer-group runtime against fakeredis: dispatch and ack, skipped and
+undecodable events, redelivery of failed events through XAUTOCLAIM,
+dead-lettering and the group counters; plus redelivery-safe handlers.
+"""
+import fakeredis
+import pytest
+
+from kumele_ai.db.models import AdInteraction
+from kumele_ai.services.stream_processor import StreamProcessor, stream_processor
+from kumele_ai.services.stream_publisher import encode_event
+from kumele_ai.services.stream_service import StreamService
+
+STREAM = StreamService.STREAM_ACTIVITY
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def processor(redis_client):
+    processor = StreamProcessor()
+    processor._redis = redis_client
+    processor.handler_retries = 0
+    processor.claim_idle_ms = 0
+    processor.max_deliveries = 3
+    processor.ensure_groups()
+    return processor
+
+
+def _publish(r, event_type, data=None, **fields):
+    return r.xadd(STREAM, {**encode_event(event_type, data or {}), **fields})
+
+
+def _read(processor, consumer="c1"):
+    """One XREADGROUP batch through _process, as run() does"""
+    response = processor._get_redis().xreadgroup(
+        processor.group, consumer, {STREAM: ">"}, count=processor.batch_size
+    )
+    counts = {"processed": 0, "skipped": 0, "failed": 0, "dead_lettered": 0}
+    for stream, entries in response or []:
+        for outcome, n in processor._process(stream, entries, {}).items():
+            counts[outcome] += n
+    return counts
+
+
+def _pending(processor):
+    return processor._get_redis().xpending(STREAM, processor.group)["pending"]
+
+
+def test_dispatches_by_type_and_acks(processor, redis_client):
+    seen = []
+    processor.handler(STREAM, "rsvp_created")(seen.append)
+    entry_id = _publish(redis_client, "rsvp_created", {"user_id": 7})
+    
+    counts = _read(processor)
+    
+    assert counts["processed"] == 1
+    assert [(e["id"], e["type"], e["data"]) for e in seen] == [(entry_id, "rsvp_created", {"user_id": 7})]
+    assert _pending(processor) == 0
+
+
+def test_events_without_type_or_handler_are_skipped_and_acked(processor, redis_client):
+    processor.handler(STREAM, "rsvp_created")(lambda event: None)
+    redis_client.xadd(STREAM, {"data": "{}"})
+    _publish(redis_client, "unhandled_type")
+    
+    counts = _read(processor)
+    
+    assert counts["skipped"] == 2
+    assert _pending(processor) == 0
+
+
+def test_failed_event_stays_pending_and_is_redelivered_by_claim(processor, redis_client):
+    calls = []
+    
+    def flaky(event):
+        calls.append(event["id"])
+        if len(calls) == 1:
+            raise RuntimeError("database unavailable")
+    
+    processor.handler(STREAM, "rsvp_created")(flaky)
+    entry_id = _publish(redis_client, "rsvp_created")
+    
+    assert _read(processor)["failed"] == 1
+    assert _pending(processor) == 1
+    
+    results = processor._claim("c2", {})
+    
+    assert results[STREAM]["processed"] == 1
+    assert calls == [entry_id, entry_id]
+    assert _pending(processor) == 0
+
+
+def test_dead_letters_after_max_deliveries(processor, redis_client):
+    def broken(event):
+        raise RuntimeError("always fails")
+    
+    processor.handler(STREAM, "rsvp_created")(broken)
+    entry_id = _publish(redis_client, "rsvp_created")
+    
+    assert _read(processor)["failed"] == 1
+    assert processor._claim("c2", {})[STREAM]["failed"] == 1
+    # Third delivery reaches STREAM_MAX_DELIVERIES
+    assert processor._claim("c2", {})[STREAM]["dead_lettered"] == 1
+    
+    assert _pending(processor) == 0
+    [(_, dead)] = redis_client.xrange(StreamService.STREAM_DEAD_LETTER)
+    assert dead["entry_id"] == entry_id
+    assert dead["stream"] == STREAM
+    assert dead["deliveries"] == "3"
+    assert "always fails" in dead["error"]
+
+
+def test_undecodable_event_is_dead_lettered_without_retries(processor, redis_client):
+    calls = []
+    processor.handler(STREAM, "rsvp_created")(calls.append)
+    entry_id = redis_client.xadd(STREAM, {"type": "rsvp_created", "data": "{not json"})
+    
+    assert _read(processor)["dead_lettered"] == 1
+    
+    assert calls == []
+    assert _pending(processor) == 0
+    [(_, dead)] = redis_client.xrange(StreamService.STREAM_DEAD_LETTER)
+    assert dead["entry_id"] == entry_id
+    assert dead["deliveries"] == "1"
+
+
+def test_group_stats_report_outcomes_and_pending(processor, redis_client):
+    def handle(event):
+        if event["data"].get("fail"):
+            raise RuntimeError("boom")
+    
+    processor.handler(STREAM, "rsvp_created")(handle)
+    for i in range(3):
+        _publish(redis_client, "rsvp_created", {"i": i})
+    _publish(redis_client, "rsvp_created", {"fail": True})
+    redis_client.xadd(STREAM, {"data": "{}"})
+    
+    processor._record(STREAM, _read(processor))
+    stats = processor.get_group_stats()
+    
+    activity = stats["streams"][STREAM]
+    assert activity["length"] == 5
+    assert activity["processed"] == 3
+    assert activity["skipped"] == 1
+    assert activity["failed"] == 1
+    assert activity["dead_lettered"] == 0
+    assert activity["pending"] == 1
+    assert activity["throughput_per_sec"] > 0
+    assert stats["dead_letter_length"] == 0
+
+
+# ============================================================
+# Handlers: redelivered events have no second effect
+# ============================================================
+
+@pytest.fixture
+def handlers(redis_client, monkeypatch):
+    from kumele_ai.services import stream_handlers
+    monkeypatch.setattr(stream_processor, "_redis", redis_client)
+    return stream_handlers
+
+
+def _event(entry_id, event_type, data):
+    return {"id": entry_id, "type": event_type, "timestamp": "2026-10-16T12:00:00", "data": data}
+
+
+def test_counters_count_a_redelivered_event_once(handlers, redis_client):
+    search = _event("1-0", "search_performed", {"results_count": 0})
+    handlers.handle_search(search)
+    handlers.handle_search(search)
+    handlers.handle_search(_event("2-0", "search_performed", {"results_count": 3}))
+    
+    assert redis_client.hgetall("kumele:metrics:activity:2026101612") == {
+        "search_performed": "2",
+        "search_no_results": "1"
+    }
+
+
+def test_ad_interaction_redelivery_writes_one_row(handlers, db):
+    click = _event("5-0", "ad_click", {"ad_id": 3, "user_id": None})
+    handlers.handle_ad_interaction(click)
+    handlers.handle_ad_interaction(click)
+    handlers.handle_ad_interaction(_event("6-0", "ad_click", {"ad_id": 3, "user_id": None}))
+    
+    rows = db.query(AdInteraction).order_by(AdInteraction.id).all()
+    assert [(row.stream_entry_id, row.interaction_type) for row in rows] == [("5-0", "click"), ("6-0", "click")]
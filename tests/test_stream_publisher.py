@@ -0,0 +1,89 @@
+"""
+Buffered stream publishing against fakeredis: each XADD reply decides
+whether an entry is published, re-queued (connection errors) or dropped
+(errors Redis returns for that entry).
+"""
+import fakeredis
+import pytest
+
+from kumele_ai.services.stream_publisher import StreamPublisher, decode_data
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def publisher(server, monkeypatch):
+    publisher = StreamPublisher()
+    publisher.batch_size = 4
+    publisher._redis = fakeredis.FakeRedis(server=server)
+    # Flushed by the tests, not by the background thread
+    monkeypatch.setattr(publisher, "_ensure_started", lambda: None)
+    return publisher
+
+
+def _stream(redis_client, stream: str) -> list:
+    return [decode_data(fields[b"data"])["i"] for _, fields in redis_client.xrange(stream)]
+
+
+def test_rejected_entry_is_dropped_and_the_rest_written_once(publisher):
+    r = publisher._redis
+    r.set("bad", "not a stream")
+    for i in range(6):
+        publisher.publish("bad" if i == 3 else "good", "e", {"i": i}, 100)
+    
+    assert publisher.flush() == 5
+    assert publisher.flush() == 0
+    
+    assert _stream(r, "good") == [0, 1, 2, 4, 5]
+    stats = publisher.get_stats()
+    assert stats["published"] == 5
+    assert stats["failed"] == 1
+    assert stats["buffered"] == 0
+
+
+def test_connection_error_requeues_in_order(publisher, server):
+    for i in range(6):
+        publisher.publish("s", "e", {"i": i}, 100)
+    
+    server.connected = False
+    assert publisher.flush() == 0
+    stats = publisher.get_stats()
+    assert stats["buffered"] == 6
+    assert stats["failed"] == 0
+    
+    publisher.publish("s", "e", {"i": 6}, 100)
+    server.connected = True
+    assert publisher.flush() == 7
+    assert _stream(publisher._redis, "s") == list(range(7))
+
+
+def test_requeue_beyond_capacity_discards_per_overflow_policy(publisher, server, monkeypatch):
+    publisher.queue_max = 4
+    publisher.overflow = "drop_oldest"
+    for i in range(4):
+        publisher.publish("s", "e", {"i": i}, 100)
+    
+    # Two more events arrive while the (failing) flush is in progress
+    take = publisher._take
+    
+    def take_then_publish():
+        entries = take()
+        publisher.publish("s", "e", {"i": 4}, 100)
+        publisher.publish("s", "e", {"i": 5}, 100)
+        return entries
+    
+    monkeypatch.setattr(publisher, "_take", take_then_publish)
+    server.connected = False
+    publisher.flush()
+    monkeypatch.setattr(publisher, "_take", take)
+    
+    server.connected = True
+    publisher.flush()
+    # The two oldest re-queued entries did not fit
+    assert _stream(publisher._redis, "s") == [2, 3, 4, 5]
+    stats = publisher.get_stats()
+    assert stats["failed"] == 2
+    assert stats["dropped"] == 0